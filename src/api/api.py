@@ -1,13 +1,15 @@
 import os
+import json
 import logging
-from typing import Dict
+from typing import Dict, List, Optional
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import grpc
 import grpc.aio
 import time
+import uuid
 import asyncio
 import sys
 from prometheus_client import start_http_server, Counter, Histogram, Gauge, Info, make_asgi_app
@@ -54,12 +56,78 @@ MODEL_PROCESSING_LATENCY = Histogram(
     'Time taken for model processing'
 )
 
+TIME_TO_FIRST_TOKEN = Histogram(
+    'api_time_to_first_token_seconds',
+    'Time from receiving a streaming request until its first text chunk is sent'
+)
+
 TOKEN_COUNT = Gauge(
     'api_token_count',
     'Number of tokens in request/response',
     ['type']  # 'input' or 'output'
 )
 
+JOB_COUNT = Counter(
+    'api_jobs_total',
+    'Asynchronous generation jobs by outcome',
+    ['status']  # submitted, rejected, succeeded, failed, cancelled or expired
+)
+
+JOB_QUEUE_LENGTH = Gauge(
+    'api_job_queue_length',
+    'Jobs waiting for a worker'
+)
+
+JOB_RUNNING = Gauge(
+    'api_jobs_running',
+    'Jobs currently being generated'
+)
+
+JOB_QUEUE_WAIT = Histogram(
+    'api_job_queue_wait_seconds',
+    'Time jobs waited in the queue before a worker started them',
+    buckets=[0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0]
+)
+
+JOB_DURATION = Histogram(
+    'api_job_duration_seconds',
+    'Time from a worker starting a job until it finished',
+    buckets=[0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0]
+)
+
+# End-to-end budget for a model request; what is left of it is passed on as the gRPC deadline
+MODEL_REQUEST_TIMEOUT = 30.0
+# How often a pending model call checks whether the HTTP client is still connected
+DISCONNECT_POLL_INTERVAL = 0.5
+# Batches get a longer budget, shared by all of their items
+BATCH_REQUEST_TIMEOUT = 300.0
+# Most prompts accepted in one batch request (the coordinator enforces its own limit too)
+MAX_BATCH_ITEMS = 256
+# Asynchronous jobs: concurrent workers, queue bound, per-job budget and how long results are kept
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', '1000'))
+JOB_TIMEOUT = float(os.environ.get('JOB_TIMEOUT_SECONDS', '600'))
+JOB_RESULT_TTL = float(os.environ.get('JOB_RESULT_TTL_SECONDS', '3600'))
+# How often finished jobs past their retention are dropped
+JOB_EXPIRY_INTERVAL = 60.0
+# Seconds clients are asked to wait before retrying a request shed under overload
+OVERLOAD_RETRY_AFTER = 1
+# HTTP status for coordinator errors a client can act on; any other failure is a 500
+RPC_HTTP_STATUS = {
+    grpc.StatusCode.INVALID_ARGUMENT: 400,
+    grpc.StatusCode.RESOURCE_EXHAUSTED: 429,
+    grpc.StatusCode.UNAVAILABLE: 503,
+    grpc.StatusCode.DEADLINE_EXCEEDED: 504
+}
+# Request metric status recorded for each HTTP error status
+HTTP_ERROR_STATUS = {400: 'invalid', 429: 'rejected', 499: 'cancelled', 503: 'unavailable', 504: 'timeout'}
+
+# Coordinators to spread requests over, and how many persistent channels to keep to each
+COORDINATOR_ADDRESSES = os.environ.get('COORDINATOR_ADDRESSES', 'coordinator:50050').split(',')
+COORDINATOR_CHANNELS_PER_ADDRESS = int(os.environ.get('COORDINATOR_CHANNELS_PER_ADDRESS', '2'))
+# How long startup waits for the coordinator channels to connect before serving anyway
+CHANNEL_WARMUP_TIMEOUT = 5.0
+
 app = FastAPI(title="Model Serving API")
 
 # Add prometheus metrics endpoint
@@ -83,6 +151,27 @@ class ModelResponse(BaseModel):
     processingTime: float
     nodeCount: int = 3
 
+class BatchRequest(BaseModel):
+    texts: List[str]
+    metadata: Dict[str, str] = {}
+
+class BatchItemResult(BaseModel):
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+    processingTime: float
+
+class JobStatus(BaseModel):
+    id: str
+    status: str  # queued, running, succeeded, failed or cancelled
+    text: Optional[str] = None
+    error: Optional[str] = None
+    submittedAt: float
+    startedAt: Optional[float] = None
+    finishedAt: Optional[float] = None
+
 class TokenizerClient:
     def __init__(self):
         self.channel = None
@@ -139,21 +228,294 @@ class TokenizerClient:
             logger.error(f"Decoding failed: {str(e)}")
             raise
 
+    async def tokenize_batch(self, texts: List[str], metadata: Dict[str, str] = None) -> list:
+        """Tokenize many texts in one call; returns a TokenOutput (tokens or error) per text."""
+        start_time = time.time()
+        await self.connect()
+        try:
+            response = await self.stub.process_text_batch(
+                tokenizer_service_pb2.TextBatchInput(
+                    texts=texts,
+                    metadata=metadata or {}
+                )
+            )
+            TOKENIZATION_LATENCY.labels('encode_batch').observe(time.time() - start_time)
+            return list(response.items)
+        except Exception as e:
+            logger.error(f"Batch tokenization failed: {str(e)}")
+            raise
+
+    async def decode_batch(self, sequences: List[list], metadata: Dict[str, str] = None) -> list:
+        """Decode many token sequences in one call; returns a TextOutput (text or error) per sequence."""
+        start_time = time.time()
+        await self.connect()
+        try:
+            response = await self.stub.process_tokens_batch(
+                tokenizer_service_pb2.TokenBatchInput(
+                    items=[tokenizer_service_pb2.TokenInput(tokens=tokens) for tokens in sequences],
+                    metadata=metadata or {}
+                )
+            )
+            TOKENIZATION_LATENCY.labels('decode_batch').observe(time.time() - start_time)
+            return list(response.items)
+        except Exception as e:
+            logger.error(f"Batch decoding failed: {str(e)}")
+            raise
+
+    async def decode_stream(self):
+        """Open an incremental decode stream: write token chunks, read back one text delta per chunk."""
+        await self.connect()
+        return self.stub.decode_stream()
+
     async def close(self):
         if self.channel:
             await self.channel.close()
 
+class CoordinatorClient:
+    """Pool of persistent channels to the coordinators, shared by all requests.
+
+    Channels are opened once at startup and kept alive, so requests skip
+    connection setup and are multiplexed over HTTP/2. Calls are spread over
+    the pool round-robin.
+    """
+
+    def __init__(self, addresses: list, channels_per_address: int):
+        self.addresses = [address.strip() for address in addresses if address.strip()]
+        self.channels_per_address = channels_per_address
+        self.channels = []
+        self.stubs = []
+        self.next_stub = 0
+
+    def connect(self):
+        if not self.channels:
+            for address in self.addresses:
+                for _ in range(self.channels_per_address):
+                    channel = grpc.aio.insecure_channel(
+                        address,
+                        options=[
+                            ('grpc.max_send_message_length', 50 * 1024 * 1024),
+                            ('grpc.max_receive_message_length', 50 * 1024 * 1024),
+                            ('grpc.keepalive_time_ms', 30000),
+                            ('grpc.keepalive_timeout_ms', 10000),
+                            # Otherwise channels with identical settings share one connection
+                            ('grpc.use_local_subchannel_pool', 1)
+                        ]
+                    )
+                    self.channels.append(channel)
+                    self.stubs.append(model_service_pb2_grpc.ModelServiceStub(channel))
+
+    async def warm_up(self, timeout: float):
+        """Open every channel's connection now rather than on the first request."""
+        self.connect()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(channel.channel_ready() for channel in self.channels)),
+                timeout=timeout
+            )
+            logger.info(f"Connected {len(self.channels)} channels to coordinators {self.addresses}")
+        except asyncio.TimeoutError:
+            # Channels keep reconnecting in the background, so serving can start regardless
+            logger.warning(f"Coordinator channels not ready after {timeout}s; continuing")
+
+    def stub(self):
+        """Return the next stub in round-robin order."""
+        self.connect()
+        stub = self.stubs[self.next_stub % len(self.stubs)]
+        self.next_stub += 1
+        return stub
+
+    async def close(self):
+        for channel in self.channels:
+            await channel.close()
+        self.channels = []
+        self.stubs = []
+
 tokenizer_client = TokenizerClient()
+coordinator_client = CoordinatorClient(COORDINATOR_ADDRESSES, COORDINATOR_CHANNELS_PER_ADDRESS)
+
+class JobQueueFull(Exception):
+    """Raised when the job queue cannot accept more jobs."""
+
+class JobManager:
+    """In-process queue of generation jobs run by a bounded pool of workers.
+
+    Submitted jobs wait in a queue of at most ``max_queue`` until one of
+    ``num_workers`` workers runs them, each within ``timeout`` seconds.
+    Finished jobs keep their result for ``result_ttl`` seconds so clients
+    can poll for it, and are dropped after that.
+    """
+
+    def __init__(self, num_workers: int, max_queue: int, timeout: float, result_ttl: float):
+        self.num_workers = num_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self.jobs = {}
+        self.queue = None
+        self.tasks = []
+
+    def start(self):
+        """Start the workers and the expiry loop on the running event loop."""
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.num_workers)]
+        self.tasks.append(asyncio.create_task(self.expire_jobs()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, text: str, metadata: Dict[str, str]) -> dict:
+        """Queue a job and return it; raises JobQueueFull when the queue is at capacity."""
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'queued',
+            'input': text,
+            'metadata': metadata,
+            'text': None,
+            'error': None,
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'task': None
+        }
+        try:
+            self.queue.put_nowait(job['id'])
+        except asyncio.QueueFull:
+            JOB_COUNT.labels(status='rejected').inc()
+            raise JobQueueFull(f"Job queue is full ({self.max_queue} jobs waiting)")
+        self.jobs[job['id']] = job
+        JOB_COUNT.labels(status='submitted').inc()
+        JOB_QUEUE_LENGTH.set(self.queue.qsize())
+        return job
+
+    def cancel(self, job: dict):
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        if job['status'] == 'queued':
+            # Its queue entry is skipped when a worker reaches it
+            self.finish(job, 'cancelled')
+        elif job['status'] == 'running':
+            job['task'].cancel()
+
+    def finish(self, job: dict, status: str, text: str = None, error: str = None):
+        job.update(status=status, text=text, error=error, finished_at=time.time(), task=None)
+        JOB_COUNT.labels(status=status).inc()
+
+    async def worker(self):
+        while True:
+            job = self.jobs.get(await self.queue.get())
+            JOB_QUEUE_LENGTH.set(self.queue.qsize())
+            if job is None or job['status'] != 'queued':
+                continue
+            
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            JOB_QUEUE_WAIT.observe(job['started_at'] - job['submitted_at'])
+            JOB_RUNNING.inc()
+            job['task'] = asyncio.create_task(self.run(job))
+            try:
+                # wait() rather than await, so cancelling the job doesn't cancel the worker
+                await asyncio.wait({job['task']})
+            except asyncio.CancelledError:
+                job['task'].cancel()
+                raise
+            finally:
+                JOB_RUNNING.dec()
+                JOB_DURATION.observe(time.time() - job['started_at'])
+            
+            task = job['task']
+            if task.cancelled():
+                self.finish(job, 'cancelled')
+            elif task.exception() is not None:
+                error = task.exception()
+                if isinstance(error, grpc.aio.AioRpcError):
+                    error = f"{error.code().name}: {error.details()}"
+                logger.error(f"Job {job['id']} failed: {error}")
+                self.finish(job, 'failed', error=str(error))
+            else:
+                self.finish(job, 'succeeded', text=task.result())
+
+    async def run(self, job: dict) -> str:
+        """Tokenize, generate and decode one job's text."""
+        deadline = time.time() + self.timeout
+        input_tokens = await tokenizer_client.tokenize(job['input'], job['metadata'])
+        response = await coordinator_client.stub().process(
+            model_service_pb2.ModelInput(data=input_tokens, metadata=job['metadata']),
+            timeout=max(deadline - time.time(), 0.0)
+        )
+        return await tokenizer_client.decode(list(response.data), job['metadata'])
+
+    async def expire_jobs(self):
+        while True:
+            await asyncio.sleep(JOB_EXPIRY_INTERVAL)
+            cutoff = time.time() - self.result_ttl
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if job['finished_at'] is not None and job['finished_at'] < cutoff
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
+            if expired:
+                JOB_COUNT.labels(status='expired').inc(len(expired))
+
+    def status(self, job: dict) -> JobStatus:
+        return JobStatus(
+            id=job['id'],
+            status=job['status'],
+            text=job['text'],
+            error=job['error'],
+            submittedAt=job['submitted_at'],
+            startedAt=job['started_at'],
+            finishedAt=job['finished_at']
+        )
+
+job_manager = JobManager(JOB_WORKERS, JOB_QUEUE_SIZE, JOB_TIMEOUT, JOB_RESULT_TTL)
+
+async def cancel_on_disconnect(http_request: Request, call):
+    """Cancel a pending gRPC call once the HTTP client has disconnected."""
+    while not call.done():
+        if await http_request.is_disconnected():
+            logger.info("Client disconnected, cancelling model request")
+            call.cancel()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+def rpc_http_error(error: grpc.aio.AioRpcError) -> HTTPException:
+    """Translate a failed coordinator call into the HTTP error returned to the client.
+
+    Only the status details are passed on, never the RPC's debug string.
+    """
+    status_code = RPC_HTTP_STATUS.get(error.code(), 500)
+    if status_code == 429:
+        # Overload is shed early so clients can back off and retry
+        return HTTPException(
+            status_code=429,
+            detail=f"Server overloaded: {error.details()}",
+            headers={'Retry-After': str(OVERLOAD_RETRY_AFTER)}
+        )
+    if status_code == 504:
+        return HTTPException(status_code=504, detail="Request timed out")
+    if status_code == 500:
+        return HTTPException(status_code=500, detail=f"Processing failed: {error.details()}")
+    return HTTPException(status_code=status_code, detail=error.details())
+
+@app.on_event("startup")
+async def startup_event():
+    await coordinator_client.warm_up(CHANNEL_WARMUP_TIMEOUT)
+    job_manager.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await job_manager.stop()
     await tokenizer_client.close()
+    await coordinator_client.close()
 
 @app.post("/api/model/process")
-async def process_model(request: ModelRequest):
+async def process_model(request: ModelRequest, http_request: Request):
     """Process text through the distributed model"""
     request_start_time = time.time()
-    model_channel = None
+    deadline = request_start_time + MODEL_REQUEST_TIMEOUT
     
     try:
         logger.info(f"Received text request: {request.text}")
@@ -162,40 +524,48 @@ async def process_model(request: ModelRequest):
         input_tokens = await tokenizer_client.tokenize(request.text, request.metadata)
         logger.info(f"Tokenized input tokens: {input_tokens}")
         
-        # Connect to coordinator service
-        model_channel = grpc.aio.insecure_channel(
-            'coordinator:50050',
-            options=[
-                ('grpc.max_send_message_length', 50 * 1024 * 1024),
-                ('grpc.max_receive_message_length', 50 * 1024 * 1024),
-                ('grpc.keepalive_time_ms', 30000),
-                ('grpc.keepalive_timeout_ms', 10000)
-            ]
-        )
-        model_stub = model_service_pb2_grpc.ModelServiceStub(model_channel)
+        model_stub = coordinator_client.stub()
         
-        # Process through model
+        # Process through model; the remaining budget travels as the gRPC deadline
+        # so the coordinator and nodes stop working on the request once it is spent
         model_start_time = time.time()
+        call = model_stub.process(
+            model_service_pb2.ModelInput(
+                data=input_tokens,
+                metadata=request.metadata
+            ),
+            timeout=max(deadline - model_start_time, 0.0)
+        )
+        watcher = asyncio.create_task(cancel_on_disconnect(http_request, call))
         try:
-            response = await asyncio.wait_for(
-                model_stub.process(model_service_pb2.ModelInput(
-                    data=input_tokens,
-                    metadata=request.metadata
-                )),
-                timeout=30.0
-            )
+            response = await call
             # Record model processing time
             MODEL_PROCESSING_LATENCY.observe(time.time() - model_start_time)
             logger.info(f"Received response from model. Tokens: {list(response.data)}")
             
-        except asyncio.TimeoutError:
-            logger.error("Request timed out")
+        except grpc.aio.AioRpcError as e:
+            error = rpc_http_error(e)
+            logger.warning(f"Model request failed with {e.code().name}: {e.details()}")
             REQUEST_COUNT.labels(
                 method='POST',
                 endpoint='/api/model/process',
-                status='timeout'
+                status=HTTP_ERROR_STATUS.get(error.status_code, 'error')
             ).inc()
-            raise HTTPException(status_code=504, detail="Request timed out")
+            raise error
+        
+        except asyncio.CancelledError:
+            if not call.cancelled():
+                raise
+            REQUEST_COUNT.labels(
+                method='POST',
+                endpoint='/api/model/process',
+                status='cancelled'
+            ).inc()
+            # Nobody is left to read the response; 499 is the conventional status
+            raise HTTPException(status_code=499, detail="Client closed request")
+        
+        finally:
+            watcher.cancel()
         
         # Decode output tokens
         output_text = await tokenizer_client.decode(
@@ -221,8 +591,11 @@ async def process_model(request: ModelRequest):
         return ModelResponse(
             text=output_text,
             processingTime=round(processing_time, 2),
-            nodeCount=3
+            nodeCount=int(response.metadata.get('node_count', 3))
         )
+    
+    except HTTPException:
+        raise
         
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
@@ -235,10 +608,273 @@ async def process_model(request: ModelRequest):
             status_code=500,
             detail=f"Processing failed: {str(e)}"
         )
+
+@app.post("/api/model/process/batch")
+async def process_model_batch(request: BatchRequest, http_request: Request):
+    """Process many texts through the distributed model in one request.
+
+    The texts are tokenized, generated and decoded as batches. Results come
+    back in input order; an item that fails at any step carries an ``error``
+    while the other items still succeed.
+    """
+    request_start_time = time.time()
+    deadline = request_start_time + BATCH_REQUEST_TIMEOUT
+    if len(request.texts) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch has {len(request.texts)} texts, the limit is {MAX_BATCH_ITEMS}"
+        )
+    
+    try:
+        logger.info(f"Received batch request with {len(request.texts)} texts")
+        results = [BatchItemResult() for _ in request.texts]
+        
+        encoded = await tokenizer_client.tokenize_batch(request.texts, request.metadata)
+        pending = []
+        for index, item in enumerate(encoded):
+            if item.error:
+                results[index].error = f"Tokenization failed: {item.error}"
+            else:
+                pending.append((index, item.tokens))
+        
+        if pending:
+            call = coordinator_client.stub().process_batch(
+                model_service_pb2.ModelBatchInput(
+                    items=[model_service_pb2.ModelInput(data=tokens) for _, tokens in pending],
+                    metadata=request.metadata
+                ),
+                timeout=max(deadline - time.time(), 0.0)
+            )
+            watcher = asyncio.create_task(cancel_on_disconnect(http_request, call))
+            model_start_time = time.time()
+            try:
+                response = await call
+                MODEL_PROCESSING_LATENCY.observe(time.time() - model_start_time)
+            except grpc.aio.AioRpcError as e:
+                logger.warning(f"Batch model request failed with {e.code().name}: {e.details()}")
+                raise rpc_http_error(e)
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+                raise HTTPException(status_code=499, detail="Client closed request")
+            finally:
+                watcher.cancel()
+            
+            generated = []
+            for (index, _), output in zip(pending, response.items):
+                if 'error' in output.metadata:
+                    results[index].error = output.metadata['error']
+                else:
+                    generated.append((index, list(output.data)))
+            
+            if generated:
+                decoded = await tokenizer_client.decode_batch(
+                    [tokens for _, tokens in generated], request.metadata
+                )
+                for (index, _), item in zip(generated, decoded):
+                    if item.error:
+                        results[index].error = f"Decoding failed: {item.error}"
+                    else:
+                        results[index].text = item.text
         
+        failed = sum(1 for result in results if result.error)
+        REQUEST_COUNT.labels(
+            method='POST',
+            endpoint='/api/model/process/batch',
+            status='success' if not failed else 'partial'
+        ).inc()
+        REQUEST_LATENCY.labels(
+            method='POST',
+            endpoint='/api/model/process/batch'
+        ).observe(time.time() - request_start_time)
+        logger.info(f"Batch finished: {len(results) - failed} succeeded, {failed} failed")
+        
+        return BatchResponse(
+            results=results,
+            processingTime=round((time.time() - request_start_time) * 1000, 2)
+        )
+    
+    except HTTPException as e:
+        REQUEST_COUNT.labels(
+            method='POST',
+            endpoint='/api/model/process/batch',
+            status=HTTP_ERROR_STATUS.get(e.status_code, 'error')
+        ).inc()
+        raise
+    
+    except Exception as e:
+        logger.error(f"Error processing batch request: {str(e)}")
+        REQUEST_COUNT.labels(
+            method='POST',
+            endpoint='/api/model/process/batch',
+            status='error'
+        ).inc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Processing failed: {str(e)}"
+        )
+
+@app.post("/api/jobs", status_code=202, response_model=JobStatus)
+async def submit_job(request: ModelRequest):
+    """Queue a generation and return its job id straight away; poll GET /api/jobs/{id} for the result."""
+    try:
+        job = job_manager.submit(request.text, request.metadata)
+    except JobQueueFull as e:
+        REQUEST_COUNT.labels(method='POST', endpoint='/api/jobs', status='rejected').inc()
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={'Retry-After': str(OVERLOAD_RETRY_AFTER)}
+        )
+    REQUEST_COUNT.labels(method='POST', endpoint='/api/jobs', status='success').inc()
+    logger.info(f"Queued job {job['id']}")
+    return job_manager.status(job)
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Return a job's status, and its text once it has succeeded."""
+    job = job_manager.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job {job_id}")
+    return job_manager.status(job)
+
+@app.delete("/api/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; a finished job is returned unchanged."""
+    job = job_manager.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job {job_id}")
+    # A running job reports 'cancelled' once its generation has stopped
+    job_manager.cancel(job)
+    logger.info(f"Cancellation requested for job {job_id}")
+    return job_manager.status(job)
+
+def format_sse(payload: dict) -> str:
+    """Format a payload as a server-sent event."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+@app.post("/api/model/process/stream")
+async def process_model_stream(request: ModelRequest, http_request: Request):
+    """Process text through the distributed model, streaming text as tokens are generated.
+
+    Responds with server-sent events: one ``{"token", "text"}`` event per
+    chunk of generated tokens, where ``text`` is the text those tokens
+    completed (a character split across tokens arrives with its last
+    token), followed by a final ``{"done": true, "text", "processingTime"}``
+    event. The response starts with the first token, so a request that is
+    invalid, shed or out of time gets a plain HTTP error instead of a stream.
+    """
+    request_start_time = time.time()
+    logger.info(f"Received streaming text request: {request.text}")
+    
+    try:
+        input_tokens = await tokenizer_client.tokenize(request.text, request.metadata)
+    except Exception as e:
+        REQUEST_COUNT.labels(
+            method='POST',
+            endpoint='/api/model/process/stream',
+            status='error'
+        ).inc()
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    
+    # The stream gets what is left of the request budget as its deadline
+    call = coordinator_client.stub().process_stream(
+        model_service_pb2.ModelInput(
+            data=input_tokens,
+            metadata=request.metadata
+        ),
+        timeout=max(request_start_time + MODEL_REQUEST_TIMEOUT - time.time(), 0.0)
+    )
+    # The coordinator validates, admits and checks the nodes before the first token,
+    # so every rejection arrives here, before the response status is committed
+    watcher = asyncio.create_task(cancel_on_disconnect(http_request, call))
+    try:
+        first_response = await call.read()
+    except grpc.aio.AioRpcError as e:
+        error = rpc_http_error(e)
+        logger.warning(f"Streaming request failed with {e.code().name}: {e.details()}")
+        REQUEST_COUNT.labels(
+            method='POST',
+            endpoint='/api/model/process/stream',
+            status=HTTP_ERROR_STATUS.get(error.status_code, 'error')
+        ).inc()
+        raise error
+    except asyncio.CancelledError:
+        if not call.cancelled():
+            call.cancel()
+            raise
+        REQUEST_COUNT.labels(
+            method='POST',
+            endpoint='/api/model/process/stream',
+            status='cancelled'
+        ).inc()
+        raise HTTPException(status_code=499, detail="Client closed request")
     finally:
-        if model_channel:
-            await model_channel.close()
+        watcher.cancel()
+    
+    async def event_stream():
+        detokenizer = None
+        output_tokens = []
+        status = 'success'
+        try:
+            detokenizer = await tokenizer_client.decode_stream()
+            response = first_response
+            while response != grpc.aio.EOF:
+                if not output_tokens:
+                    TIME_TO_FIRST_TOKEN.observe(time.time() - request_start_time)
+                output_tokens.extend(response.data)
+                
+                # Only the text these tokens completed comes back, so each chunk costs O(chunk)
+                await detokenizer.write(tokenizer_service_pb2.TokenInput(tokens=response.data))
+                delta = await detokenizer.read()
+                yield format_sse({'token': list(response.data), 'text': delta.text})
+                response = await call.read()
+            
+            # Release text held back for an incomplete character
+            await detokenizer.done_writing()
+            while True:
+                delta = await detokenizer.read()
+                if delta == grpc.aio.EOF:
+                    break
+                yield format_sse({'token': [], 'text': delta.text})
+            
+            output_text = await tokenizer_client.decode(output_tokens, request.metadata)
+            processing_time = (time.time() - request_start_time) * 1000
+            yield format_sse({
+                'done': True,
+                'text': output_text,
+                'processingTime': round(processing_time, 2)
+            })
+            
+        except grpc.aio.AioRpcError as e:
+            # Failures after the first token can only be reported in the stream
+            status = HTTP_ERROR_STATUS.get(RPC_HTTP_STATUS.get(e.code(), 500), 'error')
+            logger.error(f"Streaming request failed: {e.details()}")
+            yield format_sse({'error': e.details() or str(e.code())})
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client went away; stop the generation upstream
+            status = 'cancelled'
+            raise
+        except Exception as e:
+            status = 'error'
+            logger.error(f"Streaming request failed: {str(e)}")
+            yield format_sse({'error': str(e)})
+        finally:
+            REQUEST_COUNT.labels(
+                method='POST',
+                endpoint='/api/model/process/stream',
+                status=status
+            ).inc()
+            REQUEST_LATENCY.labels(
+                method='POST',
+                endpoint='/api/model/process/stream'
+            ).observe(time.time() - request_start_time)
+            if not call.done():
+                call.cancel()
+            if detokenizer is not None and not detokenizer.done():
+                detokenizer.cancel()
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,111 @@
+"""Benchmark per-request coordinator channels against the API's pooled channels.
+
+Sends ``--requests`` small ``process`` calls, ``--concurrency`` at a time,
+once opening (and closing) a fresh channel per call as the API used to, and
+once through a ``CoordinatorClient`` pool. Without ``--target`` the calls go
+to an in-process echo server, so the numbers isolate channel overhead from
+generation time; with ``--target`` they go to a running coordinator.
+
+Usage:
+    python src/api/benchmark_channels.py --requests 500 --concurrency 1 8 32
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import grpc
+import grpc.aio
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+sys.path.append(os.path.join(os.path.dirname(current_dir), 'proto'))
+
+import model_service_pb2
+import model_service_pb2_grpc
+from api import CoordinatorClient
+
+class EchoServicer(model_service_pb2_grpc.ModelServiceServicer):
+    """Returns the request's tokens, so a call costs only transport and serialization."""
+
+    async def process(self, request, context):
+        return model_service_pb2.ModelOutput(data=request.data)
+
+async def start_echo_server():
+    server = grpc.aio.server()
+    model_service_pb2_grpc.add_ModelServiceServicer_to_server(EchoServicer(), server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    await server.start()
+    return server, f'127.0.0.1:{port}'
+
+async def fresh_channel_call(target: str, request):
+    channel = grpc.aio.insecure_channel(target)
+    try:
+        return await model_service_pb2_grpc.ModelServiceStub(channel).process(request)
+    finally:
+        await channel.close()
+
+async def run(call, num_requests: int, concurrency: int) -> dict:
+    """Issue ``num_requests`` calls with at most ``concurrency`` in flight; return latency stats."""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(num_requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'mean_ms': statistics.mean(latencies),
+        'p50_ms': latencies[len(latencies) // 2],
+        'p99_ms': latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)],
+        'requests_per_sec': num_requests / elapsed
+    }
+
+async def main(args):
+    server = None
+    target = args.target
+    if target is None:
+        server, target = await start_echo_server()
+
+    request = model_service_pb2.ModelInput(
+        data=list(range(args.tokens)),
+        metadata={'preset': 'greedy', 'max_new_tokens': '1'}
+    )
+    pool = CoordinatorClient([target], args.channels)
+    await pool.warm_up(timeout=5.0)
+
+    print(f"{'mode':<10} {'concurrency':>11} {'mean_ms':>9} {'p50_ms':>9} {'p99_ms':>9} {'req/s':>9}")
+    try:
+        for concurrency in args.concurrency:
+            cases = (
+                ('fresh', lambda: fresh_channel_call(target, request)),
+                ('pooled', lambda: pool.stub().process(request))
+            )
+            for mode, call in cases:
+                # One untimed round to warm up both paths
+                await run(call, min(args.requests, concurrency * 2), concurrency)
+                stats = await run(call, args.requests, concurrency)
+                print(
+                    f"{mode:<10} {concurrency:>11} {stats['mean_ms']:>9.3f} {stats['p50_ms']:>9.3f} "
+                    f"{stats['p99_ms']:>9.3f} {stats['requests_per_sec']:>9.1f}"
+                )
+    finally:
+        await pool.close()
+        if server is not None:
+            await server.stop(None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', help='Coordinator address (defaults to an in-process echo server)')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--channels', type=int, default=2, help='Pooled channels to the target')
+    parser.add_argument('--tokens', type=int, default=16, help='Tokens per request')
+    asyncio.run(main(parser.parse_args()))
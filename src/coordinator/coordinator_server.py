@@ -1,12 +1,14 @@
 import os
 import json
 import logging
+from collections import OrderedDict, deque
 from concurrent import futures
 import grpc
 import grpc.aio
 import asyncio
 import sys
 import time
+import uuid
 from prometheus_client import start_http_server, Counter, Histogram, Gauge, Info
 
 # Add relative import path
@@ -17,6 +19,7 @@ sys.path.append(proto_dir)
 
 import model_service_pb2
 import model_service_pb2_grpc
+from tensor_codec import encode_tokens, grpc_compression
 
 # Configure logging
 logging.basicConfig(
@@ -49,22 +52,567 @@ NODE_HEALTH = Gauge(
     ['node_id']  # 1 for healthy, 0 for unhealthy
 )
 
+NODE_HEALTH_CHECK_LATENCY = Gauge(
+    'node_health_check_latency_seconds',
+    'Round-trip time of the most recent successful health probe of each replica',
+    ['node_id', 'replica']
+)
+
+REPLICA_HEALTH = Gauge(
+    'node_replica_health_status',
+    'Health status of each replica of a stage',
+    ['node_id', 'replica']  # 1 for healthy, 0 for unhealthy
+)
+
+REPLICA_IN_FLIGHT = Gauge(
+    'coordinator_replica_in_flight_requests',
+    'Requests currently outstanding on each replica',
+    ['node_id', 'replica']
+)
+
+REPLICA_REQUESTS = Counter(
+    'coordinator_replica_requests_total',
+    'Requests routed to each replica',
+    ['node_id', 'replica']
+)
+
+TIME_TO_FIRST_TOKEN = Histogram(
+    'coordinator_time_to_first_token_seconds',
+    'Time from receiving a request until the first generated token is available'
+)
+
+GENERATION_STRATEGY = Counter(
+    'coordinator_generation_requests_total',
+    'Requests by generation preset and strategy',
+    ['preset', 'strategy']
+)
+
+SPECULATIVE_ACCEPTED_TOKENS = Histogram(
+    'coordinator_speculative_accepted_tokens',
+    'Draft tokens accepted by the target model per speculative step',
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16)
+)
+
+SPECULATIVE_DRAFT_TOKENS = Counter(
+    'coordinator_speculative_draft_tokens_total',
+    'Draft tokens proposed for verification and accepted by the target model',
+    ['result']  # result can be 'proposed' or 'accepted'
+)
+
+DRAFT_LATENCY = Histogram(
+    'coordinator_draft_latency_seconds',
+    'Time taken by the draft node to propose tokens for one step'
+)
+
+PIPELINE_STAGE_IN_FLIGHT = Gauge(
+    'coordinator_pipeline_stage_in_flight',
+    'Step requests currently sent to a stage and awaiting its reply',
+    ['node_id']
+)
+
+PIPELINE_STAGE_UTILIZATION = Gauge(
+    'coordinator_pipeline_stage_utilization',
+    'Share of the last reporting window during which a stage had a step in flight',
+    ['node_id']
+)
+
+PIPELINE_STAGE_BUBBLE_RATIO = Gauge(
+    'coordinator_pipeline_stage_bubble_ratio',
+    'Share of the time the pipeline had work during which a stage sat idle, over the last window',
+    ['node_id']
+)
+
+PIPELINE_STAGE_BUBBLE_SECONDS = Counter(
+    'coordinator_pipeline_stage_bubble_seconds_total',
+    'Time a stage sat idle while other stages of the pipeline were busy',
+    ['node_id']
+)
+
+CHAINED_HOP_LATENCY = Histogram(
+    'coordinator_chained_hop_latency_seconds',
+    'Per-stage time reported back for chained steps',
+    ['node_id', 'phase']  # phase can be 'compute' or 'forward' (waiting on later stages)
+)
+
+SESSION_RESYNCS = Counter(
+    'coordinator_session_resyncs_total',
+    'Generation steps resent in full because a stage no longer held the session',
+    ['node_id']
+)
+
+ABANDONED_STEPS = Counter(
+    'coordinator_abandoned_steps_total',
+    'Pipeline steps dropped at a stage because the caller cancelled or the deadline passed',
+    ['node_id', 'reason']  # reason can be 'cancelled' or 'deadline'
+)
+
+WASTED_TOKENS = Counter(
+    'coordinator_wasted_tokens_total',
+    'Tokens generated for requests that were cancelled or ran out of time before completing',
+    ['reason']  # reason can be 'cancelled' or 'deadline'
+)
+
+RESULT_CACHE_LOOKUPS = Counter(
+    'coordinator_result_cache_lookups_total',
+    'Result cache lookups for deterministic generation requests',
+    ['result']  # result can be 'hit' or 'miss'
+)
+
+RESULT_CACHE_ENTRIES = Gauge(
+    'coordinator_result_cache_entries',
+    'Finished generations held by the result cache'
+)
+
+COALESCED_REQUESTS = Counter(
+    'coordinator_coalesced_requests_total',
+    'Requests that joined an identical in-flight generation instead of running their own'
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    'coordinator_admission_in_flight',
+    'Admitted requests currently generating',
+    ['priority']
+)
+
+ADMISSION_QUEUE_LENGTH = Gauge(
+    'coordinator_admission_queue_length',
+    'Requests waiting for a generation slot',
+    ['priority']
+)
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    'coordinator_admission_queue_wait_seconds',
+    'Time requests waited for a generation slot before starting',
+    ['priority'],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+)
+
+ADMISSION_REJECTED = Counter(
+    'coordinator_admission_rejected_total',
+    'Requests shed because their priority class queue was full',
+    ['priority']
+)
+
+BATCH_ITEMS = Counter(
+    'coordinator_batch_items_total',
+    'Items processed through process_batch',
+    ['status']  # success, invalid, rejected, unavailable, deadline_exceeded or error
+)
+
 COORDINATOR_INFO = Info('coordinator', 'Coordinator information')
 
+# Neutral generation settings; presets in config.json and request metadata override them
+DEFAULT_GENERATION_PARAMS = {
+    'strategy': 'greedy',  # greedy, sample or beam
+    'max_new_tokens': 50,
+    'min_new_tokens': 0,
+    'temperature': 1.0,
+    'top_k': 0,
+    'top_p': 1.0,
+    'num_beams': 1,
+    'repetition_penalty': 1.0,
+    'no_repeat_ngram_size': 0,
+    'length_penalty': 1.0,
+    'num_draft_tokens': 0,  # speculative decoding, greedy only
+    'stop_token_ids': []
+}
+
+MAX_NEW_TOKENS_LIMIT = 1024
+MAX_DRAFT_TOKENS = 16
+
+# Status codes from a real RPC that mark a replica unhealthy until its next successful probe.
+# DEADLINE_EXCEEDED is left out: it usually means the caller's deadline ran out, not the node.
+NODE_FAILURE_CODES = (grpc.StatusCode.UNAVAILABLE,)
+
+# Weight of the newest sample in each replica's moving average of RPC latency
+LATENCY_EWMA_ALPHA = 0.2
+
+# Seconds a node gets to drop a session that ended without the final-step flag
+SESSION_CLOSE_TIMEOUT = 5.0
+
+# Admission limits used when config.json has no 'admission' section
+DEFAULT_ADMISSION = {
+    'max_in_flight': 64,
+    'default_priority': 'normal',
+    'classes': {
+        'normal': {'max_queue': 128}
+    }
+}
+
+class StageError(Exception):
+    """Raised when a pipeline stage fails while processing a step."""
+
+    def __init__(self, node_id: str, message: str):
+        super().__init__(f"Processing failed at node {node_id}: {message}")
+        self.node_id = node_id
+
+class SessionLost(Exception):
+    """Raised when a stage no longer holds a generation session's key/values."""
+
+    def __init__(self, node_id: str, message: str):
+        super().__init__(f"Session lost at node {node_id}: {message}")
+        self.node_id = node_id
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before generation completes."""
+
+class Overloaded(Exception):
+    """Raised when a request is shed because there is no capacity for it."""
+
+class NodesUnavailable(Exception):
+    """Raised when a request is refused up front because a stage has no healthy replica."""
+
+# How a failed batch item is reported: first matching exception type wins
+BATCH_ITEM_ERRORS = (
+    (ValueError, grpc.StatusCode.INVALID_ARGUMENT, 'invalid'),
+    (Overloaded, grpc.StatusCode.RESOURCE_EXHAUSTED, 'rejected'),
+    (NodesUnavailable, grpc.StatusCode.UNAVAILABLE, 'unavailable'),
+    (DeadlineExceeded, grpc.StatusCode.DEADLINE_EXCEEDED, 'deadline_exceeded'),
+    (Exception, grpc.StatusCode.INTERNAL, 'error')
+)
+
+def check_deadline(deadline: float):
+    """Raise DeadlineExceeded if an absolute deadline has passed."""
+    if deadline is not None and time.time() >= deadline:
+        raise DeadlineExceeded("Deadline passed before generation completed")
+
+def request_deadline(context) -> float:
+    """Return the caller's gRPC deadline as an absolute time, or None if it set none."""
+    remaining = context.time_remaining()
+    return time.time() + remaining if remaining is not None else None
+
+class ResultCache:
+    """LRU cache of finished generations with a time-to-live, bounded by entry count."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.entries = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key):
+        """Return the cached tokens for ``key``, or None if absent or expired."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        tokens, stored_at = entry
+        if time.time() - stored_at > self.ttl:
+            del self.entries[key]
+            RESULT_CACHE_ENTRIES.set(len(self.entries))
+            return None
+        self.entries.move_to_end(key)
+        return list(tokens)
+
+    def put(self, key, tokens: list):
+        self.entries[key] = (tuple(tokens), time.time())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        RESULT_CACHE_ENTRIES.set(len(self.entries))
+
+class AdmissionController:
+    """Bounds concurrent generations and sheds load by priority class.
+
+    At most ``max_in_flight`` requests generate at once, and a class may cap
+    its own share with its ``max_in_flight``. Requests beyond that wait in
+    their class's queue, up to its ``max_queue``; any further request is
+    rejected straight away with Overloaded. A freed slot goes to the oldest
+    waiter of the highest-priority class (``classes`` is in priority order,
+    highest first) that is under its own cap.
+    """
+
+    def __init__(self, max_in_flight: int, classes: dict, default_priority: str):
+        self.max_in_flight = max_in_flight
+        self.classes = classes
+        self.default_priority = default_priority
+        self.in_flight = 0
+        self.class_in_flight = {priority: 0 for priority in classes}
+        self.queues = {priority: deque() for priority in classes}
+
+    def resolve_priority(self, metadata) -> str:
+        """Return the request's priority class, raising ValueError for unknown classes."""
+        priority = metadata.get('priority', self.default_priority)
+        if priority not in self.classes:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {list(self.classes)}")
+        return priority
+
+    def has_capacity(self, priority: str) -> bool:
+        limit = self.classes[priority].get('max_in_flight')
+        return self.in_flight < self.max_in_flight and (
+            limit is None or self.class_in_flight[priority] < limit
+        )
+
+    async def acquire(self, priority: str, deadline: float = None):
+        """Wait for a generation slot; pair every successful call with ``release``."""
+        start_time = time.time()
+        # Requests don't overtake waiters of their own or a higher priority
+        ahead = list(self.classes)[:list(self.classes).index(priority) + 1]
+        if self.has_capacity(priority) and not any(self.queues[name] for name in ahead):
+            self.start(priority)
+            ADMISSION_QUEUE_WAIT.labels(priority=priority).observe(0.0)
+            return
+        
+        queue = self.queues[priority]
+        if len(queue) >= self.classes[priority].get('max_queue', 0):
+            ADMISSION_REJECTED.labels(priority=priority).inc()
+            raise Overloaded(f"Too many '{priority}' requests waiting ({len(queue)} queued)")
+        
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        ADMISSION_QUEUE_LENGTH.labels(priority=priority).set(len(queue))
+        try:
+            timeout = max(deadline - time.time(), 0.0) if deadline is not None else None
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+        except BaseException as e:
+            if waiter.done():
+                # Granted a slot just as the wait was abandoned; hand it on
+                self.release(priority)
+            else:
+                waiter.cancel()
+                queue.remove(waiter)
+                ADMISSION_QUEUE_LENGTH.labels(priority=priority).set(len(queue))
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceeded("Deadline passed while waiting for a generation slot")
+            raise
+        ADMISSION_QUEUE_WAIT.labels(priority=priority).observe(time.time() - start_time)
+
+    def start(self, priority: str):
+        self.in_flight += 1
+        self.class_in_flight[priority] += 1
+        ADMISSION_IN_FLIGHT.labels(priority=priority).set(self.class_in_flight[priority])
+
+    def release(self, priority: str):
+        """Free a slot and pass it to the highest-priority waiter that may start."""
+        self.in_flight -= 1
+        self.class_in_flight[priority] -= 1
+        ADMISSION_IN_FLIGHT.labels(priority=priority).set(self.class_in_flight[priority])
+        for name, queue in self.queues.items():
+            while queue and self.has_capacity(name):
+                self.start(name)
+                queue.popleft().set_result(None)
+                ADMISSION_QUEUE_LENGTH.labels(priority=name).set(len(queue))
+
+class BusyTimer:
+    """Accumulates the wall time during which at least one unit of work was active."""
+
+    def __init__(self):
+        self.active = 0
+        self.since = None
+        self.busy = 0.0
+
+    def enter(self):
+        if self.active == 0:
+            self.since = time.time()
+        self.active += 1
+
+    def exit(self):
+        self.active -= 1
+        if self.active == 0:
+            self.busy += time.time() - self.since
+            self.since = None
+
+    def collect(self) -> float:
+        """Return the busy time since the last call, including a still running interval."""
+        busy = self.busy
+        if self.since is not None:
+            now = time.time()
+            busy += now - self.since
+            self.since = now
+        self.busy = 0.0
+        return busy
+
+class PipelineScheduler:
+    """Streams step requests through the stages so steps of concurrent requests overlap.
+
+    Every stage has its own queue and a dispatcher that sends each item to
+    the stage as soon as it is dequeued, with at most ``max_in_flight[k]``
+    items outstanding at stage k (the node coalesces concurrent requests
+    into one forward pass). Each result is handed to the next stage's queue
+    as soon as it returns, so while stage k works on one step, stage k + 1
+    is already working on an earlier one, and a slow item never holds back
+    the items behind it.
+
+    ``call_stage(index, item)`` performs one item's RPC at a stage and
+    returns the response, which is stored on the item for the next stage.
+    """
+
+    def __init__(self, stages: list, call_stage, max_in_flight: list, report_interval: float = 10.0):
+        self.stages = stages
+        self.call_stage = call_stage
+        self.max_in_flight = max_in_flight
+        self.report_interval = report_interval
+        self.queues = [asyncio.Queue() for _ in stages]
+        self.slots = [asyncio.Semaphore(limit) for limit in max_in_flight]
+        self.stage_timers = [BusyTimer() for _ in stages]
+        self.pipeline_timer = BusyTimer()
+        self.tasks = []
+        self.in_flight = set()
+
+    def start(self):
+        """Start the stage dispatchers and the utilization reporter."""
+        for index in range(len(self.stages)):
+            self.tasks.append(asyncio.create_task(self.stage_dispatcher(index)))
+        self.tasks.append(asyncio.create_task(self.report_utilization()))
+        logger.info(
+            f"Pipeline scheduler started for {len(self.stages)} stages, "
+            f"at most {self.max_in_flight} steps in flight per stage"
+        )
+
+    async def stop(self):
+        """Cancel the stage dispatchers, their in-flight steps and the reporter."""
+        for task in self.tasks + list(self.in_flight):
+            task.cancel()
+        await asyncio.gather(*self.tasks, *self.in_flight, return_exceptions=True)
+
+    async def submit(self, item: dict):
+        """Run an item through every stage and return the last stage's response.
+
+        An item may carry an absolute ``deadline``; it fails with
+        DeadlineExceeded instead of being dispatched once that has passed. If
+        the caller is cancelled, the item's in-flight stage RPC is cancelled
+        too.
+        """
+        item['future'] = asyncio.get_running_loop().create_future()
+        item['response'] = None
+        item['task'] = None
+        item.setdefault('deadline', None)
+        self.pipeline_timer.enter()
+        try:
+            self.queues[0].put_nowait(item)
+            return await item['future']
+        except asyncio.CancelledError:
+            # A queued item has no running task; its stage's dispatcher drops it instead
+            if item['task'] is not None and not item['task'].done():
+                item['task'].cancel()
+                ABANDONED_STEPS.labels(node_id=self.stages[item['index']], reason='cancelled').inc()
+            raise
+        finally:
+            self.pipeline_timer.exit()
+
+    async def run_item(self, index: int, item: dict):
+        node_id = self.stages[index]
+        self.stage_timers[index].enter()
+        PIPELINE_STAGE_IN_FLIGHT.labels(node_id=node_id).inc()
+        try:
+            item['response'] = await self.call_stage(index, item)
+        except Exception as e:
+            if not item['future'].done():
+                item['future'].set_exception(e)
+            return
+        finally:
+            PIPELINE_STAGE_IN_FLIGHT.labels(node_id=node_id).dec()
+            self.stage_timers[index].exit()
+            self.slots[index].release()
+        if index == len(self.stages) - 1:
+            if not item['future'].done():
+                item['future'].set_result(item['response'])
+        else:
+            self.queues[index + 1].put_nowait(item)
+
+    async def stage_dispatcher(self, index: int):
+        node_id = self.stages[index]
+        while True:
+            item = await self.queues[index].get()
+            await self.slots[index].acquire()
+            # Callers may have gone away or run out of time while their items were queued
+            if item['future'].done():
+                self.slots[index].release()
+                ABANDONED_STEPS.labels(node_id=node_id, reason='cancelled').inc()
+                continue
+            if item['deadline'] is not None and time.time() >= item['deadline']:
+                self.slots[index].release()
+                ABANDONED_STEPS.labels(node_id=node_id, reason='deadline').inc()
+                item['future'].set_exception(
+                    DeadlineExceeded(f"Deadline passed before reaching node {node_id}")
+                )
+                continue
+            # Set together, so a cancelled caller always charges the stage its task runs at
+            item['index'] = index
+            item['task'] = asyncio.create_task(self.run_item(index, item))
+            self.in_flight.add(item['task'])
+            item['task'].add_done_callback(self.in_flight.discard)
+
+    async def report_utilization(self):
+        """Export per-stage utilization and bubble time over fixed windows."""
+        window_start = time.time()
+        while True:
+            await asyncio.sleep(self.report_interval)
+            now = time.time()
+            elapsed = now - window_start
+            window_start = now
+            pipeline_busy = self.pipeline_timer.collect()
+            for node_id, timer in zip(self.stages, self.stage_timers):
+                stage_busy = timer.collect()
+                bubble = max(pipeline_busy - stage_busy, 0.0)
+                PIPELINE_STAGE_UTILIZATION.labels(node_id=node_id).set(stage_busy / elapsed)
+                PIPELINE_STAGE_BUBBLE_SECONDS.labels(node_id=node_id).inc(bubble)
+                PIPELINE_STAGE_BUBBLE_RATIO.labels(node_id=node_id).set(
+                    bubble / pipeline_busy if pipeline_busy else 0.0
+                )
+
 class ModelCoordinator(model_service_pb2_grpc.ModelServiceServicer):
     def __init__(self, config_path: str):
         # Start Prometheus metrics server
         start_http_server(8000)
         
         self.config = self.load_config(config_path)
-        self.node_stubs = {}
+        # Every stage has one or more replicas; each replica entry doubles as its health record
+        self.replicas = {}
+        self.unhealthy_nodes = set()
         self.setup_connections()
+        # Draft tokens come from the first node that has a draft model configured
+        self.draft_index = next(
+            (index for index, node in enumerate(self.config['nodes']) if node.get('draft_model')), None
+        )
+        self.draft_node = self.config['nodes'][self.draft_index]['id'] if self.draft_index is not None else None
+        
+        self.health_check_interval = self.config.get('health_check_interval_seconds', 5.0)
+        self.health_check_timeout = self.config.get('health_check_timeout_seconds', 2.0)
+        self.health_monitor = None
+        
+        # Bound concurrent generations per priority class and shed the excess early
+        admission = self.config.get('admission', DEFAULT_ADMISSION)
+        self.admission = AdmissionController(
+            max_in_flight=admission.get('max_in_flight', DEFAULT_ADMISSION['max_in_flight']),
+            classes=admission.get('classes', DEFAULT_ADMISSION['classes']),
+            default_priority=admission.get('default_priority', DEFAULT_ADMISSION['default_priority'])
+        )
+        
+        # Batch calls are bounded in size and in how many of their items run at once
+        self.max_batch_items = self.config.get('max_batch_items', 256)
+        self.batch_concurrency = self.config.get('batch_concurrency', 16)
+        
+        # Identical concurrent requests share one generation; deterministic results are cached
+        self.in_flight = {}
+        # Session close calls still running, referenced so they are not garbage collected
+        self.closing_sessions = set()
+        self.result_cache = ResultCache(
+            max_entries=self.config.get('result_cache_size', 1024),
+            ttl_seconds=self.config.get('result_cache_ttl_seconds', 300.0)
+        )
+        
+        # Chained steps travel node to node instead of returning here between stages
+        self.chained_forwarding = self.config.get('chained_forwarding', False)
+        
+        # Steps go out to a stage as soon as they arrive, up to a bound per replica
+        max_in_flight = self.config.get('pipeline_max_in_flight_per_replica', 8)
+        self.scheduler = PipelineScheduler(
+            [node['id'] for node in self.config['nodes']],
+            self.run_stage,
+            max_in_flight=[max_in_flight * len(self.replicas[node['id']]) for node in self.config['nodes']]
+        )
         
         # Record coordinator information
         COORDINATOR_INFO.info({
             'model_name': self.config['model_name'],
             'node_count': str(len(self.config['nodes'])),
-            'config_path': config_path
+            'replica_count': str(sum(len(replicas) for replicas in self.replicas.values())),
+            'config_path': config_path,
+            'draft_node': str(self.draft_node),
+            'chained_forwarding': str(self.chained_forwarding)
         })
         
         logger.info("Coordinator initialized with %d nodes", len(self.config['nodes']))
@@ -74,112 +622,690 @@ class ModelCoordinator(model_service_pb2_grpc.ModelServiceServicer):
         try:
             with open(config_path, 'r') as f:
                 config = json.load(f)
-                assert len(config['nodes']) == 3, "Configuration must contain exactly 3 nodes"
+                if not config['nodes']:
+                    raise ValueError("Configuration must contain at least one node")
+                # Stages are driven in list order, which must match each node's model_part
+                parts = [node['model_part'] for node in config['nodes']]
+                if parts != list(range(len(parts))):
+                    raise ValueError(f"Nodes must be listed in model_part order 0..{len(parts) - 1}, got {parts}")
+                previous_end = 0
+                for node in config['nodes']:
+                    if 'replicas' in node and not node['replicas']:
+                        raise ValueError(f"Node {node['id']} lists no replicas")
+                    if 'layers' in node:
+                        start, end = node['layers']
+                        if start != previous_end or end <= start:
+                            raise ValueError(f"Node {node['id']} layers {node['layers']} do not continue the plan at {previous_end}")
+                        previous_end = end
+                admission = config.get('admission', DEFAULT_ADMISSION)
+                classes = admission.get('classes', DEFAULT_ADMISSION['classes'])
+                default_priority = admission.get('default_priority', DEFAULT_ADMISSION['default_priority'])
+                if default_priority not in classes:
+                    raise ValueError(f"Default priority '{default_priority}' is not one of {list(classes)}")
                 return config
         except Exception as e:
             logger.error("Failed to load config: %s", str(e))
             raise
     
     def setup_connections(self):
-        """Setup gRPC connections to all nodes."""
+        """Setup gRPC connections to every replica of every node.
+
+        A node lists its replicas' addresses under ``replicas``; without it the
+        node's ``address`` is its only replica.
+        """
         for node in self.config['nodes']:
+            self.replicas[node['id']] = []
+            for address in node.get('replicas', [node['address']]):
+                try:
+                    channel = grpc.aio.insecure_channel(
+                        address,
+                        options=[
+                            ('grpc.max_send_message_length', 50 * 1024 * 1024),
+                            ('grpc.max_receive_message_length', 50 * 1024 * 1024),
+                            ('grpc.keepalive_time_ms', 30000),
+                            ('grpc.keepalive_timeout_ms', 10000)
+                        ],
+                        compression=grpc_compression(self.config.get('grpc_compression', 'none'))
+                    )
+                    # Replicas start out presumed healthy until the first probe says otherwise
+                    self.replicas[node['id']].append({
+                        'node_id': node['id'],
+                        'address': address,
+                        'stub': model_service_pb2_grpc.ModelServiceStub(channel),
+                        'in_flight': 0,
+                        'rpc_latency': None,
+                        'healthy': True,
+                        'probe_latency': None,
+                        'checked_at': None,
+                        'error': None
+                    })
+                    logger.info("Connected to node %s at %s", node['id'], address)
+                except Exception as e:
+                    logger.error("Failed to connect to node %s at %s: %s", node['id'], address, str(e))
+                    raise
+    
+    def pick_replica(self, node_id: str) -> dict:
+        """Return the healthy replica with the fewest in-flight requests, then the best recent latency."""
+        healthy = [replica for replica in self.replicas[node_id] if replica['healthy']]
+        if not healthy:
+            raise StageError(node_id, "no healthy replica available")
+        return min(healthy, key=lambda replica: (replica['in_flight'], replica['rpc_latency'] or 0.0))
+
+    async def call_node(self, node_id: str, method: str, request, deadline: float = None,
+                        replica: dict = None):
+        """Send a unary RPC to a replica of a node, bounded by the request's deadline.
+
+        The least loaded replica is used unless ``replica`` pins one.
+        """
+        if replica is None:
+            replica = self.pick_replica(node_id)
+        labels = {'node_id': node_id, 'replica': replica['address']}
+        replica['in_flight'] += 1
+        REPLICA_IN_FLIGHT.labels(**labels).set(replica['in_flight'])
+        REPLICA_REQUESTS.labels(**labels).inc()
+        start_time = time.time()
+        try:
+            timeout = max(deadline - start_time, 0.0) if deadline is not None else None
+            response = await getattr(replica['stub'], method)(request, timeout=timeout)
+            latency = time.time() - start_time
+            replica['rpc_latency'] = latency if replica['rpc_latency'] is None else (
+                LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * replica['rpc_latency']
+            )
+            return response
+        except grpc.RpcError as e:
+            self.record_rpc_failure(replica, e)
+            raise
+        finally:
+            replica['in_flight'] -= 1
+            REPLICA_IN_FLIGHT.labels(**labels).set(replica['in_flight'])
+
+    def set_replica_health(self, replica: dict, healthy: bool, latency: float = None, error: str = None):
+        """Record a replica's health and export it; a node is unhealthy once none of its replicas are."""
+        node_id, address = replica['node_id'], replica['address']
+        if healthy and not replica['healthy']:
+            logger.info("Node %s replica %s is healthy again", node_id, address)
+        elif not healthy and replica['healthy']:
+            logger.warning("Node %s replica %s is unhealthy: %s", node_id, address, error)
+        
+        replica.update(healthy=healthy, error=error, checked_at=time.time())
+        if latency is not None:
+            replica['probe_latency'] = latency
+            NODE_HEALTH_CHECK_LATENCY.labels(node_id=node_id, replica=address).set(latency)
+        REPLICA_HEALTH.labels(node_id=node_id, replica=address).set(1 if healthy else 0)
+        
+        node_healthy = any(r['healthy'] for r in self.replicas[node_id])
+        NODE_HEALTH.labels(node_id=node_id).set(1 if node_healthy else 0)
+        if node_healthy:
+            self.unhealthy_nodes.discard(node_id)
+        else:
+            self.unhealthy_nodes.add(node_id)
+
+    def record_rpc_failure(self, replica: dict, error: Exception):
+        """Take a replica out of rotation right away when a real RPC shows it is unreachable."""
+        if isinstance(error, grpc.RpcError) and error.code() in NODE_FAILURE_CODES:
+            self.set_replica_health(replica, False, error=f"{error.code().name}: {error.details()}")
+
+    async def probe_replica(self, replica: dict):
+        """Run one health check against a replica and record the result."""
+        start_time = time.time()
+        try:
+            response = await replica['stub'].health_check(
+                model_service_pb2.HealthCheckRequest(),
+                timeout=self.health_check_timeout
+            )
+            if response.status.startswith('ERROR'):
+                self.set_replica_health(replica, False, error=response.status)
+            else:
+                self.set_replica_health(replica, True, latency=time.time() - start_time)
+        except grpc.RpcError as e:
+            self.set_replica_health(replica, False, error=str(e))
+
+    async def check_node_health(self) -> list:
+        """Probe all replicas concurrently and return the ids of nodes without a healthy replica."""
+        await asyncio.gather(*(
+            self.probe_replica(replica)
+            for replicas in self.replicas.values()
+            for replica in replicas
+        ))
+        return sorted(self.unhealthy_nodes)
+
+    async def monitor_node_health(self):
+        """Keep the health table fresh by probing every node on a fixed interval."""
+        while True:
             try:
-                channel = grpc.aio.insecure_channel(
-                    node['address'],
-                    options=[
-                        ('grpc.max_send_message_length', 50 * 1024 * 1024),
-                        ('grpc.max_receive_message_length', 50 * 1024 * 1024),
-                        ('grpc.keepalive_time_ms', 30000),
-                        ('grpc.keepalive_timeout_ms', 10000)
-                    ]
-                )
-                self.node_stubs[node['id']] = model_service_pb2_grpc.ModelServiceStub(channel)
-                logger.info("Connected to node %s at %s", node['id'], node['address'])
+                await self.check_node_health()
             except Exception as e:
-                logger.error("Failed to connect to node %s: %s", node['id'], str(e))
-                raise
+                logger.error(f"Health monitor failed: {str(e)}")
+            await asyncio.sleep(self.health_check_interval)
+
+    def start_health_monitor(self):
+        """Start the background health monitor on the running event loop."""
+        self.health_monitor = asyncio.create_task(self.monitor_node_health())
+        logger.info(
+            f"Health monitor started, probing every {self.health_check_interval}s "
+            f"with a {self.health_check_timeout}s timeout"
+        )
+
+    async def stop_health_monitor(self):
+        """Cancel the background health monitor."""
+        if self.health_monitor is not None:
+            self.health_monitor.cancel()
+            await asyncio.gather(self.health_monitor, return_exceptions=True)
     
-    async def check_node_health(self):
-        """Check if all nodes are accessible."""
-        unhealthy_nodes = []
-        for node in self.config['nodes']:
+    def resolve_generation_params(self, metadata) -> dict:
+        """Resolve the named preset plus per-request overrides from metadata, and validate them.
+
+        Raises ValueError for unknown presets and invalid values.
+        """
+        presets = self.config.get('generation_presets', {})
+        preset = metadata.get('preset', 'default')
+        if preset not in presets and preset != 'default':
+            raise ValueError(f"Unknown generation preset '{preset}'")
+        
+        params = dict(DEFAULT_GENERATION_PARAMS)
+        params.update(presets.get(preset, {}))
+        for key, default in DEFAULT_GENERATION_PARAMS.items():
+            if key not in metadata:
+                continue
+            value = metadata[key]
             try:
-                await self.node_stubs[node['id']].health_check(
-                    model_service_pb2.HealthCheckRequest(),
-                    timeout=5
-                )
-                NODE_HEALTH.labels(node_id=node['id']).set(1)
-            except grpc.RpcError as e:
-                logger.warning("Node %s is unhealthy: %s", node['id'], str(e))
-                NODE_HEALTH.labels(node_id=node['id']).set(0)
-                unhealthy_nodes.append(node['id'])
-        return unhealthy_nodes
-    
+                if isinstance(default, list):
+                    params[key] = [int(token) for token in value.split(',') if token.strip()]
+                else:
+                    params[key] = type(default)(value)
+            except ValueError:
+                raise ValueError(f"Invalid value for {key}: {value!r}")
+        
+        if params['strategy'] not in ('greedy', 'sample', 'beam'):
+            raise ValueError(f"Unknown strategy '{params['strategy']}'")
+        if not 1 <= params['max_new_tokens'] <= MAX_NEW_TOKENS_LIMIT:
+            raise ValueError(f"max_new_tokens must be between 1 and {MAX_NEW_TOKENS_LIMIT}")
+        if not 0 <= params['min_new_tokens'] <= params['max_new_tokens']:
+            raise ValueError("min_new_tokens must be between 0 and max_new_tokens")
+        if params['temperature'] <= 0:
+            raise ValueError("temperature must be positive")
+        if params['top_k'] < 0:
+            raise ValueError("top_k must not be negative")
+        if not 0 < params['top_p'] <= 1:
+            raise ValueError("top_p must be in (0, 1]")
+        if params['repetition_penalty'] <= 0:
+            raise ValueError("repetition_penalty must be positive")
+        if params['no_repeat_ngram_size'] < 0:
+            raise ValueError("no_repeat_ngram_size must not be negative")
+        if params['strategy'] == 'beam' and params['num_beams'] < 2:
+            raise ValueError("beam strategy needs num_beams >= 2")
+        if params['strategy'] != 'beam':
+            params['num_beams'] = 1
+        if not 0 <= params['num_draft_tokens'] <= MAX_DRAFT_TOKENS:
+            raise ValueError(f"num_draft_tokens must be between 0 and {MAX_DRAFT_TOKENS}")
+        if params['num_draft_tokens'] and params['strategy'] != 'greedy':
+            raise ValueError("num_draft_tokens requires the greedy strategy")
+        if any(token < 0 for token in params['stop_token_ids']):
+            raise ValueError("stop_token_ids must be non-negative token ids")
+        
+        params['preset'] = preset
+        return params
+
+    async def run_stage(self, index: int, item: dict):
+        """Send one step request to a stage; called by the pipeline scheduler."""
+        node = self.config['nodes'][index]
+        try:
+            node_start_time = time.time()
+            
+            node_input = model_service_pb2.ModelInput(
+                tokens=item['tokens'],
+                metadata={
+                    'node_id': node['id'],
+                    'node_index': str(index),
+                    'total_nodes': str(len(self.config['nodes'])),
+                    **item['metadata']
+                }
+            )
+            # Activations from the previous stage are relayed as received
+            previous = item['response']
+            if previous is not None and previous.HasField('hidden_states'):
+                node_input.hidden_states.CopyFrom(previous.hidden_states)
+            
+            response = await self.call_node(
+                node['id'], 'process', node_input, item['deadline'],
+                self.session_replica(index, item.get('session'))
+            )
+            
+            # Record node processing time
+            NODE_LATENCY.labels(node_id=node['id']).observe(
+                time.time() - node_start_time
+            )
+            return response
+            
+        except (StageError, SessionLost, Overloaded):
+            raise
+        except grpc.RpcError as e:
+            raise self.stage_rpc_error(node['id'], e, item)
+        except Exception as e:
+            raise StageError(node['id'], str(e))
+
+    def session_replica(self, index: int, session: dict) -> dict:
+        """Return the replica a session is pinned to at a stage, pinning one on first use.
+
+        Returns None without a session, leaving the choice to ``call_node``.
+        """
+        if session is None:
+            return None
+        node_id = self.config['nodes'][index]['id']
+        replica = session['replicas'][index]
+        if replica is None:
+            replica = session['replicas'][index] = self.pick_replica(node_id)
+        elif not replica['healthy']:
+            raise SessionLost(node_id, f"replica {replica['address']} is unhealthy")
+        return replica
+
+    def stage_rpc_error(self, node_id: str, error: grpc.RpcError, item: dict) -> Exception:
+        """Translate a failed stage RPC into the exception the generation loop handles."""
+        if error.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+            ABANDONED_STEPS.labels(node_id=node_id, reason='deadline').inc()
+            return DeadlineExceeded(f"Deadline passed while waiting for node {node_id}")
+        if error.code() == grpc.StatusCode.FAILED_PRECONDITION and item.get('session') is not None:
+            return SessionLost(node_id, error.details())
+        if error.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+            return Overloaded(f"Node {node_id} is overloaded: {error.details()}")
+        return StageError(node_id, str(error))
+
+    async def run_chained_step(self, item: dict):
+        """Send a step to the first stage, which forwards it stage to stage; only the last replies.
+
+        The coordinator picks one replica per stage up front and sends the
+        downstream ones along as the route, so activations go straight from
+        node to node instead of through the coordinator. Each stage reports
+        its compute time and the time it waited on the rest of the route in
+        the ``hop-timings`` trailing metadata.
+        """
+        nodes = self.config['nodes']
+        replicas = []
+        for index, node in enumerate(nodes):
+            replica = self.session_replica(index, item.get('session'))
+            replicas.append(replica if replica is not None else self.pick_replica(node['id']))
+        route = [{'node_id': replica['node_id'], 'address': replica['address']} for replica in replicas[1:]]
+        node_input = model_service_pb2.ModelInput(
+            tokens=item['tokens'],
+            metadata={
+                'node_id': nodes[0]['id'],
+                'node_index': '0',
+                'total_nodes': str(len(nodes)),
+                'route': json.dumps(route),
+                **item['metadata']
+            }
+        )
+        
+        for replica in replicas:
+            replica['in_flight'] += 1
+            REPLICA_IN_FLIGHT.labels(node_id=replica['node_id'], replica=replica['address']).set(replica['in_flight'])
+            REPLICA_REQUESTS.labels(node_id=replica['node_id'], replica=replica['address']).inc()
+        try:
+            timeout = max(item['deadline'] - time.time(), 0.0) if item['deadline'] is not None else None
+            call = replicas[0]['stub'].process(node_input, timeout=timeout)
+            response = await call
+            trailing = {key: value for key, value in await call.trailing_metadata() or ()}
+        except grpc.RpcError as e:
+            # Stages that forwarded the step name the one that actually failed (metadata iterates as key/value pairs)
+            trailing_error = {key: value for key, value in e.trailing_metadata() or ()}
+            failed_node = trailing_error.get('failed-node', nodes[0]['id'])
+            failed = next((replica for replica in replicas if replica['node_id'] == failed_node), replicas[0])
+            self.record_rpc_failure(failed, e)
+            raise self.stage_rpc_error(failed_node, e, item)
+        finally:
+            for replica in replicas:
+                replica['in_flight'] -= 1
+                REPLICA_IN_FLIGHT.labels(node_id=replica['node_id'], replica=replica['address']).set(replica['in_flight'])
+        
+        for hop in json.loads(trailing.get('hop-timings', '[]')):
+            CHAINED_HOP_LATENCY.labels(node_id=hop['node_id'], phase='compute').observe(hop['compute_ms'] / 1000)
+            if 'forward_ms' in hop:
+                CHAINED_HOP_LATENCY.labels(node_id=hop['node_id'], phase='forward').observe(hop['forward_ms'] / 1000)
+        return response
+
+    async def run_pipeline_step(self, sequence: list, step: int, input_length: int, params: dict,
+                                draft_tokens: int = 0, deadline: float = None,
+                                session: dict = None, close_session: bool = False):
+        """Run one generation step through every stage in order and return the last stage's output.
+
+        The first stage embeds the tokens, intermediate stages pass hidden
+        states on, and the last stage selects (or scores) the next token. When
+        ``sequence`` ends with ``draft_tokens`` proposed tokens the last stage
+        verifies them and returns every accepted token. Steps from concurrent
+        requests are overlapped across stages by the pipeline scheduler.
+
+        With a ``session``, ``sequence`` holds only the tokens after the
+        session's ``synced`` prefix, which every stage already has cached.
+        ``close_session`` marks the generation's last step, after which the
+        stages drop the session instead of keeping its key/values.
+        """
+        metadata = {
+            'input_length': str(input_length),
+            'step': str(step),
+            'generation': json.dumps(params),
+            'draft_tokens': str(draft_tokens)
+        }
+        if session is not None:
+            metadata['session_id'] = session['id']
+            metadata['session_offset'] = str(session['synced'])
+            if close_session:
+                metadata['session_close'] = 'true'
+        # Tokens are packed once per step and reused by every stage
+        item = {
+            'tokens': encode_tokens(sequence),
+            'metadata': metadata,
+            'deadline': deadline,
+            'session': session
+        }
+        if self.chained_forwarding:
+            return await self.run_chained_step(item)
+        return await self.scheduler.submit(item)
+
+    def new_session(self) -> dict:
+        """Start a generation session; its replicas are pinned on first use."""
+        return {
+            'id': uuid.uuid4().hex,
+            'replicas': [None] * len(self.config['nodes']),
+            'synced': 0
+        }
+
+    def close_session(self, session: dict):
+        """Tell every replica a session is pinned to that it can drop the session.
+
+        Runs in the background so a cancelled generation can still close its
+        session; failures are only logged, as the nodes expire idle sessions
+        on their own.
+        """
+        close_input = model_service_pb2.ModelInput(metadata={'session_id': session['id']})
+        for replica in session['replicas']:
+            if replica is None:
+                continue
+            task = asyncio.create_task(self.close_replica_session(replica, close_input))
+            self.closing_sessions.add(task)
+            task.add_done_callback(self.closing_sessions.discard)
+
+    async def close_replica_session(self, replica: dict, close_input):
+        """Send one session close call, logging instead of raising on failure."""
+        try:
+            await replica['stub'].close_session(close_input, timeout=SESSION_CLOSE_TIMEOUT)
+        except grpc.RpcError as e:
+            logger.warning(f"Closing session on {replica['node_id']} replica {replica['address']} failed: {e.code()}")
+
+    async def propose_draft_tokens(self, sequence: list, num_tokens: int, input_length: int,
+                                   params: dict, deadline: float = None, session: dict = None) -> list:
+        """Ask the draft node for up to ``num_tokens`` proposed tokens.
+
+        With a ``session`` the call goes to the replica the session is pinned
+        to, which keeps the draft model's key/values for it between steps.
+        Drafting is only an optimization, so failures fall back to an empty
+        proposal and the step runs as plain greedy decoding.
+        """
+        try:
+            draft_start_time = time.time()
+            metadata = {
+                'num_draft_tokens': str(num_tokens),
+                'input_length': str(input_length),
+                'generation': json.dumps(params)
+            }
+            if session is not None:
+                metadata['session_id'] = session['id']
+            draft_input = model_service_pb2.ModelInput(tokens=encode_tokens(sequence), metadata=metadata)
+            response = await self.call_node(
+                self.draft_node, 'draft', draft_input, deadline,
+                self.session_replica(self.draft_index, session)
+            )
+            DRAFT_LATENCY.observe(time.time() - draft_start_time)
+            return list(response.data)[:num_tokens]
+        except (grpc.RpcError, StageError, SessionLost) as e:
+            logger.warning(f"Draft proposal from {self.draft_node} failed: {str(e)}")
+            return []
+
+    async def beam_search(self, request, params: dict, deadline: float = None) -> list:
+        """Run beam search, keeping the beams here and letting the last stage score candidates."""
+        input_length = len(request.data)
+        num_beams = params['num_beams']
+        length_penalty = params['length_penalty']
+        stop_tokens = set(params['stop_token_ids'])
+        beams = [(list(request.data), 0.0)]
+        finished = []
+        
+        for step in range(params['max_new_tokens']):
+            check_deadline(deadline)
+            # Concurrent beams are coalesced into one batch by the nodes
+            responses = await asyncio.gather(*(
+                self.run_pipeline_step(sequence, step, input_length, params, deadline=deadline)
+                for sequence, _ in beams
+            ))
+            
+            candidates = []
+            for (sequence, score), response in zip(beams, responses):
+                eos_token_id = int(response.metadata.get('eos_token_id', -1))
+                for token, logprob in zip(response.data, response.scores):
+                    done = token == eos_token_id or token in stop_tokens
+                    candidates.append((score + logprob, sequence, token, done))
+            candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            
+            beams = []
+            for rank, (score, sequence, token, done) in enumerate(candidates):
+                if done:
+                    # Only hypotheses that would have made the beam are kept
+                    if rank < num_beams:
+                        generated = sequence[input_length:] + [token]
+                        finished.append((score / len(generated) ** length_penalty, generated))
+                else:
+                    beams.append((sequence + [token], score))
+                if len(beams) == num_beams:
+                    break
+            
+            if len(finished) >= num_beams or not beams:
+                break
+        
+        for sequence, score in beams:
+            generated = sequence[input_length:]
+            finished.append((score / max(len(generated), 1) ** length_penalty, generated))
+        return max(finished, key=lambda hypothesis: hypothesis[0])[1]
+
+    async def generate_tokens(self, request, params: dict, deadline: float = None):
+        """Yield generated tokens one at a time.
+
+        Raises DeadlineExceeded once ``deadline`` (absolute, in seconds since
+        the epoch) passes, so no further steps are sent to the nodes.
+        """
+        input_length = len(request.data)
+        logger.info(f"Initial input sequence: {list(request.data)}")
+        GENERATION_STRATEGY.labels(preset=params['preset'], strategy=params['strategy']).inc()
+        
+        if params['strategy'] == 'beam':
+            # Beams only settle at the end, so the winning hypothesis is yielded at once
+            for token in await self.beam_search(request, params, deadline):
+                yield token
+            return
+        
+        speculative = bool(params['num_draft_tokens'] and self.draft_node)
+        current_sequence = list(request.data)
+        # The nodes keep each step's key/values, so later steps only carry new tokens
+        session = self.new_session()
+        # Set once the stages have dropped the session after the flagged last step
+        closed = False
+        generated = 0
+        step = 0
+        try:
+            while generated < params['max_new_tokens']:
+                check_deadline(deadline)
+                # Leave room for the token the target always adds after the drafts
+                remaining = params['max_new_tokens'] - generated
+                draft = []
+                if speculative and remaining > 1:
+                    draft = await self.propose_draft_tokens(
+                        current_sequence, min(params['num_draft_tokens'], remaining - 1),
+                        input_length, params, deadline, session
+                    )
+                # A plain step with one token left is certainly the last
+                last_step = not draft and remaining == 1
+                try:
+                    response = await self.run_pipeline_step(
+                        current_sequence[session['synced']:] + draft, step, input_length, params,
+                        draft_tokens=len(draft), deadline=deadline, session=session, close_session=last_step
+                    )
+                except SessionLost as e:
+                    # Evicted or restarted stage: resend the whole sequence under a new session
+                    logger.warning(f"{str(e)}; resending the full sequence")
+                    SESSION_RESYNCS.labels(node_id=e.node_id).inc()
+                    self.close_session(session)
+                    session = self.new_session()
+                    response = await self.run_pipeline_step(
+                        current_sequence + draft, step, input_length, params,
+                        draft_tokens=len(draft), deadline=deadline, session=session, close_session=last_step
+                    )
+                closed = last_step
+                
+                # Stages hold key/values for the committed tokens and the matching leading drafts
+                matched = 0
+                while matched < min(len(draft), len(response.data)) and response.data[matched] == draft[matched]:
+                    matched += 1
+                session['synced'] = len(current_sequence) + matched
+                if draft:
+                    accepted = int(response.metadata.get('accepted_draft_tokens', '0'))
+                    SPECULATIVE_ACCEPTED_TOKENS.observe(accepted)
+                    SPECULATIVE_DRAFT_TOKENS.labels(result='proposed').inc(len(draft))
+                    SPECULATIVE_DRAFT_TOKENS.labels(result='accepted').inc(accepted)
+                
+                # The last stage returns the selected token, or every accepted token
+                current_sequence.extend(response.data)
+                generated += len(response.data)
+                step += 1
+                for token in response.data:
+                    yield token
+                if response.metadata.get('finished') == 'true':
+                    break
+        finally:
+            # Stopped early, cancelled or failed: the stages still hold the session
+            if not closed:
+                self.close_session(session)
+
+    async def collect_tokens(self, request, params: dict, flight: dict) -> list:
+        """Run a generation to completion for a shared in-flight entry."""
+        tokens = []
+        try:
+            async for token in self.generate_tokens(request, params):
+                tokens.append(token)
+            return tokens
+        except asyncio.CancelledError:
+            WASTED_TOKENS.labels(reason=flight['abandoned_by']).inc(len(tokens))
+            raise
+
+    async def generate_shared(self, request, params: dict, deadline: float = None) -> list:
+        """Return the generated tokens, sharing work with identical requests.
+
+        Requests with the same tokens and generation settings join one
+        in-flight generation (singleflight), and results of deterministic
+        strategies are served from the result cache until they expire. The
+        shared generation carries no deadline of its own: every caller waits
+        for it within its own deadline, and it is cancelled once the last
+        caller has gone.
+        """
+        key = (tuple(request.data), json.dumps(params, sort_keys=True))
+        cacheable = self.result_cache.enabled and params['strategy'] in ('greedy', 'beam')
+        if cacheable:
+            cached = self.result_cache.get(key)
+            RESULT_CACHE_LOOKUPS.labels(result='hit' if cached is not None else 'miss').inc()
+            if cached is not None:
+                return cached
+        
+        flight = self.in_flight.get(key)
+        if flight is None:
+            flight = {'waiters': 0, 'abandoned_by': 'cancelled'}
+            flight['task'] = asyncio.create_task(self.collect_tokens(request, params, flight))
+            self.in_flight[key] = flight
+        else:
+            COALESCED_REQUESTS.inc()
+        
+        flight['waiters'] += 1
+        try:
+            timeout = max(deadline - time.time(), 0.0) if deadline is not None else None
+            tokens = await asyncio.wait_for(asyncio.shield(flight['task']), timeout=timeout)
+        except asyncio.TimeoutError:
+            flight['abandoned_by'] = 'deadline'
+            raise DeadlineExceeded("Deadline passed before generation completed")
+        finally:
+            flight['waiters'] -= 1
+            if flight['task'].done() or flight['waiters'] == 0:
+                if self.in_flight.get(key) is flight:
+                    del self.in_flight[key]
+                if not flight['task'].done():
+                    flight['task'].cancel()
+        
+        if cacheable:
+            self.result_cache.put(key, tokens)
+        # Shared with other waiters and the cache, so callers must not modify it
+        return tokens
+
     async def process(self, request, context):
-        """Process request through all nodes in sequence."""
+        """Generate the full continuation and return it in one response."""
         start_time = time.time()
         try:
-            # Check node health
-            unhealthy_nodes = await self.check_node_health()
-            if unhealthy_nodes:
-                error_msg = f"Nodes {unhealthy_nodes} are unavailable"
+            try:
+                params = self.resolve_generation_params(request.metadata)
+                priority = self.admission.resolve_priority(request.metadata)
+            except ValueError as e:
+                COORDINATOR_REQUESTS.labels(status='invalid').inc()
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details(str(e))
+                return model_service_pb2.ModelOutput()
+            
+            # Fail fast on nodes the health monitor or a failed RPC marked unhealthy
+            if self.unhealthy_nodes:
+                error_msg = f"Nodes {sorted(self.unhealthy_nodes)} are unavailable"
                 logger.error(error_msg)
                 COORDINATOR_REQUESTS.labels(status='error').inc()
                 context.set_code(grpc.StatusCode.UNAVAILABLE)
                 context.set_details(error_msg)
                 return model_service_pb2.ModelOutput()
             
-            # Keep track of the original input length
-            input_length = len(request.data)
-            current_sequence = list(request.data)
-            logger.info(f"Initial input sequence: {current_sequence}")
-            
-            # Process through nodes in sequence
-            for i, node in enumerate(self.config['nodes']):
-                try:
-                    logger.info(f"Processing through node {node['id']}")
-                    node_start_time = time.time()
-                    
-                    response = await self.node_stubs[node['id']].process(
-                        model_service_pb2.ModelInput(
-                            data=current_sequence,
-                            metadata={
-                                'node_id': node['id'],
-                                'node_index': str(i),
-                                'total_nodes': str(len(self.config['nodes'])),
-                                'input_length': str(input_length)
-                            }
-                        )
-                    )
-                    
-                    # Record node processing time
-                    NODE_LATENCY.labels(node_id=node['id']).observe(
-                        time.time() - node_start_time
-                    )
-                    
-                    # Get only the new tokens (excluding the input)
-                    new_tokens = list(response.data)[len(current_sequence):]
-                    logger.info(f"Node {node['id']} added tokens: {new_tokens}")
-                    
-                    # Update current sequence
-                    current_sequence = list(response.data)
-                    
-                except Exception as e:
-                    error_msg = f"Processing failed at node {node['id']}: {str(e)}"
-                    logger.error(error_msg)
-                    COORDINATOR_REQUESTS.labels(status='error').inc()
-                    context.set_code(grpc.StatusCode.INTERNAL)
-                    context.set_details(error_msg)
-                    return model_service_pb2.ModelOutput()
+            deadline = request_deadline(context)
+            await self.admission.acquire(priority, deadline)
+            try:
+                # Only the generated tokens are returned (the original input is excluded)
+                final_response = await self.generate_shared(request, params, deadline)
+            finally:
+                self.admission.release(priority)
             
             # Record total processing time and success
             TOTAL_PROCESSING_TIME.observe(time.time() - start_time)
             COORDINATOR_REQUESTS.labels(status='success').inc()
             
-            # For the final response, only return the generated tokens (exclude the original input)
-            final_response = current_sequence[input_length:]
             logger.info(f"Final generated tokens: {final_response}")
-            return model_service_pb2.ModelOutput(data=final_response)
+            return model_service_pb2.ModelOutput(
+                data=final_response,
+                metadata={'node_count': str(len(self.config['nodes']))}
+            )
+        
+        except asyncio.CancelledError:
+            logger.info("Request cancelled by the caller")
+            COORDINATOR_REQUESTS.labels(status='cancelled').inc()
+            raise
+        
+        except DeadlineExceeded as e:
+            logger.warning(str(e))
+            COORDINATOR_REQUESTS.labels(status='deadline_exceeded').inc()
+            context.set_code(grpc.StatusCode.DEADLINE_EXCEEDED)
+            context.set_details(str(e))
+            return model_service_pb2.ModelOutput()
+        
+        except Overloaded as e:
+            logger.warning(f"Request rejected: {str(e)}")
+            COORDINATOR_REQUESTS.labels(status='rejected').inc()
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(str(e))
+            return model_service_pb2.ModelOutput()
+        
+        except StageError as e:
+            error_msg = str(e)
+            logger.error(error_msg)
+            COORDINATOR_REQUESTS.labels(status='error').inc()
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(error_msg)
+            return model_service_pb2.ModelOutput()
             
         except Exception as e:
             error_msg = f"Request processing failed: {str(e)}"
@@ -189,6 +1315,133 @@ class ModelCoordinator(model_service_pb2_grpc.ModelServiceServicer):
             context.set_details(error_msg)
             return model_service_pb2.ModelOutput()
 
+    async def generate_batch_item(self, item, defaults, deadline: float, slots: asyncio.Semaphore):
+        """Generate one item of a batch; failures are returned as error metadata, not raised."""
+        metadata = {**defaults, **item.metadata}
+        async with slots:
+            try:
+                params = self.resolve_generation_params(metadata)
+                priority = self.admission.resolve_priority(metadata)
+                if self.unhealthy_nodes:
+                    raise NodesUnavailable(f"Nodes {sorted(self.unhealthy_nodes)} are unavailable")
+                await self.admission.acquire(priority, deadline)
+                try:
+                    tokens = await self.generate_shared(item, params, deadline)
+                finally:
+                    self.admission.release(priority)
+                BATCH_ITEMS.labels(status='success').inc()
+                return model_service_pb2.ModelOutput(data=tokens)
+            except Exception as e:
+                code, status = next(
+                    (code, status) for error_type, code, status in BATCH_ITEM_ERRORS
+                    if isinstance(e, error_type)
+                )
+                logger.warning(f"Batch item failed: {str(e)}")
+                BATCH_ITEMS.labels(status=status).inc()
+                return model_service_pb2.ModelOutput(metadata={'error': str(e), 'error_code': code.name})
+
+    async def process_batch(self, request, context):
+        """Generate continuations for every item of a batch.
+
+        Items run concurrently, at most ``batch_concurrency`` at a time, so
+        the nodes coalesce their steps into shared forward passes. Each
+        item still goes through admission control and the request cache, and
+        fails on its own without failing the batch.
+        """
+        start_time = time.time()
+        if len(request.items) > self.max_batch_items:
+            COORDINATOR_REQUESTS.labels(status='invalid').inc()
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"Batch has {len(request.items)} items, the limit is {self.max_batch_items}")
+            return model_service_pb2.ModelBatchOutput()
+        
+        try:
+            slots = asyncio.Semaphore(self.batch_concurrency)
+            deadline = request_deadline(context)
+            items = await asyncio.gather(*(
+                self.generate_batch_item(item, request.metadata, deadline, slots)
+                for item in request.items
+            ))
+            
+            TOTAL_PROCESSING_TIME.observe(time.time() - start_time)
+            COORDINATOR_REQUESTS.labels(status='success').inc()
+            logger.info(f"Processed batch of {len(items)} items")
+            return model_service_pb2.ModelBatchOutput(items=items)
+        
+        except asyncio.CancelledError:
+            logger.info("Batch cancelled by the caller")
+            COORDINATOR_REQUESTS.labels(status='cancelled').inc()
+            raise
+
+    async def process_stream(self, request, context):
+        """Stream each generated token as soon as the last stage selects it."""
+        start_time = time.time()
+        try:
+            try:
+                params = self.resolve_generation_params(request.metadata)
+                priority = self.admission.resolve_priority(request.metadata)
+            except ValueError as e:
+                COORDINATOR_REQUESTS.labels(status='invalid').inc()
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details(str(e))
+                return
+            
+            # Fail fast on nodes the health monitor or a failed RPC marked unhealthy
+            if self.unhealthy_nodes:
+                error_msg = f"Nodes {sorted(self.unhealthy_nodes)} are unavailable"
+                logger.error(error_msg)
+                COORDINATOR_REQUESTS.labels(status='error').inc()
+                context.set_code(grpc.StatusCode.UNAVAILABLE)
+                context.set_details(error_msg)
+                return
+            
+            deadline = request_deadline(context)
+            await self.admission.acquire(priority, deadline)
+            token_count = 0
+            try:
+                async for token in self.generate_tokens(request, params, deadline):
+                    if not token_count:
+                        TIME_TO_FIRST_TOKEN.observe(time.time() - start_time)
+                    token_count += 1
+                    yield model_service_pb2.ModelOutput(data=[token])
+            finally:
+                self.admission.release(priority)
+            
+            TOTAL_PROCESSING_TIME.observe(time.time() - start_time)
+            COORDINATOR_REQUESTS.labels(status='success').inc()
+            logger.info(f"Streamed {token_count} generated tokens")
+        
+        except asyncio.CancelledError:
+            logger.info("Stream cancelled by the caller")
+            COORDINATOR_REQUESTS.labels(status='cancelled').inc()
+            raise
+        
+        except DeadlineExceeded as e:
+            logger.warning(str(e))
+            COORDINATOR_REQUESTS.labels(status='deadline_exceeded').inc()
+            context.set_code(grpc.StatusCode.DEADLINE_EXCEEDED)
+            context.set_details(str(e))
+        
+        except Overloaded as e:
+            logger.warning(f"Stream rejected: {str(e)}")
+            COORDINATOR_REQUESTS.labels(status='rejected').inc()
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(str(e))
+        
+        except StageError as e:
+            error_msg = str(e)
+            logger.error(error_msg)
+            COORDINATOR_REQUESTS.labels(status='error').inc()
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(error_msg)
+            
+        except Exception as e:
+            error_msg = f"Request processing failed: {str(e)}"
+            logger.error(error_msg)
+            COORDINATOR_REQUESTS.labels(status='error').inc()
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(error_msg)
+
 async def serve(config_path: str, port: int):
     """Start the coordinator server."""
     try:
@@ -204,7 +1457,13 @@ async def serve(config_path: str, port: int):
         server.add_insecure_port(f'[::]:{port}')
         logger.info(f"Starting coordinator server on port {port}")
         await server.start()
-        await server.wait_for_termination()
+        coordinator.start_health_monitor()
+        coordinator.scheduler.start()
+        try:
+            await server.wait_for_termination()
+        finally:
+            await coordinator.scheduler.stop()
+            await coordinator.stop_health_monitor()
     except Exception as e:
         logger.error("Failed to start server: %s", str(e))
         raise
@@ -0,0 +1,154 @@
+"""Benchmark CPU inference precisions against fp32.
+
+Each precision runs in a fresh subprocess so peak RSS is measured in
+isolation. For the same prompts the script reports model load time, latency,
+tokens/sec, peak RSS and the divergence from fp32: the KL divergence of the
+next-token distribution and the share of greedy continuation tokens that
+match the fp32 output.
+
+Usage:
+    python src/node/benchmark_precision.py --model gpt2 --precisions fp32 int8 bf16
+"""
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import tempfile
+import subprocess
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from node_server import PRECISIONS, apply_precision
+
+DEFAULT_PROMPTS = [
+    "Hello, how are you?",
+    "The quick brown fox jumps over the lazy dog because",
+    "In distributed systems, the hardest problem is",
+    "Once upon a time in a small village by the sea,",
+    "The key steps to train a neural network are",
+]
+
+def run_worker(args):
+    """Load the model at one precision, run every prompt and save the results."""
+    torch.manual_seed(0)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+
+    load_start = time.time()
+    model = AutoModelForCausalLM.from_pretrained(args.model, torch_dtype=torch.float32)
+    model = apply_precision(model, args.worker).eval()
+    load_seconds = time.time() - load_start
+
+    results = []
+    with torch.no_grad():
+        # Warm up kernels and allocator before timing
+        warmup = tokenizer(DEFAULT_PROMPTS[0], return_tensors='pt')
+        model.generate(**warmup, max_new_tokens=4, do_sample=False,
+                       pad_token_id=tokenizer.eos_token_id)
+
+        for prompt in args.prompts:
+            inputs = tokenizer(prompt, return_tensors='pt')
+            input_length = inputs['input_ids'].shape[-1]
+
+            logits = model(**inputs).logits[0, -1].float()
+            logprobs = torch.log_softmax(logits, dim=-1)
+
+            start = time.time()
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=args.max_new_tokens,
+                min_new_tokens=args.max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id
+            )
+            latency = time.time() - start
+
+            results.append({
+                'prompt': prompt,
+                'latency': latency,
+                'tokens': outputs[0, input_length:].tolist(),
+                'logprobs': logprobs
+            })
+
+    torch.save({
+        'precision': args.worker,
+        'load_seconds': load_seconds,
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'results': results
+    }, args.output)
+
+def run_precision(args, precision: str, output_dir: str) -> dict:
+    """Run one precision in a subprocess and load its results."""
+    output = os.path.join(output_dir, f'{precision}.pt')
+    subprocess.run([
+        sys.executable, os.path.abspath(__file__),
+        '--worker', precision,
+        '--output', output,
+        '--model', args.model,
+        '--max-new-tokens', str(args.max_new_tokens),
+        '--prompts', *args.prompts
+    ], check=True)
+    return torch.load(output)
+
+def summarize(run: dict, reference: dict) -> dict:
+    """Compare a run against the fp32 reference."""
+    latencies = [result['latency'] for result in run['results']]
+    generated = sum(len(result['tokens']) for result in run['results'])
+
+    kl_divergences, matches, compared = [], 0, 0
+    for result, baseline in zip(run['results'], reference['results']):
+        kl = torch.sum(
+            baseline['logprobs'].exp() * (baseline['logprobs'] - result['logprobs'])
+        )
+        kl_divergences.append(float(kl))
+        for token, baseline_token in zip(result['tokens'], baseline['tokens']):
+            matches += int(token == baseline_token)
+            compared += 1
+
+    return {
+        'precision': run['precision'],
+        'load_seconds': round(run['load_seconds'], 2),
+        'mean_latency_seconds': round(sum(latencies) / len(latencies), 3),
+        'tokens_per_second': round(generated / sum(latencies), 2),
+        'peak_rss_mb': round(run['peak_rss'] / (1024 ** 2), 1),
+        'mean_kl_vs_fp32': round(sum(kl_divergences) / len(kl_divergences), 5),
+        'greedy_token_match': round(matches / compared, 3) if compared else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='gpt2', help='Model name or path')
+    parser.add_argument('--precisions', nargs='+', default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument('--max-new-tokens', type=int, default=32)
+    parser.add_argument('--prompts', nargs='+', default=DEFAULT_PROMPTS)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--worker', choices=PRECISIONS, help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    # fp32 is always run first as the reference
+    precisions = ['fp32'] + [p for p in args.precisions if p != 'fp32']
+    with tempfile.TemporaryDirectory() as output_dir:
+        runs = [run_precision(args, precision, output_dir) for precision in precisions]
+    summaries = [summarize(run, runs[0]) for run in runs]
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+        return
+
+    columns = list(summaries[0].keys())
+    print(' | '.join(columns))
+    for summary in summaries:
+        print(' | '.join(str(summary[column]) for column in columns))
+
+if __name__ == "__main__":
+    main()
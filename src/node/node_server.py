@@ -1,9 +1,36 @@
 import os
 import json
 import logging
+import resource
+import threading
+import warnings
+from collections import OrderedDict
 from concurrent import futures
+import numpy as np
 import torch
-from transformers import AutoModelForCausalLM, GPT2Tokenizer
+from safetensors import safe_open
+from transformers import (
+    AutoConfig,
+    AutoModelForCausalLM,
+    GPT2Config,
+    GPT2LMHeadModel,
+    LogitsProcessorList,
+    MinNewTokensLengthLogitsProcessor,
+    NoRepeatNGramLogitsProcessor,
+    RepetitionPenaltyLogitsProcessor,
+    TemperatureLogitsWarper,
+    TopKLogitsWarper,
+    TopPLogitsWarper
+)
+from transformers.models.gpt2.modeling_gpt2 import GPT2Block
+from transformers.pytorch_utils import Conv1D
+from transformers.utils import (
+    SAFE_WEIGHTS_INDEX_NAME,
+    SAFE_WEIGHTS_NAME,
+    WEIGHTS_INDEX_NAME,
+    WEIGHTS_NAME,
+    cached_file
+)
 import grpc
 import grpc.aio
 import asyncio
@@ -20,6 +47,7 @@ sys.path.append(proto_dir)
 
 import model_service_pb2
 import model_service_pb2_grpc
+from tensor_codec import decode_tokens, encode_array, grpc_compression
 
 # Configure logging
 logging.basicConfig(
@@ -53,26 +81,734 @@ GPU_MEMORY_USAGE = Gauge(
     ['node_id', 'type']  # type can be 'allocated' or 'reserved'
 )
 
+STARTUP_TIME = Gauge(
+    'model_node_startup_seconds',
+    'Seconds from process start until each startup phase completed',
+    ['node_id', 'phase']  # phase can be 'plan', 'weights', 'draft' or 'ready'
+)
+
+PEAK_MEMORY_USAGE = Gauge(
+    'model_node_peak_rss_bytes',
+    'Peak resident set size of the node process',
+    ['node_id']
+)
+
+INFERENCE_QUEUE_DEPTH = Gauge(
+    'model_inference_queue_depth',
+    'Number of inference requests waiting for a worker',
+    ['node_id']
+)
+
+INFERENCE_QUEUE_WAIT = Histogram(
+    'model_inference_queue_wait_seconds',
+    'Time an inference request waited in the queue before a worker picked it up',
+    ['node_id']
+)
+
+INFERENCE_WORKERS_BUSY = Gauge(
+    'model_inference_workers_busy',
+    'Number of inference workers currently running the model',
+    ['node_id']
+)
+
+INFERENCE_DISCARDED = Counter(
+    'model_inference_discarded_total',
+    'Requests whose caller went away (cancelled or past its deadline) before receiving a result',
+    ['node_id', 'stage']  # stage can be 'queued' (never run) or 'running' (result thrown away)
+)
+
+INFERENCE_BATCH_SIZE = Histogram(
+    'model_inference_batch_size',
+    'Number of requests coalesced into one forward pass',
+    ['node_id'],
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+PREFIX_CACHE_LOOKUPS = Counter(
+    'model_prefix_cache_lookups_total',
+    'Prefix cache lookups',
+    ['node_id', 'result']  # result can be 'hit' or 'miss'
+)
+
+PREFIX_CACHE_REUSED_TOKENS = Counter(
+    'model_prefix_cache_reused_tokens_total',
+    'Tokens whose prefill was skipped thanks to the prefix cache',
+    ['node_id']
+)
+
+PREFIX_CACHE_EVICTIONS = Counter(
+    'model_prefix_cache_evictions_total',
+    'Prefix cache entries evicted to stay within the byte budget',
+    ['node_id']
+)
+
+PREFIX_CACHE_BYTES = Gauge(
+    'model_prefix_cache_bytes',
+    'Bytes held by the prefix cache',
+    ['node_id']
+)
+
+PREFIX_CACHE_ENTRIES = Gauge(
+    'model_prefix_cache_entries',
+    'Number of token prefixes held by the prefix cache',
+    ['node_id']
+)
+
+SESSION_LOOKUPS = Counter(
+    'model_session_lookups_total',
+    'Lookups of generation sessions for delta-only steps',
+    ['node_id', 'result']  # result can be 'hit' or 'miss'
+)
+
+SESSION_EVICTIONS = Counter(
+    'model_session_evictions_total',
+    'Sessions dropped to stay within the byte budget, after sitting idle or when closed',
+    ['node_id', 'reason']  # reason can be 'size', 'idle' or 'closed'
+)
+
+SESSION_BYTES = Gauge(
+    'model_session_bytes',
+    'Bytes of key/value tensors held for running generation sessions',
+    ['node_id']
+)
+
+SESSION_ACTIVE = Gauge(
+    'model_sessions_active',
+    'Generation sessions whose key/value tensors are held by this node',
+    ['node_id']
+)
+
+FORWARD_LATENCY = Histogram(
+    'model_forward_latency_seconds',
+    'Time spent waiting on the next stage when forwarding a step down a chained route',
+    ['node_id']
+)
+
+DRAFT_LATENCY = Histogram(
+    'model_draft_latency_seconds',
+    'Time taken by the draft model to propose tokens for one speculative step',
+    ['node_id']
+)
+
+DRAFT_CONTEXT_TOKENS = Counter(
+    'model_draft_context_tokens_total',
+    'Context tokens the draft model needed before proposing, by whether their key/values were cached',
+    ['node_id', 'source']  # source can be 'cached' or 'computed'
+)
+
+DRAFT_VERIFICATIONS = Counter(
+    'model_draft_tokens_verified_total',
+    'Draft tokens verified by the last stage',
+    ['node_id', 'result']  # result can be 'accepted' or 'rejected'
+)
+
+STAGE_LAYERS = Gauge(
+    'model_stage_layers',
+    'Number of transformer layers owned by this pipeline stage',
+    ['node_id']
+)
+
 NODE_INFO = Info('model_node', 'Model node information')
 
+# Dtypes hidden states may use on the wire between stages
+WIRE_DTYPES = {
+    'float32': torch.float32,
+    'float16': torch.float16
+}
+
+def encode_hidden_states(hidden_states: torch.Tensor, wire_dtype: str = 'float32') -> model_service_pb2.Tensor:
+    """Pack activations for transfer to the next stage."""
+    array = hidden_states.detach().to(WIRE_DTYPES[wire_dtype]).cpu().numpy()
+    return encode_array(array)
+
+def decode_hidden_states(tensor: model_service_pb2.Tensor) -> torch.Tensor:
+    """Return a zero-copy view over activations received from the previous stage.
+
+    The view shares memory with the immutable protobuf buffer, so it must
+    only be read from.
+    """
+    with warnings.catch_warnings():
+        # torch warns about wrapping a non-writable buffer
+        warnings.simplefilter('ignore', UserWarning)
+        flat = torch.frombuffer(tensor.buffer, dtype=WIRE_DTYPES[tensor.dtype])
+    return flat.view(tuple(tensor.shape))
+
+def request_tokens(request) -> list:
+    """Return the token ids of a request, preferring the packed payload."""
+    if request.HasField('tokens'):
+        return decode_tokens(request.tokens).tolist()
+    return list(request.data)
+
+PRECISIONS = ('fp32', 'bf16', 'int8')
+
+def convert_conv1d_to_linear(module: torch.nn.Module):
+    """Replace GPT-2's Conv1D projections with equivalent nn.Linear layers, in place.
+
+    Conv1D stores its weight as ``[in, out]``; dynamic quantization only
+    recognises nn.Linear, which stores ``[out, in]``.
+    """
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features, device='meta')
+            linear.weight = torch.nn.Parameter(child.weight.detach().t().contiguous())
+            linear.bias = torch.nn.Parameter(child.bias.detach())
+            setattr(module, name, linear)
+        else:
+            convert_conv1d_to_linear(child)
+
+def apply_precision(module: torch.nn.Module, precision: str) -> torch.nn.Module:
+    """Convert a loaded fp32 module to the requested CPU inference precision.
+
+    ``int8`` applies dynamic int8 quantization to every Linear layer (weights
+    stored as int8, activations quantized on the fly); ``bf16`` casts all
+    weights to bfloat16.
+    """
+    if precision == 'fp32':
+        return module
+    if precision == 'bf16':
+        return module.to(torch.bfloat16)
+    if precision == 'int8':
+        convert_conv1d_to_linear(module)
+        return torch.ao.quantization.quantize_dynamic(
+            module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+def compute_dtype(precision: str) -> torch.dtype:
+    """Return the activation dtype used by a module of the given precision."""
+    return torch.bfloat16 if precision == 'bf16' else torch.float32
+
+def stage_layer_ranges(nodes: list, total_layers: int) -> list:
+    """Return the ``(start, end)`` layer range of every stage, in ``model_part`` order.
+
+    Ranges come from the nodes' ``layers`` entries, as written by
+    plan_pipeline.py. Without a plan the layers are split evenly and any
+    remainder goes to the earlier stages, since the last one also runs the LM
+    head.
+    """
+    nodes = sorted(nodes, key=lambda node: node['model_part'])
+    if any('layers' in node for node in nodes):
+        ranges = []
+        for node in nodes:
+            layers = node.get('layers', [])
+            start = ranges[-1][1] if ranges else 0
+            if len(layers) != 2 or layers[0] != start or layers[1] <= layers[0]:
+                raise ValueError(
+                    f"Node {node['id']} has layers {layers}, expected a non-empty range starting at {start}"
+                )
+            ranges.append((layers[0], layers[1]))
+        if ranges[-1][1] != total_layers:
+            raise ValueError(f"Layer plan covers {ranges[-1][1]} of {total_layers} layers")
+        return ranges
+    
+    if len(nodes) > total_layers:
+        raise ValueError(f"Cannot split {total_layers} layers across {len(nodes)} stages")
+    base, remainder = divmod(total_layers, len(nodes))
+    ranges, start = [], 0
+    for i in range(len(nodes)):
+        end = start + base + (1 if i < remainder else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def process_start_time() -> float:
+    """Return when this process was created, on the ``time.time()`` clock.
+
+    psutil adds the process's start offset to a boot time it only knows to
+    the whole second, which can put the result up to a second early. Where
+    the boot-time clock is available the offset is measured against it
+    instead.
+    """
+    created = psutil.Process().create_time()
+    if not hasattr(time, 'CLOCK_BOOTTIME'):
+        return created
+    since_boot = created - psutil.boot_time()
+    return time.time() - (time.clock_gettime(time.CLOCK_BOOTTIME) - since_boot)
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue cannot accept more requests."""
+
+class ForwardError(Exception):
+    """Raised when the next stage on a chained route fails; carries its status for the caller."""
+
+    def __init__(self, node_id: str, code: grpc.StatusCode, details: str):
+        super().__init__(f"Node {node_id} failed on a chained route: {details}")
+        self.node_id = node_id
+        self.code = code
+        self.details = details
+
+class InferenceExecutor:
+    """Runs batched blocking inference on a bounded worker pool fed by an explicit queue.
+
+    Model execution happens on dedicated threads so the gRPC event loop stays
+    free to serve health checks and accept new requests while a forward pass
+    is running. Each worker acts as the batching scheduler: once it picks up a
+    request it keeps collecting queued requests until ``max_batch_size`` is
+    reached or ``max_wait_ms`` has passed, then hands the whole batch to
+    ``batch_fn`` and scatters the per-item results back to their callers.
+    """
+
+    def __init__(self, node_id: str, batch_fn, num_workers: int = 1, max_queue_size: int = 64,
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.node_id = node_id
+        self.batch_fn = batch_fn
+        self.num_workers = num_workers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.item_ready = asyncio.Event()
+        self.pool = futures.ThreadPoolExecutor(
+            max_workers=num_workers,
+            thread_name_prefix=f'{node_id}-inference'
+        )
+        self.workers = []
+        self.busy = 0
+
+    def start(self):
+        """Start the worker tasks that drain the queue."""
+        for _ in range(self.num_workers):
+            self.workers.append(asyncio.create_task(self.worker()))
+        logger.info(
+            f"Inference executor started with {self.num_workers} worker(s), "
+            f"queue size {self.queue.maxsize}, batches of up to {self.max_batch_size} "
+            f"within {self.max_wait * 1000:.1f}ms"
+        )
+
+    async def stop(self):
+        """Cancel the worker tasks and shut the thread pool down."""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.pool.shutdown(wait=False)
+
+    async def submit(self, item):
+        """Queue an item for the next batch and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future, time.time()))
+        except asyncio.QueueFull:
+            raise InferenceQueueFull(
+                f"Inference queue is full ({self.queue.maxsize} requests waiting)"
+            )
+        INFERENCE_QUEUE_DEPTH.labels(node_id=self.node_id).set(self.queue.qsize())
+        self.item_ready.set()
+        return await future
+
+    async def collect_batch(self) -> list:
+        """Wait for one queued item, then gather more until the batch window closes."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if self.queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self.item_ready.clear()
+                try:
+                    await asyncio.wait_for(self.item_ready.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                continue
+            batch.append(self.queue.get_nowait())
+        INFERENCE_QUEUE_DEPTH.labels(node_id=self.node_id).set(self.queue.qsize())
+        return batch
+
+    async def worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            collected = await self.collect_batch()
+            try:
+                now = time.time()
+                for _, _, enqueued_at in collected:
+                    INFERENCE_QUEUE_WAIT.labels(node_id=self.node_id).observe(now - enqueued_at)
+                # Callers may have gone away while their requests were queued
+                batch = [(item, future) for item, future, _ in collected if not future.cancelled()]
+                if len(batch) < len(collected):
+                    INFERENCE_DISCARDED.labels(node_id=self.node_id, stage='queued').inc(
+                        len(collected) - len(batch)
+                    )
+                if not batch:
+                    continue
+                INFERENCE_BATCH_SIZE.labels(node_id=self.node_id).observe(len(batch))
+                self.busy += 1
+                INFERENCE_WORKERS_BUSY.labels(node_id=self.node_id).set(self.busy)
+                try:
+                    results = await loop.run_in_executor(
+                        self.pool, self.batch_fn, [item for item, _ in batch]
+                    )
+                    for (_, future), result in zip(batch, results):
+                        if not future.done():
+                            future.set_result(result)
+                        else:
+                            INFERENCE_DISCARDED.labels(node_id=self.node_id, stage='running').inc()
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                finally:
+                    self.busy -= 1
+                    INFERENCE_WORKERS_BUSY.labels(node_id=self.node_id).set(self.busy)
+            finally:
+                for _ in collected:
+                    self.queue.task_done()
+
+# Cached prefixes are indexed in blocks of this many tokens; shorter shared prefixes are not reused
+PREFIX_BLOCK_SIZE = 16
+
+def prefix_block_hashes(tokens: list):
+    """Yield a chained hash for each full block of ``tokens``.
+
+    The ``i``-th hash covers ``tokens[:(i + 1) * PREFIX_BLOCK_SIZE]``, so two
+    sequences share it exactly when (barring collisions) they share that
+    whole prefix.
+    """
+    chained = 0
+    for end in range(PREFIX_BLOCK_SIZE, len(tokens) + 1, PREFIX_BLOCK_SIZE):
+        chained = hash((chained, tuple(tokens[end - PREFIX_BLOCK_SIZE:end])))
+        yield chained
+
+class PrefixCache:
+    """LRU cache of this stage's key/value tensors keyed by token prefix.
+
+    Each entry holds, for one token prefix, the per-layer ``(key, value)``
+    tensors of the stage's blocks and, on non-final stages, the hidden states
+    the stage produced for that prefix so downstream stages still receive the
+    full sequence. Entries are evicted least-recently-used first once the
+    total size exceeds ``max_bytes``.
+
+    A lookup reuses the entry sharing the longest common prefix with the new
+    tokens, so prompts that start with the same system prompt or template
+    share its key/values however they end. Entries are indexed by chained
+    block hashes to find the candidates, and the exact common length is
+    then measured token by token. Entries created while decoding
+    (``transient``) are replaced by their extension on the next step, so a
+    running generation holds a single entry instead of one per generated
+    token; partial reuse also rolls back draft tokens the target model
+    rejected and lets sibling beams share their common prefix.
+    """
+
+    def __init__(self, node_id: str, max_bytes: int):
+        self.node_id = node_id
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        # Block hash -> keys of the entries that contain that whole prefix
+        self.blocks = {}
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def lookup(self, tokens: list, max_length: int = None) -> tuple:
+        """Return ``(entry, length)`` for the longest reusable cached prefix of ``tokens``.
+
+        Only the first ``length`` positions of the entry may be used. At least
+        one token, or ``len(tokens) - max_length`` when given, is always left
+        to recompute so fresh outputs are produced. Returns ``(None, 0)`` on a
+        miss.
+        """
+        limit = len(tokens) - 1 if max_length is None else min(max_length, len(tokens) - 1)
+        best, best_length = None, 0
+        with self.lock:
+            # Entries sharing the most full blocks are the only ones that can share the longest prefix
+            candidates = None
+            for block_hash in prefix_block_hashes(tokens[:limit]):
+                keys = self.blocks.get(block_hash)
+                if keys is None:
+                    break
+                candidates = keys
+            
+            if candidates:
+                prefix = np.asarray(tokens[:limit], dtype=np.int64)
+                for key in candidates:
+                    entry = self.entries[key]
+                    length = min(entry['length'], limit)
+                    mismatches = np.flatnonzero(entry['array'][:length] != prefix[:length])
+                    common = int(mismatches[0]) if len(mismatches) else length
+                    if common > best_length:
+                        best, best_length = entry, common
+            
+            if best is not None:
+                self.entries.move_to_end(best['key'])
+                PREFIX_CACHE_LOOKUPS.labels(node_id=self.node_id, result='hit').inc()
+                PREFIX_CACHE_REUSED_TOKENS.labels(node_id=self.node_id).inc(best_length)
+                return best, best_length
+        PREFIX_CACHE_LOOKUPS.labels(node_id=self.node_id, result='miss').inc()
+        return None, 0
+
+    def insert(self, tokens: list, past: list, hidden_states, transient: bool, replaces=None):
+        """Store the key/value tensors (and stage outputs) computed for ``tokens``."""
+        size = sum(key.nbytes + value.nbytes for key, value in past)
+        if hidden_states is not None:
+            size += hidden_states.nbytes
+        if size > self.max_bytes:
+            return
+
+        key = tuple(tokens)
+        with self.lock:
+            if replaces is not None and replaces['transient']:
+                self._remove(replaces['key'])
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            else:
+                block_hashes = list(prefix_block_hashes(key))
+                self.entries[key] = {
+                    'key': key,
+                    'length': len(key),
+                    'past': past,
+                    'hidden_states': hidden_states,
+                    'bytes': size,
+                    'transient': transient,
+                    'array': np.asarray(key, dtype=np.int64),
+                    'blocks': block_hashes
+                }
+                for block_hash in block_hashes:
+                    self.blocks.setdefault(block_hash, set()).add(key)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    self._remove(next(iter(self.entries)))
+                    PREFIX_CACHE_EVICTIONS.labels(node_id=self.node_id).inc()
+            PREFIX_CACHE_BYTES.labels(node_id=self.node_id).set(self.bytes)
+            PREFIX_CACHE_ENTRIES.labels(node_id=self.node_id).set(len(self.entries))
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry['bytes']
+        for block_hash in entry['blocks']:
+            keys = self.blocks[block_hash]
+            keys.discard(key)
+            if not keys:
+                del self.blocks[block_hash]
+
+class SessionStore:
+    """Key/value tensors of running generations, keyed by the coordinator's session id.
+
+    Holding a generation's state lets each decode step carry only the tokens,
+    and on downstream stages only the activations, added since the previous
+    step. Sessions are dropped least-recently-used first once the total size
+    exceeds ``max_bytes``, and after ``ttl`` seconds without a step.
+    """
+
+    def __init__(self, node_id: str, max_bytes: int, ttl: float):
+        self.node_id = node_id
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, session_id: str):
+        """Return the session's entry (``tokens``, ``length`` and ``past``), or None."""
+        with self.lock:
+            self._expire()
+            entry = self.entries.get(session_id)
+            if entry is not None:
+                self.entries.move_to_end(session_id)
+                entry['used_at'] = time.time()
+        SESSION_LOOKUPS.labels(
+            node_id=self.node_id, result='hit' if entry is not None else 'miss'
+        ).inc()
+        return entry
+
+    def put(self, session_id: str, tokens: list, past: list):
+        """Store a session's tokens and the key/value tensors covering all of them."""
+        size = sum(key.nbytes + value.nbytes for key, value in past)
+        with self.lock:
+            self._remove(session_id)
+            if size <= self.max_bytes:
+                self.entries[session_id] = {
+                    'tokens': tokens,
+                    'length': len(tokens),
+                    'past': past,
+                    'bytes': size,
+                    'used_at': time.time()
+                }
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    self._remove(next(iter(self.entries)))
+                    SESSION_EVICTIONS.labels(node_id=self.node_id, reason='size').inc()
+            SESSION_BYTES.labels(node_id=self.node_id).set(self.bytes)
+            SESSION_ACTIVE.labels(node_id=self.node_id).set(len(self.entries))
+
+    def close(self, session_id: str) -> bool:
+        """Drop a finished or abandoned session; returns whether it was held."""
+        with self.lock:
+            held = session_id in self.entries
+            self._remove(session_id)
+            SESSION_BYTES.labels(node_id=self.node_id).set(self.bytes)
+            SESSION_ACTIVE.labels(node_id=self.node_id).set(len(self.entries))
+        if held:
+            SESSION_EVICTIONS.labels(node_id=self.node_id, reason='closed').inc()
+        return held
+
+    def _expire(self):
+        # Entries are kept in last-used order, so idle sessions sit at the front
+        cutoff = time.time() - self.ttl
+        while self.entries:
+            session_id, entry = next(iter(self.entries.items()))
+            if entry['used_at'] >= cutoff:
+                break
+            self._remove(session_id)
+            SESSION_EVICTIONS.labels(node_id=self.node_id, reason='idle').inc()
+        SESSION_BYTES.labels(node_id=self.node_id).set(self.bytes)
+        SESSION_ACTIVE.labels(node_id=self.node_id).set(len(self.entries))
+
+    def _remove(self, session_id: str):
+        entry = self.entries.pop(session_id, None)
+        if entry is not None:
+            self.bytes -= entry['bytes']
+
+def draft_session_key(session_id: str) -> str:
+    """Return the session store key holding the draft model's key/values for a session."""
+    return f'{session_id}:draft'
+
+class PipelineStage(torch.nn.Module):
+    """The slice of a GPT-2 style causal LM executed by one node.
+
+    The first stage owns the token and position embeddings, the last stage owns
+    the final layer norm and the LM head, and every stage owns a contiguous
+    range of transformer blocks.
+    """
+
+    def __init__(self, config, start_layer: int, end_layer: int, is_first: bool, is_last: bool):
+        super().__init__()
+        self.config = config
+        self.start_layer = start_layer
+        self.end_layer = end_layer
+        self.is_first = is_first
+        self.is_last = is_last
+
+        # Only the modules owned by this stage are allocated
+        self.wte = torch.nn.Embedding(config.vocab_size, config.n_embd) if is_first else None
+        self.wpe = torch.nn.Embedding(config.n_positions, config.n_embd) if is_first else None
+        self.drop = torch.nn.Dropout(config.embd_pdrop) if is_first else None
+        self.h = torch.nn.ModuleList(
+            GPT2Block(config, layer_idx=i) for i in range(start_layer, end_layer)
+        )
+        self.ln_f = (
+            torch.nn.LayerNorm(config.n_embd, eps=config.layer_norm_epsilon) if is_last else None
+        )
+        self.lm_head = (
+            torch.nn.Linear(config.n_embd, config.vocab_size, bias=False) if is_last else None
+        )
+
+    def checkpoint_targets(self, key: str) -> list[str]:
+        """Map a checkpoint tensor name to the parameter names it fills in this stage."""
+        name = key[len('transformer.'):] if key.startswith('transformer.') else key
+        if name.startswith('h.'):
+            index, rest = name[2:].split('.', 1)
+            index = int(index)
+            if self.start_layer <= index < self.end_layer:
+                return [f'h.{index - self.start_layer}.{rest}']
+            return []
+
+        targets = []
+        if self.is_first and name.split('.')[0] in ('wte', 'wpe'):
+            targets.append(name)
+        if self.is_last and name.split('.')[0] in ('ln_f', 'lm_head'):
+            targets.append(name)
+        # GPT-2 ties the LM head to the token embeddings
+        if self.is_last and name == 'wte.weight' and self.config.tie_word_embeddings:
+            targets.append('lm_head.weight')
+        return targets
+
+    def forward(self, input_ids=None, hidden_states=None, attention_mask=None,
+                position_ids=None, past_key_values=None, use_cache=False, num_logits=1):
+        """Return hidden states for the next stage, or next-token logits on the last stage.
+
+        ``attention_mask`` is a ``[batch, past + seq]`` 0/1 mask for padded
+        batches; it can be omitted when every row has the same length.
+        ``past_key_values`` holds one ``(key, value)`` pair per owned block.
+        With ``use_cache`` the per-block ``(key, value)`` pairs covering past
+        and new positions are returned alongside the output. With ``num_logits``
+        above one the last stage returns ``[batch, num_logits, vocab]`` logits
+        for the final positions instead of ``[batch, vocab]``, which is how
+        draft tokens are verified in a single pass.
+        """
+        if self.is_first:
+            if position_ids is None:
+                position_ids = torch.arange(
+                    input_ids.shape[-1], dtype=torch.long, device=input_ids.device
+                ).unsqueeze(0)
+            hidden_states = self.drop(self.wte(input_ids) + self.wpe(position_ids))
+
+        extended_mask = None
+        if attention_mask is not None:
+            extended_mask = attention_mask[:, None, None, :].to(hidden_states.dtype)
+            extended_mask = (1.0 - extended_mask) * torch.finfo(hidden_states.dtype).min
+
+        presents = []
+        for i, block in enumerate(self.h):
+            outputs = block(
+                hidden_states,
+                layer_past=past_key_values[i] if past_key_values is not None else None,
+                attention_mask=extended_mask,
+                use_cache=use_cache
+            )
+            hidden_states = outputs[0]
+            if use_cache:
+                presents.append(outputs[1])
+
+        if self.is_last:
+            hidden_states = self.ln_f(hidden_states)
+            if num_logits == 1:
+                output = self.lm_head(hidden_states[:, -1, :])
+            else:
+                output = self.lm_head(hidden_states[:, -num_logits:, :])
+        else:
+            output = hidden_states
+        return (output, presents) if use_cache else output
+
 class ModelNode(model_service_pb2_grpc.ModelServiceServicer):
     
-    def __init__(self, config_path: str, node_id: str):
+    def __init__(self, config_path: str, node_id: str, metrics_port: int = 8001):
+        # Startup phases are timed from process creation, so imports and interpreter start count too
+        self.startup_time = process_start_time()
+        
         # Start Prometheus metrics server
-        start_http_server(8001)
+        start_http_server(metrics_port)
         
         self.config = self.load_config(config_path, node_id)
-        self.tokenizer = GPT2Tokenizer.from_pretrained('gpt2') 
         self.model = self.load_model()
-        self.cache = {}
+        self.draft_model = self.load_draft_model()
+        self.prefix_cache = PrefixCache(
+            node_id,
+            max_bytes=int(self.config['node_config'].get('prefix_cache_mb', 256) * 1024 * 1024)
+        )
+        self.sessions = SessionStore(
+            node_id,
+            max_bytes=int(self.config['node_config'].get('session_cache_mb', 256) * 1024 * 1024),
+            ttl=self.config['node_config'].get('session_ttl_seconds', 60.0)
+        )
+        # Channels to downstream stages for chained forwarding, opened on first use
+        self.downstream = {}
+        self.executor = InferenceExecutor(
+            node_id,
+            self.run_batch,
+            num_workers=self.config['node_config'].get('inference_workers', 1),
+            max_queue_size=self.config['node_config'].get('max_queue_size', 64),
+            max_batch_size=self.config['node_config'].get('max_batch_size', 8),
+            max_wait_ms=self.config['node_config'].get('max_batch_wait_ms', 5.0)
+        )
         
         # Record node information
         NODE_INFO.info({
             'node_id': node_id,
             'model_name': self.config['model_name'],
             'device': 'cuda' if torch.cuda.is_available() else 'cpu',
-            'model_part': str(self.config['node_config']['model_part'])
+            'model_part': str(self.config['node_config']['model_part']),
+            'layers': f"{self.model.start_layer}-{self.model.end_layer}",
+            'is_first_stage': str(self.model.is_first),
+            'is_last_stage': str(self.model.is_last),
+            'precision': self.config['node_config'].get('precision', 'fp32'),
+            'draft_model': json.dumps(self.config['node_config'].get('draft_model'))
         })
+        STAGE_LAYERS.labels(node_id=node_id).set(self.model.end_layer - self.model.start_layer)
         
         # Start memory monitoring
         self.update_memory_metrics()
@@ -87,11 +823,22 @@ class ModelNode(model_service_pb2_grpc.ModelServiceServicer):
                                   if node['id'] == node_id), None)
                 if not node_config:
                     raise ValueError(f"Node {node_id} not found in config")
+                if node_config.get('precision', 'fp32') not in PRECISIONS:
+                    raise ValueError(
+                        f"Unknown precision '{node_config['precision']}', expected one of {PRECISIONS}"
+                    )
+                if node_config.get('activation_dtype', 'float32') not in WIRE_DTYPES:
+                    raise ValueError(
+                        f"Unknown activation_dtype '{node_config['activation_dtype']}', "
+                        f"expected one of {list(WIRE_DTYPES)}"
+                    )
                 
                 return {
                     'model_name': config['model_name'],
                     'node_config': node_config,
-                    'total_nodes': len(config['nodes'])
+                    'nodes': config['nodes'],
+                    'total_nodes': len(config['nodes']),
+                    'grpc_compression': config.get('grpc_compression', 'none')
                 }
         except Exception as e:
             logger.error("Failed to load config: %s", str(e))
@@ -125,6 +872,24 @@ class ModelNode(model_service_pb2_grpc.ModelServiceServicer):
         except Exception as e:
             logger.error(f"Failed to update memory metrics: {str(e)}")
 
+    def record_startup_phase(self, phase: str):
+        """Record how long startup has taken so far."""
+        elapsed = time.time() - self.startup_time
+        STARTUP_TIME.labels(node_id=self.config['node_config']['id'], phase=phase).set(elapsed)
+        return elapsed
+
+    def report_startup(self):
+        """Log and export the time to ready and the peak RSS of the process."""
+        node_id = self.config['node_config']['id']
+        time_to_ready = self.record_startup_phase('ready')
+        # ru_maxrss is reported in kilobytes on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        PEAK_MEMORY_USAGE.labels(node_id=node_id).set(peak_rss)
+        logger.info(
+            f"Startup report for {node_id}: ready in {time_to_ready:.2f}s, "
+            f"peak RSS {peak_rss / (1024**2):.1f}MB"
+        )
+
     def create_device_map(self) -> tuple[dict, bool]:
         """Create device map for this node's portion of the model."""
         try:
@@ -133,140 +898,552 @@ class ModelNode(model_service_pb2_grpc.ModelServiceServicer):
             target_device = 'cpu'
             logger.info(f"Using CPU for model execution")
 
-            model = AutoModelForCausalLM.from_pretrained(self.config['model_name'])
-            total_layers = len(model.transformer.h)
-            layers_per_node = total_layers // 3  # Split between 3 nodes
+            # The layer count comes from the config alone, no weights are loaded
+            self.model_config = AutoConfig.from_pretrained(self.config['model_name'])
+            total_layers = self.model_config.n_layer
+
+            total_nodes = self.config['total_nodes']
             node_idx = self.config['node_config']['model_part']
+            is_first = node_idx == 0
+            is_last = node_idx == total_nodes - 1
             
-            start_layer = node_idx * layers_per_node
-            end_layer = start_layer + layers_per_node
-            
-            # Create complete device map
-            device_map = {
-                'transformer.wte': target_device,
-                'transformer.wpe': target_device,
-                'transformer.drop': target_device,
-                'transformer.ln_f': target_device,
-                'lm_head': target_device
-            }
+            # Every node derives the whole plan so a bad plan fails on all of them
+            start_layer, end_layer = stage_layer_ranges(self.config['nodes'], total_layers)[node_idx]
             
-            # Map transformer layers
-            for i in range(total_layers):
+            # Map only the modules this stage executes
+            device_map = {}
+            if is_first:
+                device_map.update({
+                    'transformer.wte': target_device,
+                    'transformer.wpe': target_device,
+                    'transformer.drop': target_device
+                })
+            for i in range(start_layer, end_layer):
                 device_map[f'transformer.h.{i}'] = target_device
+            if is_last:
+                device_map.update({
+                    'transformer.ln_f': target_device,
+                    'lm_head': target_device
+                })
             
             logger.info(f"Created device map with layers {start_layer} to {end_layer} on {target_device}")
+            self.record_startup_phase('plan')
             return device_map, use_gpu
                 
         except Exception as e:
             logger.error(f"Failed to create device map: {str(e)}")
             raise
 
+    def resolve_checkpoint_files(self, stage: PipelineStage) -> list[str]:
+        """Return the checkpoint files holding this stage's weights, preferring safetensors."""
+        model_name = self.config['model_name']
+        for index_name, single_name in (
+            (SAFE_WEIGHTS_INDEX_NAME, SAFE_WEIGHTS_NAME),
+            (WEIGHTS_INDEX_NAME, WEIGHTS_NAME)
+        ):
+            index_file = cached_file(
+                model_name, index_name, _raise_exceptions_for_missing_entries=False
+            )
+            if index_file:
+                # Sharded checkpoint: only fetch the shards that hold owned tensors
+                with open(index_file, 'r') as f:
+                    weight_map = json.load(f)['weight_map']
+                shards = sorted({
+                    shard for key, shard in weight_map.items()
+                    if stage.checkpoint_targets(key)
+                })
+                return [cached_file(model_name, shard) for shard in shards]
+
+            single_file = cached_file(
+                model_name, single_name, _raise_exceptions_for_missing_entries=False
+            )
+            if single_file:
+                return [single_file]
+
+        raise FileNotFoundError(f"No checkpoint found for {model_name}")
+
+    def read_stage_weights(self, stage: PipelineStage, files: list[str]) -> dict:
+        """Read only the tensors owned by this stage from the checkpoint files."""
+        state_dict = {}
+        for path in files:
+            if path.endswith('.safetensors'):
+                # safetensors files are memory-mapped; unowned tensors are never read
+                with safe_open(path, framework='pt', device='cpu') as f:
+                    for key in f.keys():
+                        targets = stage.checkpoint_targets(key)
+                        if targets:
+                            tensor = f.get_tensor(key)
+                            state_dict.update({target: tensor for target in targets})
+            else:
+                checkpoint = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+                for key, tensor in checkpoint.items():
+                    for target in stage.checkpoint_targets(key):
+                        state_dict[target] = tensor
+                del checkpoint
+        return state_dict
+
     def load_model(self):
-        """Load model with memory optimizations."""
+        """Build this node's stage and load only the weights it owns."""
         try:
             device_map, use_gpu = self.create_device_map()
-            
-            model_args = {
-                'device_map': device_map,
-                'torch_dtype': torch.float16 if use_gpu else torch.float32,
-                'low_cpu_mem_usage': True
+            dtype = torch.float16 if use_gpu else torch.float32
+
+            layers = sorted(
+                int(name.rsplit('.', 1)[-1]) for name in device_map
+                if name.startswith('transformer.h.')
+            )
+            stage = PipelineStage(
+                self.model_config,
+                start_layer=layers[0],
+                end_layer=layers[-1] + 1,
+                is_first='transformer.wte' in device_map,
+                is_last='lm_head' in device_map
+            )
+
+            files = self.resolve_checkpoint_files(stage)
+            state_dict = self.read_stage_weights(stage, files)
+            expected = set(stage.state_dict().keys())
+            state_dict = {
+                name: tensor.to(dtype) for name, tensor in state_dict.items() if name in expected
             }
+            missing = expected - set(state_dict)
+            if missing:
+                raise ValueError(f"Checkpoint is missing weights for this stage: {sorted(missing)}")
+            stage.load_state_dict(state_dict, assign=True)
+            del state_dict
 
-            # Load model with optimizations
-            model = AutoModelForCausalLM.from_pretrained(
-                self.config['model_name'],
-                **model_args
+            if use_gpu:
+                stage = stage.cuda()
+                self.compute_dtype = dtype
+            else:
+                precision = self.config['node_config'].get('precision', 'fp32')
+                stage = apply_precision(stage, precision)
+                self.compute_dtype = compute_dtype(precision)
+            stage.eval()
+            self.record_startup_phase('weights')
+            logger.info(
+                f"Stage loaded successfully on {'GPU' if use_gpu else 'CPU'} "
+                f"(layers {stage.start_layer}-{stage.end_layer}, "
+                f"first={stage.is_first}, last={stage.is_last}, "
+                f"{len(files)} checkpoint file(s), "
+                f"precision {self.config['node_config'].get('precision', 'fp32')})"
             )
-            model.eval()
-            logger.info(f"Model loaded successfully on {'GPU' if use_gpu else 'CPU'}")
-            return model
+            return stage
                 
         except Exception as e:
             logger.error(f"Failed to load model: {str(e)}")
             raise
 
-    async def process(self, request, context):
-        """Process input through this node's portion of the model."""
-        start_time = time.time()
+    def load_draft_model(self):
+        """Load the optional draft model that proposes tokens for speculative decoding.
+
+        ``draft_model`` in the node config is either a model name or path, or a
+        dict of GPT-2 config overrides for a randomly initialized draft (handy
+        for tests). The draft runs whole on this node, at the node's precision,
+        and must share the target model's vocabulary.
+        """
+        draft = self.config['node_config'].get('draft_model')
+        if not draft:
+            return None
         try:
-            logger.info(f"Node {self.config['node_config']['id']} received input: {list(request.data)}")
+            if isinstance(draft, dict):
+                model = GPT2LMHeadModel(GPT2Config(**{'vocab_size': self.model_config.vocab_size, **draft}))
+            else:
+                model = AutoModelForCausalLM.from_pretrained(draft, torch_dtype=torch.float32)
+            if model.config.vocab_size != self.model_config.vocab_size:
+                raise ValueError(
+                    f"Draft vocabulary size {model.config.vocab_size} does not match "
+                    f"the target's {self.model_config.vocab_size}"
+                )
+            
+            model = apply_precision(model, self.config['node_config'].get('precision', 'fp32'))
+            model.eval()
+            self.record_startup_phase('draft')
+            logger.info(
+                f"Draft model loaded ({model.config.n_layer} layers, "
+                f"{sum(p.numel() for p in model.parameters()) / 1e6:.1f}M parameters)"
+            )
+            return model
+        
+        except Exception as e:
+            logger.error(f"Failed to load draft model: {str(e)}")
+            raise
+
+    def build_logits_processor(self, params: dict, input_length: int) -> LogitsProcessorList:
+        """Build the logits processors for the request's generation settings.
+
+        Processors left at their neutral values are skipped, so plain greedy
+        decoding ends up with an empty list.
+        """
+        stop_token_ids = [self.model.config.eos_token_id] + params.get('stop_token_ids', [])
+        processors = LogitsProcessorList()
+        if params.get('min_new_tokens', 0) > 0:
+            processors.append(MinNewTokensLengthLogitsProcessor(
+                input_length, params['min_new_tokens'], stop_token_ids
+            ))
+        if params.get('repetition_penalty', 1.0) != 1.0:
+            processors.append(RepetitionPenaltyLogitsProcessor(params['repetition_penalty']))
+        if params.get('no_repeat_ngram_size', 0) > 0:
+            processors.append(NoRepeatNGramLogitsProcessor(params['no_repeat_ngram_size']))
+        if params.get('strategy') == 'sample':
+            if params.get('temperature', 1.0) != 1.0:
+                processors.append(TemperatureLogitsWarper(params['temperature']))
+            if params.get('top_k', 0) > 0:
+                processors.append(TopKLogitsWarper(params['top_k']))
+            if params.get('top_p', 1.0) < 1.0:
+                processors.append(TopPLogitsWarper(params['top_p']))
+        return processors
+
+    def select_next_token(self, logits: torch.Tensor, request, tokens: list):
+        """Turn the last stage's logits into the response for the request's strategy.
+
+        Greedy and sampling return the chosen token and whether generation
+        finished; beam search returns the top candidates with their
+        log-probabilities and leaves the beam bookkeeping to the coordinator.
+        """
+        params = json.loads(request.metadata.get('generation', '{}'))
+        strategy = params.get('strategy', 'greedy')
+        logits = logits.float()
+        eos_token_id = self.model.config.eos_token_id
+        input_length = int(request.metadata.get('input_length', len(tokens)))
+        
+        processors = self.build_logits_processor(params, input_length)
+        if processors:
+            input_ids = torch.tensor([tokens], dtype=torch.long, device=logits.device)
+            logits = processors(input_ids, logits)
+        
+        if strategy == 'beam':
+            logprobs = torch.log_softmax(logits.float(), dim=-1)
+            scores, tokens = torch.topk(logprobs[0], 2 * params['num_beams'])
+            return model_service_pb2.ModelOutput(
+                data=tokens.tolist(),
+                scores=scores.tolist(),
+                metadata={'eos_token_id': str(eos_token_id)}
+            )
+        
+        if strategy == 'sample':
+            probs = torch.softmax(logits, dim=-1)
+            next_token = int(torch.multinomial(probs, num_samples=1)[0, 0])
+        else:
+            next_token = int(torch.argmax(logits, dim=-1)[0])
+        
+        finished = next_token == eos_token_id or next_token in params.get('stop_token_ids', [])
+        return model_service_pb2.ModelOutput(
+            data=[next_token],
+            metadata={'finished': str(finished).lower()}
+        )
+
+    def verify_draft_tokens(self, logits: torch.Tensor, request, tokens: list):
+        """Accept the longest run of draft tokens the target model agrees with.
+
+        ``tokens`` ends with ``k`` draft tokens and ``logits`` holds the
+        target's predictions for the last ``k + 1`` positions. Each draft token
+        is accepted while it matches the target's greedy choice; the target's
+        own token at the first mismatch (or after the last draft token) is
+        always added, so every step yields at least one token and the output is
+        identical to plain greedy decoding.
+        """
+        params = json.loads(request.metadata.get('generation', '{}'))
+        logits = logits.float()
+        num_draft = logits.shape[0] - 1
+        committed = len(tokens) - num_draft
+        stop_token_ids = {self.model.config.eos_token_id, *params.get('stop_token_ids', [])}
+        input_length = int(request.metadata.get('input_length', committed))
+        processors = self.build_logits_processor(params, input_length)
+        
+        accepted, num_accepted, finished = [], 0, False
+        for j in range(num_draft + 1):
+            position_logits = logits[j:j + 1]
+            if processors:
+                input_ids = torch.tensor([tokens[:committed + j]], dtype=torch.long, device=logits.device)
+                position_logits = processors(input_ids, position_logits)
+            target_token = int(torch.argmax(position_logits, dim=-1)[0])
+            accepted.append(target_token)
+            matched = j < num_draft and target_token == tokens[committed + j]
+            num_accepted += int(matched)
+            if target_token in stop_token_ids:
+                finished = True
+                break
+            if not matched:
+                break
+        
+        node_id = self.config['node_config']['id']
+        DRAFT_VERIFICATIONS.labels(node_id=node_id, result='accepted').inc(num_accepted)
+        DRAFT_VERIFICATIONS.labels(node_id=node_id, result='rejected').inc(num_draft - num_accepted)
+        return model_service_pb2.ModelOutput(
+            data=accepted,
+            metadata={
+                'finished': str(finished).lower(),
+                'accepted_draft_tokens': str(num_accepted)
+            }
+        )
+
+    def run_batch(self, items: list) -> list:
+        """Run this node's stage on a batch of requests. Called from an inference worker thread.
+
+        Each item is a ``(request, session)`` pair. A row continuing a session
+        (``session_offset`` > 0) carries only the tokens and activations added
+        after ``session_offset`` and reuses the session's key/values for the
+        rest; any other row reuses the longest cached prefix of its tokens.
+        Only the remaining suffix is computed. Past and new positions are both
+        left-padded, so every row's real tokens end at the same index, and the
+        outputs are un-padded per request. Requests carrying draft tokens get
+        logits for each draft position on the last stage.
+        """
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        config = self.model.config
+        requests = [request for request, _ in items]
+        session_ids = [request.metadata.get('session_id') for request in requests]
+        offsets = [int(request.metadata.get('session_offset', '0')) for request in requests]
+        use_cache = self.prefix_cache.enabled or any(session_ids)
+        
+        # Grad mode is thread-local, so it has to be disabled on the worker thread
+        with torch.no_grad():
+            tokens = [request_tokens(request) for request in requests]
+            # Session rows only carry the new tokens; the session holds the ones before them
+            full_tokens = [
+                session['tokens'][:offset] + row if offset else row
+                for row, (_, session), offset in zip(tokens, items, offsets)
+            ]
+            if self.model.is_first:
+                lengths = [len(row) for row in full_tokens]
+                inputs = None
+            else:
+                inputs = [decode_hidden_states(request.hidden_states)[0] for request in requests]
+                lengths = [row.shape[0] + offset for row, offset in zip(inputs, offsets)]
             
-            # Convert input to tensor
-            input_data = torch.tensor([request.data], dtype=torch.long)
-            attention_mask = torch.ones_like(input_data)
-            input_length = len(request.data)
+            num_logits = [
+                int(request.metadata.get('draft_tokens', '0')) + 1 if self.model.is_last else 1
+                for request in requests
+            ]
+            max_logits = max(num_logits)
             
-            with torch.no_grad():
-                if torch.cuda.is_available():
-                    input_data = input_data.cuda()
-                    attention_mask = attention_mask.cuda()
-                
-                # Adjust generation parameters based on node position
-                is_first_node = self.config['node_config']['id'] == 'node1'
-                is_last_node = self.config['node_config']['id'] == 'node3'
-                
-                # Configure generation parameters
-                generation_params = {
-                    'input_ids': input_data,
-                    'attention_mask': attention_mask,
-                    'num_beams': 5,
-                    'do_sample': True,
-                    'top_k': 40,
-                    'top_p': 0.95,
-                    'temperature': 0.8,
-                    'pad_token_id': self.model.config.eos_token_id,
-                    'repetition_penalty': 1.3,
-                    'length_penalty': 1.2,
-                    'early_stopping': True,
-                }
-                
-                # Adjust parameters based on node position
-                if is_first_node:
-                    # First node generates a longer main response
-                    generation_params.update({
-                        'max_length': input_length + 30,
-                        'min_length': input_length + 15,
-                        'no_repeat_ngram_size': 3,
-                    })
-                elif is_last_node:
-                    # Last node adds a proper conclusion
-                    generation_params.update({
-                        'max_length': input_length + 10,
-                        'min_length': input_length + 3,
-                        'no_repeat_ngram_size': 2,
-                    })
+            # Downstream stages can only key the cache when they know the tokens
+            cacheable = [
+                self.prefix_cache.enabled and not offset and len(row) == length
+                for row, length, offset in zip(tokens, lengths, offsets)
+            ]
+            hits = []
+            for (_, session), row, ok, n, offset in zip(items, tokens, cacheable, num_logits, offsets):
+                if offset:
+                    hits.append((session, offset))
+                elif ok:
+                    hits.append(self.prefix_cache.lookup(row, max_length=len(row) - n))
                 else:
-                    # Middle node continues the thought
-                    generation_params.update({
-                        'max_length': input_length + 15,
-                        'min_length': input_length + 5,
-                        'no_repeat_ngram_size': 2,
-                    })
-                
-                # Generate text
-                outputs = self.model.generate(**generation_params)
-                
-                # Get only the new tokens
-                output_sequence = outputs[0, input_length:].cpu().tolist()
+                    hits.append((None, 0))
+            past_lengths = [length for _, length in hits]
+            new_lengths = [length - past for length, past in zip(lengths, past_lengths)]
+            batch_size, max_past, max_new = len(requests), max(past_lengths), max(new_lengths)
+            
+            attention_mask = None
+            if any(past != max_past for past in past_lengths) or \
+                    any(new != max_new for new in new_lengths):
+                attention_mask = torch.zeros(
+                    batch_size, max_past + max_new, dtype=torch.long, device=device
+                )
+                for i, (past, new) in enumerate(zip(past_lengths, new_lengths)):
+                    attention_mask[i, max_past - past:max_past] = 1
+                    attention_mask[i, max_past + max_new - new:] = 1
+            
+            past_key_values = None
+            if max_past:
+                head_dim = config.n_embd // config.n_head
+                past_key_values = []
+                for layer in range(len(self.model.h)):
+                    keys = torch.zeros(
+                        batch_size, config.n_head, max_past, head_dim,
+                        dtype=self.compute_dtype, device=device
+                    )
+                    values = torch.zeros_like(keys)
+                    for i, (hit, past) in enumerate(hits):
+                        if hit:
+                            keys[i, :, max_past - past:] = hit['past'][layer][0][:, :past]
+                            values[i, :, max_past - past:] = hit['past'][layer][1][:, :past]
+                    past_key_values.append((keys, values))
+            
+            if self.model.is_first:
+                input_ids = torch.full(
+                    (batch_size, max_new), config.eos_token_id, dtype=torch.long, device=device
+                )
+                position_ids = torch.zeros_like(input_ids)
+                for i, (row, past, new) in enumerate(zip(full_tokens, past_lengths, new_lengths)):
+                    input_ids[i, max_new - new:] = torch.tensor(row[past:], dtype=torch.long)
+                    position_ids[i, max_new - new:] = torch.arange(past, past + new)
+                outputs = self.model(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    position_ids=position_ids,
+                    past_key_values=past_key_values,
+                    use_cache=use_cache,
+                    num_logits=max_logits
+                )
+            else:
+                hidden_states = torch.zeros(
+                    batch_size, max_new, config.n_embd, dtype=self.compute_dtype, device=device
+                )
+                # Session rows only carry activations from their offset on
+                for i, (row, past, new) in enumerate(zip(inputs, past_lengths, new_lengths)):
+                    hidden_states[i, max_new - new:] = row[past - offsets[i]:]
+                outputs = self.model(
+                    hidden_states=hidden_states,
+                    attention_mask=attention_mask,
+                    past_key_values=past_key_values,
+                    use_cache=use_cache,
+                    num_logits=max_logits
+                )
+            output, presents = outputs if use_cache else (outputs, None)
+            
+            responses = []
+            for i, request in enumerate(requests):
+                past, new, hit = past_lengths[i], new_lengths[i], hits[i][0]
+                stage_output = None
+                if not self.model.is_last:
+                    stage_output = output[i, max_new - new:]
+                    # Session rows only pass on the new positions; the next stage has the rest
+                    if hit and not offsets[i]:
+                        stage_output = torch.cat([hit['hidden_states'][:past], stage_output])
                 
-                logger.info(f"Node {self.config['node_config']['id']} generated new tokens: {output_sequence}")
+                row_past = None
+                if cacheable[i] or session_ids[i]:
+                    total = max_past + max_new
+                    row_past = [
+                        (
+                            torch.cat([key[i, :, max_past - past:max_past], key[i, :, total - new:]], dim=1),
+                            torch.cat([value[i, :, max_past - past:max_past], value[i, :, total - new:]], dim=1)
+                        )
+                        for key, value in presents
+                    ]
+                if session_ids[i] and request.metadata.get('session_close') == 'true':
+                    # The generation ends with this step, so its state is not kept
+                    self.drop_session(session_ids[i])
+                elif session_ids[i]:
+                    self.sessions.put(session_ids[i], full_tokens[i], row_past)
                 
-                # Update metrics
-                inference_time = time.time() - start_time
-                INFERENCE_LATENCY.labels(
-                    node_id=self.config['node_config']['id']
-                ).observe(inference_time)
+                if cacheable[i]:
+                    self.prefix_cache.insert(
+                        tokens[i],
+                        row_past,
+                        stage_output.clone() if stage_output is not None else None,
+                        transient=request.metadata.get('step', '0') != '0',
+                        replaces=hit
+                    )
                 
+                if self.model.is_last and num_logits[i] > 1:
+                    responses.append(self.verify_draft_tokens(
+                        output[i, max_logits - num_logits[i]:], request, full_tokens[i]
+                    ))
+                elif self.model.is_last:
+                    logits = output[i:i + 1] if max_logits == 1 else output[i, -1:]
+                    responses.append(self.select_next_token(logits, request, full_tokens[i]))
+                else:
+                    responses.append(model_service_pb2.ModelOutput(
+                        hidden_states=encode_hidden_states(
+                            stage_output.unsqueeze(0),
+                            self.config['node_config'].get('activation_dtype', 'float32')
+                        )
+                    ))
+            return responses
+
+    async def process(self, request, context):
+        """Run this node's stage of the pipeline on the incoming tokens or activations."""
+        start_time = time.time()
+        try:
+            if not self.model.is_first and (
+                not request.HasField('hidden_states')
+                or len(request.hidden_states.shape) != 3
+                or request.hidden_states.shape[0] != 1
+                or request.hidden_states.dtype not in WIRE_DTYPES
+            ):
+                raise ValueError("Expected [1, seq, hidden] hidden states from the previous stage")
+            sequence_length = (
+                request.tokens.shape[0] if request.HasField('tokens') else len(request.data)
+            )
+            if not 0 <= int(request.metadata.get('draft_tokens', '0')) < sequence_length:
+                raise ValueError("draft_tokens must be less than the sequence length")
+            
+            session = None
+            offset = int(request.metadata.get('session_offset', '0'))
+            if offset:
+                if not request.metadata.get('session_id') or offset < 0:
+                    raise ValueError("session_offset needs a session_id and must not be negative")
+                if not self.model.is_first and request.hidden_states.shape[1] != sequence_length:
+                    raise ValueError("Session steps must carry activations for exactly the new tokens")
+                session = self.sessions.get(request.metadata['session_id'])
+                if session is None or session['length'] < offset:
+                    # The coordinator answers this by resending the full sequence
+                    context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+                    context.set_details(f"Unknown session {request.metadata['session_id']} at offset {offset}")
+                    return model_service_pb2.ModelOutput()
+            
+            # Chained steps list the downstream stages this node's output goes to next
+            route = json.loads(request.metadata['route']) if 'route' in request.metadata else None
+            if route and self.model.is_last:
+                raise ValueError("The last stage cannot forward to further stages")
+            
+            # The caller's deadline arrives with the RPC; don't queue work it can no longer use
+            remaining = context.time_remaining()
+            if remaining is not None and remaining <= 0:
                 INFERENCE_REQUESTS.labels(
                     node_id=self.config['node_config']['id'],
-                    status='success'
+                    status='deadline_exceeded'
                 ).inc()
-                
-                self.update_memory_metrics()
-                
-                # Return combined sequence
-                combined_sequence = list(request.data) + output_sequence
-                return model_service_pb2.ModelOutput(data=combined_sequence)
+                context.set_code(grpc.StatusCode.DEADLINE_EXCEEDED)
+                context.set_details("Deadline passed before the request was queued")
+                return model_service_pb2.ModelOutput()
+            
+            response = await self.executor.submit((request, session))
+            
+            # Update metrics
+            inference_time = time.time() - start_time
+            if route is not None:
+                hops = [{'node_id': self.config['node_config']['id'], 'compute_ms': inference_time * 1000}]
+                if route:
+                    forward_start_time = time.time()
+                    response, downstream_hops = await self.forward(request, response, route, context)
+                    hops[0]['forward_ms'] = (time.time() - forward_start_time) * 1000
+                    hops.extend(downstream_hops)
+                context.set_trailing_metadata((('hop-timings', json.dumps(hops)),))
+            INFERENCE_LATENCY.labels(
+                node_id=self.config['node_config']['id']
+            ).observe(inference_time)
+            
+            INFERENCE_REQUESTS.labels(
+                node_id=self.config['node_config']['id'],
+                status='success'
+            ).inc()
+            
+            self.update_memory_metrics()
+            return response
+        
+        except asyncio.CancelledError:
+            # gRPC cancels the handler when the caller cancels or its deadline passes
+            INFERENCE_REQUESTS.labels(
+                node_id=self.config['node_config']['id'],
+                status='cancelled'
+            ).inc()
+            raise
+        
+        except InferenceQueueFull as e:
+            logger.warning(str(e))
+            INFERENCE_REQUESTS.labels(
+                node_id=self.config['node_config']['id'],
+                status='rejected'
+            ).inc()
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(str(e))
+            return model_service_pb2.ModelOutput()
+        
+        except ForwardError as e:
+            # Relay the failing stage's status so the coordinator reacts as if it called it directly
+            logger.warning(str(e))
+            INFERENCE_REQUESTS.labels(
+                node_id=self.config['node_config']['id'],
+                status='forward_error'
+            ).inc()
+            context.set_code(e.code)
+            context.set_details(e.details)
+            context.set_trailing_metadata((('failed-node', e.node_id),))
+            return model_service_pb2.ModelOutput()
                 
         except Exception as e:
             error_msg = f"Processing failed: {str(e)}"
@@ -281,8 +1458,164 @@ class ModelNode(model_service_pb2_grpc.ModelServiceServicer):
             context.set_details(error_msg)
             return model_service_pb2.ModelOutput()
 
+    def downstream_stub(self, address: str):
+        """Return a stub on the pooled channel to a downstream stage."""
+        if address not in self.downstream:
+            channel = grpc.aio.insecure_channel(
+                address,
+                options=[
+                    ('grpc.max_send_message_length', 50 * 1024 * 1024),
+                    ('grpc.max_receive_message_length', 50 * 1024 * 1024),
+                    ('grpc.keepalive_time_ms', 30000),
+                    ('grpc.keepalive_timeout_ms', 10000)
+                ],
+                compression=grpc_compression(self.config['grpc_compression'])
+            )
+            self.downstream[address] = model_service_pb2_grpc.ModelServiceStub(channel)
+        return self.downstream[address]
+
+    async def forward(self, request, response, route: list, context):
+        """Send this stage's activations to the next stage on ``route`` and return its reply.
+
+        The rest of the route travels with the request, so each stage hands
+        the step on until the last one selects the token. Returns the final
+        response and the per-hop timings reported by the downstream stages.
+        """
+        hop, node_id = route[0], self.config['node_config']['id']
+        forward_input = model_service_pb2.ModelInput(
+            metadata={
+                **request.metadata,
+                'node_id': hop['node_id'],
+                'node_index': str(int(request.metadata.get('node_index', '0')) + 1),
+                'route': json.dumps(route[1:])
+            }
+        )
+        if request.HasField('tokens'):
+            forward_input.tokens.CopyFrom(request.tokens)
+        else:
+            forward_input.data.extend(request.data)
+        forward_input.hidden_states.CopyFrom(response.hidden_states)
+        
+        start_time = time.time()
+        call = self.downstream_stub(hop['address']).process(
+            forward_input, timeout=context.time_remaining()
+        )
+        try:
+            downstream_response = await call
+            trailing = {key: value for key, value in await call.trailing_metadata() or ()}
+        except grpc.aio.AioRpcError as e:
+            # A failure further down the route names the stage it happened at (metadata iterates as key/value pairs)
+            trailing_error = {key: value for key, value in e.trailing_metadata() or ()}
+            failed_node = trailing_error.get('failed-node', hop['node_id'])
+            raise ForwardError(failed_node, e.code(), e.details())
+        finally:
+            FORWARD_LATENCY.labels(node_id=node_id).observe(time.time() - start_time)
+        return downstream_response, json.loads(trailing.get('hop-timings', '[]'))
+
+    def propose_draft_tokens(self, tokens: list, num_tokens: int, params: dict, input_length: int,
+                             session_id: str = None) -> list:
+        """Greedily continue ``tokens`` with the draft model. Called from an inference worker thread.
+
+        With a ``session_id`` the draft model's key/values are kept in the
+        session store between steps, and a step only runs the tokens after
+        the longest prefix it shares with the previous step's input and
+        proposals: the accepted tokens and the target's own next token.
+        """
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        processors = self.build_logits_processor(params, input_length)
+        sequence = list(tokens)
+        proposed = []
+        
+        past_key_values, reused = None, 0
+        cached = self.sessions.get(draft_session_key(session_id)) if session_id else None
+        if cached is not None:
+            # The last token is always run again, as its logits give the first proposal
+            limit = min(cached['length'], len(sequence) - 1)
+            mismatches = np.flatnonzero(
+                np.asarray(cached['tokens'][:limit]) != np.asarray(sequence[:limit])
+            )
+            reused = int(mismatches[0]) if len(mismatches) else limit
+            if reused:
+                past_key_values = tuple(
+                    (key[:, :, :reused], value[:, :, :reused]) for key, value in cached['past']
+                )
+        node_id = self.config['node_config']['id']
+        DRAFT_CONTEXT_TOKENS.labels(node_id=node_id, source='cached').inc(reused)
+        DRAFT_CONTEXT_TOKENS.labels(node_id=node_id, source='computed').inc(len(sequence) - reused)
+        
+        with torch.no_grad():
+            input_ids = torch.tensor([sequence[reused:]], dtype=torch.long, device=device)
+            for _ in range(num_tokens):
+                outputs = self.draft_model(
+                    input_ids=input_ids, past_key_values=past_key_values, use_cache=True
+                )
+                past_key_values = outputs.past_key_values
+                logits = outputs.logits[:, -1, :].float()
+                if processors:
+                    logits = processors(
+                        torch.tensor([sequence], dtype=torch.long, device=device), logits
+                    )
+                next_token = int(torch.argmax(logits, dim=-1)[0])
+                proposed.append(next_token)
+                sequence.append(next_token)
+                input_ids = torch.tensor([[next_token]], dtype=torch.long, device=device)
+        if session_id:
+            # The last proposal was never run, so the key/values cover every token before it
+            self.sessions.put(draft_session_key(session_id), sequence[:-1], past_key_values)
+        return proposed
+
+    async def draft(self, request, context):
+        """Propose the next ``num_draft_tokens`` tokens with this node's draft model.
+
+        Drafting shares the node's inference thread pool with the pipeline
+        stage so the node never runs more model threads than configured.
+        """
+        start_time = time.time()
+        node_id = self.config['node_config']['id']
+        if self.draft_model is None:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details(f"Node {node_id} has no draft model configured")
+            return model_service_pb2.ModelOutput()
+        try:
+            tokens = request_tokens(request)
+            num_tokens = int(request.metadata.get('num_draft_tokens', '0'))
+            if not tokens or num_tokens < 1:
+                raise ValueError("Expected tokens and a positive num_draft_tokens")
+            params = json.loads(request.metadata.get('generation', '{}'))
+            input_length = int(request.metadata.get('input_length', len(tokens)))
+            
+            proposed = await asyncio.get_running_loop().run_in_executor(
+                self.executor.pool, self.propose_draft_tokens,
+                tokens, num_tokens, params, input_length, request.metadata.get('session_id')
+            )
+            DRAFT_LATENCY.labels(node_id=node_id).observe(time.time() - start_time)
+            return model_service_pb2.ModelOutput(data=proposed)
+        
+        except Exception as e:
+            error_msg = f"Drafting failed: {str(e)}"
+            logger.error(error_msg)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(error_msg)
+            return model_service_pb2.ModelOutput()
+
+    def drop_session(self, session_id: str):
+        """Drop a generation session's stage and draft model key/values, whichever are held."""
+        self.sessions.close(session_id)
+        self.sessions.close(draft_session_key(session_id))
+
+    async def close_session(self, request, context):
+        """Drop the generation session named in the request metadata, if held."""
+        session_id = request.metadata.get('session_id', '')
+        if session_id:
+            self.drop_session(session_id)
+        return model_service_pb2.ModelOutput()
+
     async def health_check(self, request, context):
-        """Implement health check."""
+        """Implement health check.
+
+        Runs on the event loop and never waits on the inference queue, so it
+        stays responsive while workers are busy.
+        """
         try:
             # Verify model is loaded
             if not hasattr(self, 'model'):
@@ -299,7 +1632,11 @@ class ModelNode(model_service_pb2_grpc.ModelServiceServicer):
             # Update memory metrics
             self.update_memory_metrics()
             
-            status = f"OK (Running on {device_info}{memory_info})"
+            queue_info = (
+                f", Queue: {self.executor.queue.qsize()}/{self.executor.queue.maxsize}"
+                f", Busy workers: {self.executor.busy}/{self.executor.num_workers}"
+            )
+            status = f"OK (Running on {device_info}{memory_info}{queue_info})"
             return model_service_pb2.HealthCheckResponse(status=status)
                 
         except Exception as e:
@@ -307,28 +1644,35 @@ class ModelNode(model_service_pb2_grpc.ModelServiceServicer):
             logger.error(error_msg)
             return model_service_pb2.HealthCheckResponse(status=f"ERROR: {str(e)}")
 
-async def serve(config_path: str, node_id: str):
+async def serve(config_path: str, node_id: str, port: int = None, metrics_port: int = 8001):
     """Start the node server."""
     try:
-        # Get node port from config
+        # Get node port from config unless overridden (e.g. for a replica on a shared host)
         with open(config_path, 'r') as f:
             config = json.load(f)
             node_config = next(node for node in config['nodes'] if node['id'] == node_id)
-            port = int(node_config['address'].split(':')[-1])
+            if port is None:
+                port = int(node_config['address'].split(':')[-1])
         
+        # Handlers are coroutines; inference runs on the node's own executor
         server = grpc.aio.server(
-            futures.ThreadPoolExecutor(max_workers=10),
             options=[
                 ('grpc.max_send_message_length', 50 * 1024 * 1024),
                 ('grpc.max_receive_message_length', 50 * 1024 * 1024)
-            ]
+            ],
+            compression=grpc_compression(config.get('grpc_compression', 'none'))
         )
-        node = ModelNode(config_path, node_id)
+        node = ModelNode(config_path, node_id, metrics_port)
+        node.executor.start()
         model_service_pb2_grpc.add_ModelServiceServicer_to_server(node, server)
         server.add_insecure_port(f'[::]:{port}')
         logger.info(f"Starting node server {node_id} on port {port}")
         await server.start()
-        await server.wait_for_termination()
+        node.report_startup()
+        try:
+            await server.wait_for_termination()
+        finally:
+            await node.executor.stop()
     except Exception as e:
         logger.error("Failed to start server: %s", str(e))
         raise
@@ -338,6 +1682,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', required=True, help='Path to configuration file')
     parser.add_argument('--node-id', required=True, help='ID of this node from config')
+    parser.add_argument('--port', type=int, help='Port to listen on instead of the one in the node address')
+    parser.add_argument('--metrics-port', type=int, default=8001, help='Port for Prometheus metrics')
     args = parser.parse_args()
     
-    asyncio.run(serve(args.config, args.node_id))
\ No newline at end of file
+    asyncio.run(serve(args.config, args.node_id, args.port, args.metrics_port))
\ No newline at end of file
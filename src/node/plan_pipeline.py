@@ -0,0 +1,115 @@
+"""Assign contiguous layer ranges to pipeline stages from a measured layer profile.
+
+Reads the per-layer latency and weight size written by profile_layers.py
+and the nodes in config.json, and picks the split that minimizes the
+slowest stage's latency (the pipeline's throughput bottleneck). Every stage
+gets at least one layer, the first stage also pays for the embeddings and
+the last for the LM head, and a stage's weights must fit in its node's
+``memory_budget_mb`` minus its ``prefix_cache_mb`` and ``session_cache_mb``. A node's optional
+``relative_speed`` scales its measured latency.
+
+With ``--write`` the ranges are stored as ``layers`` on each node in the
+config, which both the coordinator and the nodes read at startup.
+
+Usage:
+    python src/node/plan_pipeline.py --config src/config/config.json --profile profile.json --write
+"""
+import json
+import argparse
+
+def stage_cost(profile: dict, phase: str, start: int, end: int, is_first: bool, is_last: bool):
+    """Return the latency in ms and weight bytes of a stage owning layers [start, end)."""
+    key = f'{phase}_ms'
+    layers = profile['layers'][start:end]
+    latency = sum(layer[key] for layer in layers)
+    size = sum(layer['bytes'] for layer in layers)
+    if is_first:
+        latency += profile['embedding'][key]
+        size += profile['embedding']['bytes']
+    if is_last:
+        latency += profile['head'][key]
+        size += profile['head']['bytes']
+    return latency, size
+
+def plan_stages(profile: dict, nodes: list, phase: str = 'decode') -> list:
+    """Return the ``(start, end)`` range for each node that minimizes the slowest stage.
+
+    Dynamic programming over (stage, layers assigned so far); raises
+    ValueError when no split fits the memory budgets.
+    """
+    num_layers, num_stages = len(profile['layers']), len(nodes)
+    if num_stages > num_layers:
+        raise ValueError(f"Cannot split {num_layers} layers across {num_stages} stages")
+
+    budgets = []
+    for node in nodes:
+        if 'memory_budget_mb' in node:
+            available = (
+                node['memory_budget_mb'] - node.get('prefix_cache_mb', 256)
+                - node.get('session_cache_mb', 256)
+            )
+            budgets.append(available * 1024 * 1024)
+        else:
+            budgets.append(None)
+
+    inf = float('inf')
+    # best[s][j]: lowest bottleneck latency placing layers [0, j) on stages [0, s]
+    best = [[inf] * (num_layers + 1) for _ in range(num_stages)]
+    split = [[None] * (num_layers + 1) for _ in range(num_stages)]
+    for s, node in enumerate(nodes):
+        speed = node.get('relative_speed', 1.0)
+        for end in range(s + 1, num_layers - (num_stages - s - 1) + 1):
+            for start in range(s, end):
+                previous = best[s - 1][start] if s else (0.0 if start == 0 else inf)
+                if previous == inf:
+                    continue
+                latency, size = stage_cost(profile, phase, start, end, s == 0, s == num_stages - 1)
+                if budgets[s] is not None and size > budgets[s]:
+                    continue
+                bottleneck = max(previous, latency / speed)
+                if bottleneck < best[s][end]:
+                    best[s][end] = bottleneck
+                    split[s][end] = start
+
+    if best[-1][num_layers] == inf:
+        raise ValueError("No layer assignment fits the nodes' memory budgets")
+
+    ranges, end = [], num_layers
+    for s in range(num_stages - 1, -1, -1):
+        start = split[s][end]
+        ranges.append((start, end))
+        end = start
+    return ranges[::-1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--config', required=True, help='Path to config.json')
+    parser.add_argument('--profile', required=True, help='Profile written by profile_layers.py')
+    parser.add_argument('--phase', choices=('decode', 'prefill'), default='decode',
+                        help='Which measured latency to balance (generation is dominated by decode)')
+    parser.add_argument('--write', action='store_true', help='Store the plan in the config file')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    with open(args.profile, 'r') as f:
+        profile = json.load(f)
+
+    nodes = sorted(config['nodes'], key=lambda node: node['model_part'])
+    ranges = plan_stages(profile, nodes, args.phase)
+
+    print(f"{'node':<10} {'layers':>10} {'latency_ms':>12} {'weights_mb':>12}")
+    for s, (node, (start, end)) in enumerate(zip(nodes, ranges)):
+        latency, size = stage_cost(profile, args.phase, start, end, s == 0, s == len(nodes) - 1)
+        latency /= node.get('relative_speed', 1.0)
+        print(f"{node['id']:<10} {f'{start}-{end}':>10} {latency:>12.3f} {size / (1024 ** 2):>12.1f}")
+        node['layers'] = [start, end]
+
+    if args.write:
+        with open(args.config, 'w') as f:
+            json.dump(config, f, indent=4)
+            f.write('\n')
+        print(f"Wrote layer plan to {args.config}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Profile the per-layer cost of a GPT-2 style model on the local machine.
+
+Times the embeddings, every transformer block and the LM head separately,
+for a prefill of ``--seq-len`` tokens and for a single decode step on top of
+that prefix, and measures the serialized weight size of each part at the
+chosen precision. The JSON output feeds plan_pipeline.py.
+
+Usage:
+    python src/node/profile_layers.py --model gpt2 --precision fp32 --output profile.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import torch
+from transformers import AutoModelForCausalLM
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from node_server import PRECISIONS, apply_precision
+
+def measure_ms(fn, repeats: int) -> float:
+    """Return the mean wall time of ``fn`` in milliseconds, after one warm-up call."""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def module_bytes(*modules) -> int:
+    """Return the serialized size of the modules' weights, which also covers quantized layers."""
+    buffer = io.BytesIO()
+    torch.save([module.state_dict() for module in modules], buffer)
+    return buffer.tell()
+
+def profile(args) -> dict:
+    torch.manual_seed(0)
+    torch.set_num_threads(args.threads or torch.get_num_threads())
+    model = AutoModelForCausalLM.from_pretrained(args.model, torch_dtype=torch.float32)
+    model = apply_precision(model, args.precision).eval()
+    transformer = model.transformer
+    dtype = torch.bfloat16 if args.precision == 'bf16' else torch.float32
+
+    input_ids = torch.randint(
+        0, model.config.vocab_size, (args.batch_size, args.seq_len), dtype=torch.long
+    )
+    next_ids = input_ids[:, -1:]
+    positions = torch.arange(args.seq_len, dtype=torch.long).unsqueeze(0)
+    next_position = torch.tensor([[args.seq_len]], dtype=torch.long)
+
+    with torch.no_grad():
+        embedding = {
+            'prefill_ms': measure_ms(
+                lambda: transformer.wte(input_ids) + transformer.wpe(positions), args.repeats
+            ),
+            'decode_ms': measure_ms(
+                lambda: transformer.wte(next_ids) + transformer.wpe(next_position), args.repeats
+            ),
+            'bytes': module_bytes(transformer.wte, transformer.wpe)
+        }
+
+        hidden_states = (transformer.wte(input_ids) + transformer.wpe(positions)).to(dtype)
+        step_states = hidden_states[:, -1:]
+        layers = []
+        for index, block in enumerate(transformer.h):
+            outputs = block(hidden_states, use_cache=True)
+            past = outputs[1]
+            layers.append({
+                'index': index,
+                'prefill_ms': measure_ms(lambda: block(hidden_states), args.repeats),
+                'decode_ms': measure_ms(
+                    lambda: block(step_states, layer_past=past, use_cache=True), args.repeats
+                ),
+                'bytes': module_bytes(block)
+            })
+            hidden_states = outputs[0]
+
+        head = {
+            'prefill_ms': measure_ms(
+                lambda: model.lm_head(transformer.ln_f(hidden_states)[:, -1, :]), args.repeats
+            ),
+            'bytes': module_bytes(transformer.ln_f, model.lm_head)
+        }
+        # The head only ever scores the last position, so both phases cost the same
+        head['decode_ms'] = head['prefill_ms']
+
+    return {
+        'model_name': args.model,
+        'precision': args.precision,
+        'seq_len': args.seq_len,
+        'batch_size': args.batch_size,
+        'threads': torch.get_num_threads(),
+        'embedding': embedding,
+        'layers': layers,
+        'head': head
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='gpt2', help='Model name or path')
+    parser.add_argument('--precision', default='fp32', choices=PRECISIONS)
+    parser.add_argument('--seq-len', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--threads', type=int, help='Torch threads (defaults to torch\'s own choice)')
+    parser.add_argument('--output', help='Write the profile to this JSON file instead of stdout')
+    args = parser.parse_args()
+
+    result = profile(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Wrote profile of {len(result['layers'])} layers to {args.output}")
+    else:
+        print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark model service payload serialization cost against sequence length.
+
+Compares token ids sent as ``repeated int32 data`` with the packed ``Tensor``
+payload, and hidden states packed as float32 or float16, with and without
+gzip (what ``grpc_compression: gzip`` applies on the wire). Each row reports
+the serialized size and the time to encode, serialize, parse and decode one
+message on the receiving side.
+
+Usage:
+    python src/proto/benchmark_payload.py --lengths 16 64 256 1024 --hidden-size 768
+"""
+import os
+import sys
+import gzip
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import model_service_pb2
+from tensor_codec import decode_array, decode_tokens, encode_array, encode_tokens
+
+def measure(roundtrip, repeats: int) -> float:
+    """Return the mean wall time of ``roundtrip`` in microseconds."""
+    roundtrip()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        roundtrip()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+def token_cases(tokens: np.ndarray):
+    token_list = tokens.tolist()
+
+    def legacy():
+        payload = model_service_pb2.ModelInput(data=token_list).SerializeToString()
+        return payload, lambda: list(model_service_pb2.ModelInput.FromString(payload).data)
+
+    def packed():
+        payload = model_service_pb2.ModelInput(tokens=encode_tokens(tokens)).SerializeToString()
+        return payload, lambda: decode_tokens(model_service_pb2.ModelInput.FromString(payload).tokens)
+
+    return {'tokens repeated int32': legacy, 'tokens packed int32': packed}
+
+def hidden_cases(hidden: np.ndarray):
+    def packed(dtype, compress):
+        def build():
+            payload = model_service_pb2.ModelInput(
+                hidden_states=encode_array(hidden.astype(dtype))
+            ).SerializeToString()
+            if compress:
+                payload = gzip.compress(payload)
+
+            def receive():
+                data = gzip.decompress(payload) if compress else payload
+                return decode_array(model_service_pb2.ModelInput.FromString(data).hidden_states)
+            return payload, receive
+        return build
+
+    return {
+        'hidden packed float32': packed(np.float32, False),
+        'hidden packed float16': packed(np.float16, False),
+        'hidden packed float32+gzip': packed(np.float32, True),
+        'hidden packed float16+gzip': packed(np.float16, True),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[16, 64, 256, 1024])
+    parser.add_argument('--hidden-size', type=int, default=768)
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'payload':<28} {'seq_len':>8} {'bytes':>12} {'roundtrip_us':>14}")
+    for length in args.lengths:
+        tokens = rng.integers(0, 50257, size=length, dtype=np.int32)
+        hidden = rng.standard_normal((1, length, args.hidden_size), dtype=np.float32)
+        cases = {**token_cases(tokens), **hidden_cases(hidden)}
+        for name, build in cases.items():
+            def roundtrip():
+                _, receive = build()
+                receive()
+            payload, _ = build()
+            micros = measure(roundtrip, args.repeats)
+            print(f"{name:<28} {length:>8} {len(payload):>12} {micros:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13model_service.proto\x12\rmodel_service\"\x86\x01\n\nModelInput\x12\x0c\n\x04\x64\x61ta\x18\x01 \x03(\x05\x12\x39\n\x08metadata\x18\x02 \x03(\x0b\x32\'.model_service.ModelInput.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x1b\n\x0bModelOutput\x12\x0c\n\x04\x64\x61ta\x18\x01 \x03(\x05\"\x14\n\x12HealthCheckRequest\"%\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t2\xab\x01\n\x0cModelService\x12\x42\n\x07process\x12\x19.model_service.ModelInput\x1a\x1a.model_service.ModelOutput\"\x00\x12W\n\x0chealth_check\x12!.model_service.HealthCheckRequest\x1a\".model_service.HealthCheckResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13model_service.proto\x12\rmodel_service\"6\n\x06Tensor\x12\x0e\n\x06\x62uffer\x18\x01 \x01(\x0c\x12\r\n\x05\x64type\x18\x02 \x01(\t\x12\r\n\x05shape\x18\x03 \x03(\x03\"\xe7\x01\n\nModelInput\x12\x0c\n\x04\x64\x61ta\x18\x01 \x03(\x05\x12\x39\n\x08metadata\x18\x02 \x03(\x0b\x32\'.model_service.ModelInput.MetadataEntry\x12%\n\x06tokens\x18\x05 \x01(\x0b\x32\x15.model_service.Tensor\x12,\n\rhidden_states\x18\x06 \x01(\x0b\x32\x15.model_service.Tensor\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01J\x04\x08\x03\x10\x04J\x04\x08\x04\x10\x05\"\xd2\x01\n\x0bModelOutput\x12\x0c\n\x04\x64\x61ta\x18\x01 \x03(\x05\x12:\n\x08metadata\x18\x04 \x03(\x0b\x32(.model_service.ModelOutput.MetadataEntry\x12\x0e\n\x06scores\x18\x05 \x03(\x02\x12,\n\rhidden_states\x18\x06 \x01(\x0b\x32\x15.model_service.Tensor\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01J\x04\x08\x02\x10\x03J\x04\x08\x03\x10\x04\"\xac\x01\n\x0fModelBatchInput\x12(\n\x05items\x18\x01 \x03(\x0b\x32\x19.model_service.ModelInput\x12>\n\x08metadata\x18\x02 \x03(\x0b\x32,.model_service.ModelBatchInput.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"=\n\x10ModelBatchOutput\x12)\n\x05items\x18\x01 \x03(\x0b\x32\x1a.model_service.ModelOutput\"\x14\n\x12HealthCheckRequest\"%\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t2\xd8\x03\n\x0cModelService\x12\x42\n\x07process\x12\x19.model_service.ModelInput\x1a\x1a.model_service.ModelOutput\"\x00\x12K\n\x0eprocess_stream\x12\x19.model_service.ModelInput\x1a\x1a.model_service.ModelOutput\"\x00\x30\x01\x12R\n\rprocess_batch\x12\x1e.model_service.ModelBatchInput\x1a\x1f.model_service.ModelBatchOutput\"\x00\x12@\n\x05\x64raft\x12\x19.model_service.ModelInput\x1a\x1a.model_service.ModelOutput\"\x00\x12H\n\rclose_session\x12\x19.model_service.ModelInput\x1a\x1a.model_service.ModelOutput\"\x00\x12W\n\x0chealth_check\x12!.model_service.HealthCheckRequest\x1a\".model_service.HealthCheckResponse\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -22,16 +22,30 @@ if _descriptor._USE_C_DESCRIPTORS == False:
   DESCRIPTOR._options = None
   _MODELINPUT_METADATAENTRY._options = None
   _MODELINPUT_METADATAENTRY._serialized_options = b'8\001'
-  _globals['_MODELINPUT']._serialized_start=39
-  _globals['_MODELINPUT']._serialized_end=173
-  _globals['_MODELINPUT_METADATAENTRY']._serialized_start=126
-  _globals['_MODELINPUT_METADATAENTRY']._serialized_end=173
-  _globals['_MODELOUTPUT']._serialized_start=175
-  _globals['_MODELOUTPUT']._serialized_end=202
-  _globals['_HEALTHCHECKREQUEST']._serialized_start=204
-  _globals['_HEALTHCHECKREQUEST']._serialized_end=224
-  _globals['_HEALTHCHECKRESPONSE']._serialized_start=226
-  _globals['_HEALTHCHECKRESPONSE']._serialized_end=263
-  _globals['_MODELSERVICE']._serialized_start=266
-  _globals['_MODELSERVICE']._serialized_end=437
+  _MODELOUTPUT_METADATAENTRY._options = None
+  _MODELOUTPUT_METADATAENTRY._serialized_options = b'8\001'
+  _MODELBATCHINPUT_METADATAENTRY._options = None
+  _MODELBATCHINPUT_METADATAENTRY._serialized_options = b'8\001'
+  _globals['_TENSOR']._serialized_start=38
+  _globals['_TENSOR']._serialized_end=92
+  _globals['_MODELINPUT']._serialized_start=95
+  _globals['_MODELINPUT']._serialized_end=326
+  _globals['_MODELINPUT_METADATAENTRY']._serialized_start=267
+  _globals['_MODELINPUT_METADATAENTRY']._serialized_end=314
+  _globals['_MODELOUTPUT']._serialized_start=329
+  _globals['_MODELOUTPUT']._serialized_end=539
+  _globals['_MODELOUTPUT_METADATAENTRY']._serialized_start=267
+  _globals['_MODELOUTPUT_METADATAENTRY']._serialized_end=314
+  _globals['_MODELBATCHINPUT']._serialized_start=542
+  _globals['_MODELBATCHINPUT']._serialized_end=714
+  _globals['_MODELBATCHINPUT_METADATAENTRY']._serialized_start=267
+  _globals['_MODELBATCHINPUT_METADATAENTRY']._serialized_end=314
+  _globals['_MODELBATCHOUTPUT']._serialized_start=716
+  _globals['_MODELBATCHOUTPUT']._serialized_end=777
+  _globals['_HEALTHCHECKREQUEST']._serialized_start=779
+  _globals['_HEALTHCHECKREQUEST']._serialized_end=799
+  _globals['_HEALTHCHECKRESPONSE']._serialized_start=801
+  _globals['_HEALTHCHECKRESPONSE']._serialized_end=838
+  _globals['_MODELSERVICE']._serialized_start=841
+  _globals['_MODELSERVICE']._serialized_end=1313
 # @@protoc_insertion_point(module_scope)
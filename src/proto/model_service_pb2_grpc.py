@@ -19,6 +19,26 @@ class ModelServiceStub(object):
                 request_serializer=model__service__pb2.ModelInput.SerializeToString,
                 response_deserializer=model__service__pb2.ModelOutput.FromString,
                 )
+        self.process_stream = channel.unary_stream(
+                '/model_service.ModelService/process_stream',
+                request_serializer=model__service__pb2.ModelInput.SerializeToString,
+                response_deserializer=model__service__pb2.ModelOutput.FromString,
+                )
+        self.process_batch = channel.unary_unary(
+                '/model_service.ModelService/process_batch',
+                request_serializer=model__service__pb2.ModelBatchInput.SerializeToString,
+                response_deserializer=model__service__pb2.ModelBatchOutput.FromString,
+                )
+        self.draft = channel.unary_unary(
+                '/model_service.ModelService/draft',
+                request_serializer=model__service__pb2.ModelInput.SerializeToString,
+                response_deserializer=model__service__pb2.ModelOutput.FromString,
+                )
+        self.close_session = channel.unary_unary(
+                '/model_service.ModelService/close_session',
+                request_serializer=model__service__pb2.ModelInput.SerializeToString,
+                response_deserializer=model__service__pb2.ModelOutput.FromString,
+                )
         self.health_check = channel.unary_unary(
                 '/model_service.ModelService/health_check',
                 request_serializer=model__service__pb2.HealthCheckRequest.SerializeToString,
@@ -36,6 +56,34 @@ class ModelServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def process_stream(self, request, context):
+        """Process input through model, streaming generated tokens as they are produced
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def process_batch(self, request, context):
+        """Generate continuations for many inputs in one call; items fail independently
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def draft(self, request, context):
+        """Propose continuation tokens with the node's draft model (speculative decoding)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def close_session(self, request, context):
+        """Drop the cached state of the generation session named in the metadata's session_id
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def health_check(self, request, context):
         """Health check
         """
@@ -51,6 +99,26 @@ def add_ModelServiceServicer_to_server(servicer, server):
                     request_deserializer=model__service__pb2.ModelInput.FromString,
                     response_serializer=model__service__pb2.ModelOutput.SerializeToString,
             ),
+            'process_stream': grpc.unary_stream_rpc_method_handler(
+                    servicer.process_stream,
+                    request_deserializer=model__service__pb2.ModelInput.FromString,
+                    response_serializer=model__service__pb2.ModelOutput.SerializeToString,
+            ),
+            'process_batch': grpc.unary_unary_rpc_method_handler(
+                    servicer.process_batch,
+                    request_deserializer=model__service__pb2.ModelBatchInput.FromString,
+                    response_serializer=model__service__pb2.ModelBatchOutput.SerializeToString,
+            ),
+            'draft': grpc.unary_unary_rpc_method_handler(
+                    servicer.draft,
+                    request_deserializer=model__service__pb2.ModelInput.FromString,
+                    response_serializer=model__service__pb2.ModelOutput.SerializeToString,
+            ),
+            'close_session': grpc.unary_unary_rpc_method_handler(
+                    servicer.close_session,
+                    request_deserializer=model__service__pb2.ModelInput.FromString,
+                    response_serializer=model__service__pb2.ModelOutput.SerializeToString,
+            ),
             'health_check': grpc.unary_unary_rpc_method_handler(
                     servicer.health_check,
                     request_deserializer=model__service__pb2.HealthCheckRequest.FromString,
@@ -83,6 +151,74 @@ class ModelService(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def process_stream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/model_service.ModelService/process_stream',
+            model__service__pb2.ModelInput.SerializeToString,
+            model__service__pb2.ModelOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def process_batch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/model_service.ModelService/process_batch',
+            model__service__pb2.ModelBatchInput.SerializeToString,
+            model__service__pb2.ModelBatchOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def draft(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/model_service.ModelService/draft',
+            model__service__pb2.ModelInput.SerializeToString,
+            model__service__pb2.ModelOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def close_session(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/model_service.ModelService/close_session',
+            model__service__pb2.ModelInput.SerializeToString,
+            model__service__pb2.ModelOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def health_check(request,
             target,
@@ -0,0 +1,46 @@
+"""Encoding helpers for the packed ``Tensor`` message in model_service.proto.
+
+Arrays travel as one contiguous byte buffer with a dtype/shape header, so a
+payload is copied once when serialized and decoded without copying on the
+receiving side.
+"""
+import grpc
+import numpy as np
+
+import model_service_pb2
+
+COMPRESSION = {
+    'none': grpc.Compression.NoCompression,
+    'gzip': grpc.Compression.Gzip,
+    'deflate': grpc.Compression.Deflate,
+}
+
+def encode_array(array: np.ndarray) -> model_service_pb2.Tensor:
+    """Pack a numpy array into a Tensor message."""
+    array = np.ascontiguousarray(array)
+    return model_service_pb2.Tensor(
+        buffer=array.tobytes(),
+        dtype=array.dtype.name,
+        shape=list(array.shape)
+    )
+
+def decode_array(tensor: model_service_pb2.Tensor) -> np.ndarray:
+    """Return a read-only numpy view over a Tensor message's buffer."""
+    return np.frombuffer(tensor.buffer, dtype=np.dtype(tensor.dtype)).reshape(tuple(tensor.shape))
+
+def encode_tokens(tokens) -> model_service_pb2.Tensor:
+    """Pack a sequence of token ids as a 1-D int32 Tensor."""
+    return encode_array(np.asarray(tokens, dtype=np.int32))
+
+def decode_tokens(tensor: model_service_pb2.Tensor) -> np.ndarray:
+    """Return the token ids in a Tensor message as a read-only int32 array."""
+    if not tensor.buffer:
+        return np.empty(0, dtype=np.int32)
+    return decode_array(tensor).reshape(-1)
+
+def grpc_compression(name: str) -> grpc.Compression:
+    """Map a config value ('none', 'gzip' or 'deflate') to a gRPC compression algorithm."""
+    try:
+        return COMPRESSION[name]
+    except KeyError:
+        raise ValueError(f"Unknown compression '{name}', expected one of {sorted(COMPRESSION)}")
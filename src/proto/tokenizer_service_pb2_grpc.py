@@ -24,6 +24,21 @@ class TokenizerServiceStub(object):
                 request_serializer=tokenizer__service__pb2.TokenInput.SerializeToString,
                 response_deserializer=tokenizer__service__pb2.TextOutput.FromString,
                 )
+        self.process_text_batch = channel.unary_unary(
+                '/tokenizer_service.TokenizerService/process_text_batch',
+                request_serializer=tokenizer__service__pb2.TextBatchInput.SerializeToString,
+                response_deserializer=tokenizer__service__pb2.TokenBatchOutput.FromString,
+                )
+        self.process_tokens_batch = channel.unary_unary(
+                '/tokenizer_service.TokenizerService/process_tokens_batch',
+                request_serializer=tokenizer__service__pb2.TokenBatchInput.SerializeToString,
+                response_deserializer=tokenizer__service__pb2.TextBatchOutput.FromString,
+                )
+        self.decode_stream = channel.stream_stream(
+                '/tokenizer_service.TokenizerService/decode_stream',
+                request_serializer=tokenizer__service__pb2.TokenInput.SerializeToString,
+                response_deserializer=tokenizer__service__pb2.TextOutput.FromString,
+                )
         self.health_check = channel.unary_unary(
                 '/tokenizer_service.TokenizerService/health_check',
                 request_serializer=tokenizer__service__pb2.HealthCheckRequest.SerializeToString,
@@ -48,6 +63,28 @@ class TokenizerServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def process_text_batch(self, request, context):
+        """Tokenize many texts in one call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def process_tokens_batch(self, request, context):
+        """Decode many token sequences in one call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def decode_stream(self, request_iterator, context):
+        """Decode generated tokens as they arrive: each chunk gets one reply with only the newly
+        completed text; bytes of a character split across chunks are held back until it completes
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def health_check(self, request, context):
         """Health check
         """
@@ -68,6 +105,21 @@ def add_TokenizerServiceServicer_to_server(servicer, server):
                     request_deserializer=tokenizer__service__pb2.TokenInput.FromString,
                     response_serializer=tokenizer__service__pb2.TextOutput.SerializeToString,
             ),
+            'process_text_batch': grpc.unary_unary_rpc_method_handler(
+                    servicer.process_text_batch,
+                    request_deserializer=tokenizer__service__pb2.TextBatchInput.FromString,
+                    response_serializer=tokenizer__service__pb2.TokenBatchOutput.SerializeToString,
+            ),
+            'process_tokens_batch': grpc.unary_unary_rpc_method_handler(
+                    servicer.process_tokens_batch,
+                    request_deserializer=tokenizer__service__pb2.TokenBatchInput.FromString,
+                    response_serializer=tokenizer__service__pb2.TextBatchOutput.SerializeToString,
+            ),
+            'decode_stream': grpc.stream_stream_rpc_method_handler(
+                    servicer.decode_stream,
+                    request_deserializer=tokenizer__service__pb2.TokenInput.FromString,
+                    response_serializer=tokenizer__service__pb2.TextOutput.SerializeToString,
+            ),
             'health_check': grpc.unary_unary_rpc_method_handler(
                     servicer.health_check,
                     request_deserializer=tokenizer__service__pb2.HealthCheckRequest.FromString,
@@ -117,6 +169,57 @@ class TokenizerService(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def process_text_batch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/tokenizer_service.TokenizerService/process_text_batch',
+            tokenizer__service__pb2.TextBatchInput.SerializeToString,
+            tokenizer__service__pb2.TokenBatchOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def process_tokens_batch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/tokenizer_service.TokenizerService/process_tokens_batch',
+            tokenizer__service__pb2.TokenBatchInput.SerializeToString,
+            tokenizer__service__pb2.TextBatchOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def decode_stream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/tokenizer_service.TokenizerService/decode_stream',
+            tokenizer__service__pb2.TokenInput.SerializeToString,
+            tokenizer__service__pb2.TextOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def health_check(request,
             target,
@@ -0,0 +1,93 @@
+"""Benchmark the tokenizer backends on a text corpus.
+
+Encodes and decodes the corpus with the pure-Python and the Rust-backed
+GPT-2 tokenizer, once item by item (what ``process_text``/``process_tokens``
+do) and once through the batch calls used by ``process_text_batch`` and
+``process_tokens_batch``, and reports tokens per second. Both backends must
+produce the same token ids.
+
+The corpus is one text per non-empty paragraph of the given files (the
+project README by default), repeated until ``--num-texts`` texts.
+
+Usage:
+    python src/tokenizer/benchmark_tokenizer.py --corpus prompts.txt --num-texts 2000
+"""
+import os
+import sys
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from tokenizer_server import TOKENIZER_BACKENDS
+
+def load_corpus(paths: list, num_texts: int) -> list:
+    paragraphs = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            paragraphs.extend(
+                paragraph.strip() for paragraph in f.read().split('\n\n') if paragraph.strip()
+            )
+    if not paragraphs:
+        raise ValueError(f"No text found in {paths}")
+    return [paragraphs[i % len(paragraphs)] for i in range(num_texts)]
+
+def measure(fn, repeats: int) -> float:
+    """Return the best wall time of ``fn`` in seconds, after one warm-up call."""
+    fn()
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark(tokenizer, texts: list, repeats: int) -> dict:
+    token_ids = [tokenizer.encode(text) for text in texts]
+    num_tokens = sum(len(ids) for ids in token_ids)
+
+    def decode_batch():
+        if tokenizer.is_fast:
+            return tokenizer.backend_tokenizer.decode_batch(token_ids, skip_special_tokens=True)
+        return tokenizer.batch_decode(token_ids, skip_special_tokens=True)
+
+    timings = {
+        'encode': measure(lambda: [tokenizer.encode(text) for text in texts], repeats),
+        'encode_batch': measure(lambda: tokenizer(texts)['input_ids'], repeats),
+        'decode': measure(
+            lambda: [tokenizer.decode(ids, skip_special_tokens=True) for ids in token_ids], repeats
+        ),
+        'decode_batch': measure(decode_batch, repeats)
+    }
+    return {
+        'token_ids': token_ids,
+        'tokens_per_sec': {operation: num_tokens / seconds for operation, seconds in timings.items()}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', nargs='+',
+                        default=[os.path.join(current_dir, '..', '..', 'README.md')],
+                        help='Text files to draw the corpus from')
+    parser.add_argument('--num-texts', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus, args.num_texts)
+    results = {}
+    for backend, tokenizer_class in TOKENIZER_BACKENDS.items():
+        results[backend] = benchmark(tokenizer_class.from_pretrained('gpt2'), texts, args.repeats)
+
+    if results['fast']['token_ids'] != results['python']['token_ids']:
+        print("WARNING: the backends produced different token ids")
+
+    num_tokens = sum(len(ids) for ids in results['fast']['token_ids'])
+    print(f"{len(texts)} texts, {num_tokens} tokens")
+    print(f"{'backend':<8} {'operation':<13} {'tokens/sec':>14}")
+    for backend, result in results.items():
+        for operation, rate in result['tokens_per_sec'].items():
+            print(f"{backend:<8} {operation:<13} {rate:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
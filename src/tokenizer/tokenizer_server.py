@@ -6,8 +6,9 @@ import grpc.aio
 import asyncio
 import sys
 import time
-from transformers import GPT2Tokenizer
-from prometheus_client import start_http_server, Counter, Histogram, Info
+from collections import OrderedDict
+from transformers import GPT2Tokenizer, GPT2TokenizerFast
+from prometheus_client import start_http_server, Counter, Histogram, Gauge, Info
 
 # Add relative import path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -29,13 +30,13 @@ logger = logging.getLogger(__name__)
 TOKENIZER_REQUESTS = Counter(
     'tokenizer_requests_total',
     'Total number of tokenizer requests',
-    ['operation', 'status']  # operation: encode/decode, status: success/error
+    ['operation', 'status']  # operation: encode/decode/decode_stream, status: success/error
 )
 
 TOKENIZER_LATENCY = Histogram(
     'tokenizer_operation_latency_seconds',
     'Time taken for tokenizer operations',
-    ['operation']  # encode/decode
+    ['operation']  # encode/decode, or encode_batch/decode_batch for a whole batch
 )
 
 TOKEN_COUNT = Counter(
@@ -44,35 +45,150 @@ TOKEN_COUNT = Counter(
     ['operation']  # encode/decode
 )
 
+BATCH_SIZE = Histogram(
+    'tokenizer_batch_size',
+    'Items per batch tokenizer request',
+    ['operation'],  # encode/decode
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+)
+
+CACHE_LOOKUPS = Counter(
+    'tokenizer_cache_lookups_total',
+    'Lookups in the encode and decode caches',
+    ['cache', 'result']  # cache: encode/decode, result: hit/miss
+)
+
+CACHE_ENTRIES = Gauge(
+    'tokenizer_cache_entries',
+    'Entries held by the encode and decode caches',
+    ['cache']  # encode/decode
+)
+
+DECODE_STREAMS = Gauge(
+    'tokenizer_decode_streams_active',
+    'Open incremental decode streams'
+)
+
 TOKENIZER_INFO = Info('tokenizer', 'Tokenizer information')
 
+# Longer inputs are tokenized every time rather than cached, to keep entries small
+MAX_CACHED_TEXT_LENGTH = 4096
+MAX_CACHED_TOKENS = 1024
+
+# Tokenizer implementations: the Rust-backed one is the default, the pure-Python one is kept for comparison
+TOKENIZER_BACKENDS = {
+    'fast': GPT2TokenizerFast,
+    'python': GPT2Tokenizer
+}
+
+def clean_decoded_text(text: str) -> str:
+    """Strip surrounding whitespace and join non-empty lines with single spaces."""
+    text = text.strip()
+    return ' '.join(line.strip() for line in text.splitlines() if line.strip())
+
+class LRUCache:
+    """Least-recently-used map bounded by entry count; ``max_entries`` 0 disables it."""
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        if not self.max_entries:
+            return None
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        CACHE_LOOKUPS.labels(cache=self.name, result='hit' if value is not None else 'miss').inc()
+        return value
+
+    def put(self, key, value):
+        if not self.max_entries:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        CACHE_ENTRIES.labels(cache=self.name).set(len(self.entries))
+
+class IncrementalDecoder:
+    """Turns a growing token sequence into text, emitting each piece once it is final.
+
+    Byte-level BPE can split one character over several tokens, so a window
+    starting a few tokens back is decoded and compared with the text already
+    emitted for it. Text is only released once it no longer ends in an
+    incomplete character (U+FFFD), and tokens before the window are dropped,
+    so every chunk costs time proportional to the window, not the stream.
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.tokens = []
+        # tokens[:prefix_offset] only provide context; tokens[prefix_offset:read_offset] are emitted
+        self.prefix_offset = 0
+        self.read_offset = 0
+
+    def decode(self, tokens: list) -> str:
+        # No clean-up: it changes spacing depending on what follows, which would break concatenation
+        return self.tokenizer.decode(
+            tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False
+        )
+
+    def add(self, tokens: list) -> str:
+        """Append tokens and return the text they completed (possibly empty)."""
+        self.tokens.extend(tokens)
+        prefix_text = self.decode(self.tokens[self.prefix_offset:self.read_offset])
+        new_text = self.decode(self.tokens[self.prefix_offset:])
+        if len(new_text) <= len(prefix_text) or new_text.endswith('\ufffd'):
+            return ""
+        
+        # The emitted tokens become the next window's context
+        self.tokens = self.tokens[self.read_offset:]
+        self.prefix_offset = 0
+        self.read_offset = len(self.tokens)
+        return new_text[len(prefix_text):]
+
+    def flush(self) -> str:
+        """Return whatever text is still held back, incomplete characters included."""
+        if self.read_offset == len(self.tokens):
+            return ""
+        prefix_text = self.decode(self.tokens[self.prefix_offset:self.read_offset])
+        text = self.decode(self.tokens[self.prefix_offset:])[len(prefix_text):]
+        self.read_offset = len(self.tokens)
+        return text
+
 class TokenizerServicer(tokenizer_service_pb2_grpc.TokenizerServiceServicer):
-    def __init__(self):
+    def __init__(self, backend: str = 'fast', cache_size: int = 4096):
         # Start Prometheus metrics server
         start_http_server(8002)
         
-        self.tokenizer = self.load_tokenizer()
+        self.tokenizer = self.load_tokenizer(backend)
+        # Prompts repeat (templates, retries), so results are memoized both ways
+        self.encode_cache = LRUCache('encode', cache_size)
+        self.decode_cache = LRUCache('decode', cache_size)
         
         # Record tokenizer information
         TOKENIZER_INFO.info({
             'model': 'gpt2',
+            'backend': backend,
             'vocab_size': str(len(self.tokenizer.get_vocab())),
             'max_length': str(self.tokenizer.model_max_length)
         })
         
         logger.info("Tokenizer service initialized")
 
-    def load_tokenizer(self):
-        """Load the GPT2 tokenizer."""
+    def load_tokenizer(self, backend: str):
+        """Load the GPT2 tokenizer with the given backend ('fast' or 'python')."""
         try:
-            tokenizer = GPT2Tokenizer.from_pretrained('gpt2')
+            tokenizer = TOKENIZER_BACKENDS[backend].from_pretrained('gpt2')
             # Set padding token to ensure consistent handling
             tokenizer.pad_token = tokenizer.eos_token
-            logger.info("GPT2 Tokenizer loaded successfully")
+            logger.info(f"GPT2 Tokenizer loaded successfully ({backend} backend)")
             
             # Test tokenization
             test_input = "Hello, how are you?"
-            test_tokens = tokenizer.encode(test_input, return_tensors='pt')[0].tolist()
+            test_tokens = tokenizer.encode(test_input)
             test_decode = tokenizer.decode(test_tokens)
             logger.info(f"Test tokenization - Input: {test_input}")
             logger.info(f"Test tokenization - Tokens: {test_tokens}")
@@ -83,24 +199,103 @@ class TokenizerServicer(tokenizer_service_pb2_grpc.TokenizerServiceServicer):
             logger.error(f"Failed to load tokenizer: {str(e)}")
             raise
 
+    def encode_texts(self, texts: list) -> list:
+        """Return each text's token ids (a tuple), or the exception that encoding it raised.
+
+        Cached texts are served from the encode cache; the rest are encoded
+        in one batch call and cached.
+        """
+        results = [
+            self.encode_cache.get(text) if len(text) <= MAX_CACHED_TEXT_LENGTH else None
+            for text in texts
+        ]
+        misses = [index for index, tokens in enumerate(results) if tokens is None]
+        if not misses:
+            return results
+        try:
+            # The fast backend encodes the whole list in one call, in parallel
+            batch_tokens = self.tokenizer(
+                [texts[index] for index in misses], add_special_tokens=True
+            )['input_ids']
+        except Exception as e:
+            # Fall back to one text at a time to find which items are bad
+            if len(misses) > 1:
+                logger.warning(f"Batch encode failed, encoding items separately: {str(e)}")
+            batch_tokens = []
+            for index in misses:
+                try:
+                    batch_tokens.append(self.tokenizer.encode(texts[index], add_special_tokens=True))
+                except Exception as item_error:
+                    batch_tokens.append(item_error)
+        
+        for index, tokens in zip(misses, batch_tokens):
+            if isinstance(tokens, Exception):
+                results[index] = tokens
+                continue
+            results[index] = tuple(tokens)
+            if len(texts[index]) <= MAX_CACHED_TEXT_LENGTH:
+                self.encode_cache.put(texts[index], results[index])
+        return results
+
+    def decode_sequences(self, sequences: list) -> list:
+        """Return each token sequence's cleaned-up text, or the exception that decoding it raised."""
+        keys = [tuple(tokens) for tokens in sequences]
+        results = [
+            self.decode_cache.get(key) if len(key) <= MAX_CACHED_TOKENS else None
+            for key in keys
+        ]
+        misses = [index for index, text in enumerate(results) if text is None]
+        if not misses:
+            return results
+        try:
+            if self.tokenizer.is_fast:
+                # batch_decode() would decode one sequence at a time; the Rust backend does the batch at once
+                texts = [
+                    self.tokenizer.clean_up_tokenization(text)
+                    for text in self.tokenizer.backend_tokenizer.decode_batch(
+                        [sequences[index] for index in misses], skip_special_tokens=True
+                    )
+                ]
+            else:
+                texts = self.tokenizer.batch_decode(
+                    [sequences[index] for index in misses],
+                    skip_special_tokens=True,
+                    clean_up_tokenization_spaces=True
+                )
+        except Exception as e:
+            if len(misses) > 1:
+                logger.warning(f"Batch decode failed, decoding items separately: {str(e)}")
+            texts = []
+            for index in misses:
+                try:
+                    texts.append(self.tokenizer.decode(
+                        sequences[index],
+                        skip_special_tokens=True,
+                        clean_up_tokenization_spaces=True
+                    ))
+                except Exception as item_error:
+                    texts.append(item_error)
+        
+        for index, text in zip(misses, texts):
+            if isinstance(text, Exception):
+                results[index] = text
+                continue
+            results[index] = clean_decoded_text(text)
+            if len(keys[index]) <= MAX_CACHED_TOKENS:
+                self.decode_cache.put(keys[index], results[index])
+        return results
+
     async def process_text(self, request, context):
         """Tokenize input text."""
         start_time = time.time()
         try:
-            # Add EOS token and return as normal Python list
-            tokens = self.tokenizer.encode(
-                request.text,
-                add_special_tokens=True,
-                return_tensors='pt'
-            )[0].tolist()
+            tokens = self.encode_texts([request.text])[0]
+            if isinstance(tokens, Exception):
+                raise tokens
             
             logger.info(f"Input text: {request.text}")
             logger.info(f"Encoded tokens: {tokens}")
             
-            # Verify decoding
-            verify = self.tokenizer.decode(tokens)
-            logger.info(f"Verification decode: {verify}")
-            
             # Update metrics
             TOKENIZER_REQUESTS.labels(
                 operation='encode',
@@ -137,16 +332,10 @@ class TokenizerServicer(tokenizer_service_pb2_grpc.TokenizerServiceServicer):
             tokens = [int(float(t)) for t in request.tokens]
             logger.info(f"Processing tokens: {tokens}")
             
-            # Decode tokens
-            text = self.tokenizer.decode(
-                tokens,
-                skip_special_tokens=True,
-                clean_up_tokenization_spaces=True
-            )
-            
-            # Clean up the text
-            text = text.strip()  # Remove leading/trailing whitespace
-            text = ' '.join(line.strip() for line in text.splitlines() if line.strip())
+            # Decode tokens and clean up the text
+            text = self.decode_sequences([tokens])[0]
+            if isinstance(text, Exception):
+                raise text
             
             logger.info(f"Decoded text: {text}")
             
@@ -178,6 +367,83 @@ class TokenizerServicer(tokenizer_service_pb2_grpc.TokenizerServiceServicer):
             context.set_details(error_msg)
             return tokenizer_service_pb2.TextOutput()
 
+    async def process_text_batch(self, request, context):
+        """Tokenize many texts; an item that fails carries an error instead of failing the batch."""
+        start_time = time.time()
+        texts = list(request.texts)
+        BATCH_SIZE.labels(operation='encode').observe(len(texts))
+        items = []
+        for tokens in self.encode_texts(texts):
+            if isinstance(tokens, Exception):
+                items.append(tokenizer_service_pb2.TokenOutput(error=str(tokens)))
+            else:
+                items.append(tokenizer_service_pb2.TokenOutput(tokens=tokens))
+            TOKENIZER_REQUESTS.labels(
+                operation='encode',
+                status='error' if isinstance(tokens, Exception) else 'success'
+            ).inc()
+            TOKEN_COUNT.labels(operation='encode').inc(len(items[-1].tokens))
+        TOKENIZER_LATENCY.labels(operation='encode_batch').observe(time.time() - start_time)
+        logger.info(f"Encoded batch of {len(texts)} texts")
+        return tokenizer_service_pb2.TokenBatchOutput(items=items)
+
+    async def process_tokens_batch(self, request, context):
+        """Decode many token sequences; an item that fails carries an error instead of failing the batch."""
+        start_time = time.time()
+        sequences = [list(item.tokens) for item in request.items]
+        BATCH_SIZE.labels(operation='decode').observe(len(sequences))
+        items = []
+        for tokens, text in zip(sequences, self.decode_sequences(sequences)):
+            if isinstance(text, Exception):
+                items.append(tokenizer_service_pb2.TextOutput(error=str(text)))
+            else:
+                items.append(tokenizer_service_pb2.TextOutput(text=text))
+            TOKENIZER_REQUESTS.labels(
+                operation='decode',
+                status='error' if isinstance(text, Exception) else 'success'
+            ).inc()
+            TOKEN_COUNT.labels(operation='decode').inc(len(tokens))
+        TOKENIZER_LATENCY.labels(operation='decode_batch').observe(time.time() - start_time)
+        logger.info(f"Decoded batch of {len(sequences)} token sequences")
+        return tokenizer_service_pb2.TextBatchOutput(items=items)
+
+    async def decode_stream(self, request_iterator, context):
+        """Decode token chunks incrementally, replying to each with the newly completed text.
+
+        The stream is the session: its decoder state lives as long as the
+        call. Once the client stops sending, any held-back text is sent as
+        one last reply.
+        """
+        decoder = IncrementalDecoder(self.tokenizer)
+        DECODE_STREAMS.inc()
+        try:
+            async for chunk in request_iterator:
+                start_time = time.time()
+                tokens = [int(t) for t in chunk.tokens]
+                text = decoder.add(tokens)
+                TOKENIZER_LATENCY.labels(operation='decode_stream').observe(time.time() - start_time)
+                TOKEN_COUNT.labels(operation='decode_stream').inc(len(tokens))
+                yield tokenizer_service_pb2.TextOutput(text=text)
+            
+            text = decoder.flush()
+            if text:
+                yield tokenizer_service_pb2.TextOutput(text=text)
+            TOKENIZER_REQUESTS.labels(operation='decode_stream', status='success').inc()
+        
+        except asyncio.CancelledError:
+            TOKENIZER_REQUESTS.labels(operation='decode_stream', status='cancelled').inc()
+            raise
+        
+        except Exception as e:
+            error_msg = f"Stream decoding failed: {str(e)}"
+            logger.error(error_msg)
+            TOKENIZER_REQUESTS.labels(operation='decode_stream', status='error').inc()
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(error_msg)
+        
+        finally:
+            DECODE_STREAMS.dec()
+
     async def health_check(self, request, context):
         """Implement health check."""
         try:
@@ -188,7 +454,7 @@ class TokenizerServicer(tokenizer_service_pb2_grpc.TokenizerServiceServicer):
             logger.error(f"Health check failed: {str(e)}")
             return tokenizer_service_pb2.HealthCheckResponse(status=f"ERROR: {str(e)}")
 
-async def serve(port: int):
+async def serve(port: int, backend: str = 'fast', cache_size: int = 4096):
     """Start the tokenizer server."""
     try:
         server = grpc.aio.server(
@@ -199,7 +465,7 @@ async def serve(port: int):
             ]
         )
         tokenizer_service_pb2_grpc.add_TokenizerServiceServicer_to_server(
-            TokenizerServicer(), server
+            TokenizerServicer(backend, cache_size), server
         )
         server.add_insecure_port(f'[::]:{port}')
         logger.info(f"Starting tokenizer server on port {port}")
@@ -213,6 +479,10 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--port', type=int, default=50054, help='Port to run tokenizer on')
+    parser.add_argument('--backend', choices=list(TOKENIZER_BACKENDS), default='fast',
+                        help='Tokenizer implementation')
+    parser.add_argument('--cache-size', type=int, default=4096,
+                        help='Entries in each of the encode and decode caches (0 disables them)')
     args = parser.parse_args()
     
-    asyncio.run(serve(args.port))
\ No newline at end of file
+    asyncio.run(serve(args.port, args.backend, args.cache_size))
\ No newline at end of file
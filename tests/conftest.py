@@ -0,0 +1,110 @@
+"""Shared fixtures: tiny randomly initialized GPT-2 pipelines served in-process."""
+import os
+import sys
+import json
+import contextlib
+import pytest
+import torch
+import grpc.aio
+from transformers import GPT2Config, GPT2LMHeadModel
+
+src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+for service in ('proto', 'node', 'coordinator', 'tokenizer'):
+    sys.path.append(os.path.join(src_dir, service))
+
+import model_service_pb2
+import model_service_pb2_grpc
+import node_server
+import coordinator_server
+
+# Small enough to load in well under a second; a larger init range keeps greedy choices clear-cut
+TINY_GPT2 = {
+    'vocab_size': 1000,
+    'n_positions': 128,
+    'n_embd': 32,
+    'n_layer': 4,
+    'n_head': 2,
+    'initializer_range': 0.2
+}
+
+PROMPT = [464, 317, 82, 625, 262, 13, 318, 257, 922, 290]
+
+@pytest.fixture(scope='session')
+def tiny_checkpoint(tmp_path_factory):
+    """Save a tiny GPT-2 checkpoint and return its directory, usable as ``model_name``."""
+    torch.manual_seed(0)
+    model = GPT2LMHeadModel(GPT2Config(**TINY_GPT2))
+    path = tmp_path_factory.mktemp('tiny-gpt2')
+    model.save_pretrained(path)
+    return str(path)
+
+@pytest.fixture(autouse=True)
+def no_coordinator_metrics_server(monkeypatch):
+    # The coordinator always exports metrics on port 8000, which several test coordinators would share
+    monkeypatch.setattr(coordinator_server, 'start_http_server', lambda port: None)
+
+def reference_greedy(checkpoint: str, prompt: list, max_new_tokens: int) -> list:
+    """Greedily continue ``prompt`` with the whole model in one process."""
+    model = GPT2LMHeadModel.from_pretrained(checkpoint)
+    model.eval()
+    generated = []
+    with torch.no_grad():
+        input_ids = torch.tensor([prompt], dtype=torch.long)
+        past_key_values = None
+        for _ in range(max_new_tokens):
+            outputs = model(input_ids=input_ids, past_key_values=past_key_values, use_cache=True)
+            past_key_values = outputs.past_key_values
+            next_token = int(torch.argmax(outputs.logits[0, -1]))
+            generated.append(next_token)
+            input_ids = torch.tensor([[next_token]], dtype=torch.long)
+    return generated
+
+async def generate(coordinator, prompt: list, **overrides) -> list:
+    """Run ``generate_tokens`` for ``prompt`` with metadata ``overrides`` and collect the tokens."""
+    params = coordinator.resolve_generation_params({key: str(value) for key, value in overrides.items()})
+    request = model_service_pb2.ModelInput(data=prompt)
+    return [token async for token in coordinator.generate_tokens(request, params)]
+
+@contextlib.asynccontextmanager
+async def serve_pipeline(config_dir, checkpoint: str, num_nodes: int, node_settings: dict = None, **settings):
+    """Serve ``checkpoint`` split across ``num_nodes`` local stages and yield a coordinator for them.
+
+    ``node_settings`` maps a stage index to extra node config entries;
+    ``settings`` are extra top-level config entries. Yields the coordinator,
+    the nodes and their gRPC servers.
+    """
+    servers = [grpc.aio.server() for _ in range(num_nodes)]
+    ports = [server.add_insecure_port('127.0.0.1:0') for server in servers]
+    config = {
+        'model_name': checkpoint,
+        'nodes': [
+            {
+                'id': f'node{index + 1}',
+                'address': f'127.0.0.1:{port}',
+                'model_part': index,
+                **(node_settings or {}).get(index, {})
+            }
+            for index, port in enumerate(ports)
+        ],
+        **settings
+    }
+    config_path = os.path.join(config_dir, 'config.json')
+    with open(config_path, 'w') as f:
+        json.dump(config, f)
+
+    nodes = []
+    for server, node_config in zip(servers, config['nodes']):
+        node = node_server.ModelNode(config_path, node_config['id'], metrics_port=0)
+        node.executor.start()
+        model_service_pb2_grpc.add_ModelServiceServicer_to_server(node, server)
+        await server.start()
+        nodes.append(node)
+    coordinator = coordinator_server.ModelCoordinator(config_path)
+    coordinator.scheduler.start()
+    try:
+        yield coordinator, nodes, servers
+    finally:
+        await coordinator.scheduler.stop()
+        for node, server in zip(nodes, servers):
+            await server.stop(None)
+            await node.executor.stop()
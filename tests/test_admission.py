@@ -0,0 +1,104 @@
+"""Admission control: generation slots go by priority, and excess requests are shed early."""
+import asyncio
+import grpc
+import grpc.aio
+import pytest
+from prometheus_client import REGISTRY
+
+import model_service_pb2
+import model_service_pb2_grpc
+from coordinator_server import AdmissionController, Overloaded
+from conftest import PROMPT, serve_pipeline
+
+# One slot in total; 'batch' may queue a single request and 'best_effort' none at all
+CLASSES = {'interactive': {'max_queue': 4}, 'batch': {'max_queue': 1}, 'best_effort': {'max_queue': 0}}
+
+def rejected(priority: str) -> float:
+    """Return how many requests of a priority class admission control has shed."""
+    return REGISTRY.get_sample_value('coordinator_admission_rejected_total', {'priority': priority}) or 0.0
+
+def test_freed_slot_goes_to_highest_priority_waiter():
+    async def scenario():
+        admission = AdmissionController(1, CLASSES, 'batch')
+        await admission.acquire('batch')
+        order = []
+
+        async def wait_for_slot(priority: str):
+            await admission.acquire(priority)
+            order.append(priority)
+
+        # The batch request queued first, but the interactive one is admitted first
+        waiters = [asyncio.create_task(wait_for_slot('batch')), asyncio.create_task(wait_for_slot('interactive'))]
+        await asyncio.sleep(0)
+        admission.release('batch')
+        await asyncio.sleep(0)
+        admission.release('interactive')
+        await asyncio.gather(*waiters)
+        return order
+
+    assert asyncio.run(scenario()) == ['interactive', 'batch']
+
+def test_full_class_queue_is_shed_without_affecting_others():
+    before = {priority: rejected(priority) for priority in CLASSES}
+
+    async def scenario():
+        admission = AdmissionController(1, CLASSES, 'batch')
+        await admission.acquire('interactive')
+        queued = [asyncio.create_task(admission.acquire('batch')), asyncio.create_task(admission.acquire('interactive'))]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await admission.acquire('batch')
+        with pytest.raises(Overloaded):
+            await admission.acquire('best_effort')
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert {priority: rejected(priority) - before[priority] for priority in CLASSES} == {
+        'interactive': 0, 'batch': 1, 'best_effort': 1
+    }
+
+@pytest.mark.parametrize('granted', [False, True])
+def test_cancelled_waiter_gives_back_its_slot(granted):
+    async def scenario():
+        admission = AdmissionController(1, CLASSES, 'batch')
+        await admission.acquire('batch')
+        waiter = asyncio.create_task(admission.acquire('batch'))
+        await asyncio.sleep(0)
+        if granted:
+            # The slot is handed over, but the request is cancelled before it resumes
+            admission.release('batch')
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        if not granted:
+            admission.release('batch')
+        return admission.in_flight, len(admission.queues['batch'])
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+def test_queue_limit_rejects_with_resource_exhausted(tmp_path, tiny_checkpoint):
+    admission = {'max_in_flight': 1, 'classes': {'normal': {'max_queue': 0}}, 'default_priority': 'normal'}
+
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, 1, admission=admission) as (coordinator, _, _):
+            server = grpc.aio.server()
+            model_service_pb2_grpc.add_ModelServiceServicer_to_server(coordinator, server)
+            port = server.add_insecure_port('127.0.0.1:0')
+            await server.start()
+            # The only slot is taken, so the next request is shed instead of queued
+            await coordinator.admission.acquire('normal')
+            request = model_service_pb2.ModelInput(data=PROMPT, metadata={'strategy': 'greedy'})
+            try:
+                async with grpc.aio.insecure_channel(f'127.0.0.1:{port}') as channel:
+                    stub = model_service_pb2_grpc.ModelServiceStub(channel)
+                    with pytest.raises(grpc.aio.AioRpcError) as unary:
+                        await stub.process(request)
+                    # Streams are refused before their first token, which the API turns into HTTP 429
+                    with pytest.raises(grpc.aio.AioRpcError) as stream:
+                        await stub.process_stream(request).read()
+                    return unary.value.code(), stream.value.code()
+            finally:
+                await server.stop(None)
+
+    assert asyncio.run(scenario()) == (grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.RESOURCE_EXHAUSTED)
@@ -0,0 +1,20 @@
+"""Batch items fail one by one, each with the status code a single request would get."""
+import asyncio
+
+import model_service_pb2
+from conftest import PROMPT, reference_greedy, serve_pipeline
+
+def test_batch_item_reports_unavailable_nodes(tmp_path, tiny_checkpoint):
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, 2) as (coordinator, _, _):
+            item = model_service_pb2.ModelInput(data=PROMPT, metadata={'strategy': 'greedy', 'max_new_tokens': '4'})
+            slots = asyncio.Semaphore(1)
+            healthy = await coordinator.generate_batch_item(item, {}, None, slots)
+            coordinator.unhealthy_nodes.add('node2')
+            unavailable = await coordinator.generate_batch_item(item, {}, None, slots)
+            return healthy, unavailable
+
+    healthy, unavailable = asyncio.run(scenario())
+    assert list(healthy.data) == reference_greedy(tiny_checkpoint, PROMPT, 4)
+    assert unavailable.metadata['error_code'] == 'UNAVAILABLE'
+    assert 'node2' in unavailable.metadata['error']
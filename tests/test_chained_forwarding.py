@@ -0,0 +1,57 @@
+"""Chained forwarding: steps travel node to node and only the last stage replies."""
+import asyncio
+import pytest
+from prometheus_client import REGISTRY
+
+import coordinator_server
+import node_server
+from conftest import PROMPT, generate, reference_greedy, serve_pipeline
+
+def hop_count(node_id: str, phase: str) -> float:
+    """Return how many chained hop timings the coordinator has recorded for a stage and phase."""
+    labels = {'node_id': node_id, 'phase': phase}
+    return REGISTRY.get_sample_value('coordinator_chained_hop_latency_seconds_count', labels) or 0.0
+
+@pytest.mark.parametrize('num_nodes', [1, 3])
+def test_chained_generation_matches_greedy(tmp_path, tiny_checkpoint, num_nodes):
+    node_ids = [f'node{index + 1}' for index in range(num_nodes)]
+    before = {(node_id, phase): hop_count(node_id, phase) for node_id in node_ids for phase in ('compute', 'forward')}
+
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, num_nodes, chained_forwarding=True) as (coordinator, _, _):
+            return await generate(coordinator, PROMPT, strategy='greedy', max_new_tokens=12)
+
+    assert asyncio.run(scenario()) == reference_greedy(tiny_checkpoint, PROMPT, 12)
+    # Every stage reported its compute time each step, and all but the last the time spent forwarding
+    for node_id in node_ids:
+        assert hop_count(node_id, 'compute') - before[(node_id, 'compute')] == 12
+        forwarded = 12 if node_id != node_ids[-1] else 0
+        assert hop_count(node_id, 'forward') - before[(node_id, 'forward')] == forwarded
+
+def test_chained_step_names_unreachable_downstream_node(tmp_path, tiny_checkpoint):
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, 3, chained_forwarding=True) as (coordinator, _, servers):
+            await servers[2].stop(None)
+            with pytest.raises(coordinator_server.StageError) as error:
+                await generate(coordinator, PROMPT, strategy='greedy', max_new_tokens=4)
+            return error.value, coordinator.replicas
+
+    error, replicas = asyncio.run(scenario())
+    assert error.node_id == 'node3'
+    assert 'UNAVAILABLE' in str(error)
+    # Only the stage that failed is taken out of rotation
+    assert [replicas[node_id][0]['healthy'] for node_id in ('node1', 'node2', 'node3')] == [True, True, False]
+
+def test_chained_step_relays_downstream_status(tmp_path, tiny_checkpoint):
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, 3, chained_forwarding=True) as (coordinator, nodes, _):
+            async def queue_full(item):
+                raise node_server.InferenceQueueFull("Inference queue is full")
+            nodes[2].executor.submit = queue_full
+            with pytest.raises(coordinator_server.Overloaded) as error:
+                await generate(coordinator, PROMPT, strategy='greedy', max_new_tokens=4)
+            return error.value, coordinator.replicas
+
+    error, replicas = asyncio.run(scenario())
+    assert 'node3' in str(error)
+    assert all(replica[0]['healthy'] for replica in replicas.values())
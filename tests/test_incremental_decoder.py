@@ -0,0 +1,38 @@
+"""Incremental decoding: streamed text must never split a character and must add up to the full text."""
+import pytest
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast
+
+from tokenizer_server import IncrementalDecoder
+
+@pytest.fixture(scope='module')
+def byte_tokenizer():
+    """A byte-level BPE tokenizer without merges: one token per UTF-8 byte, as GPT-2 falls back to."""
+    alphabet = sorted(pre_tokenizers.ByteLevel.alphabet())
+    tokenizer = Tokenizer(models.BPE(vocab={char: index for index, char in enumerate(alphabet)}, merges=[]))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer)
+
+def test_character_split_across_chunks_arrives_whole(byte_tokenizer):
+    text = "café €5"
+    tokens = byte_tokenizer.encode(text)
+    assert len(tokens) == len(text.encode('utf-8'))
+    decoder = IncrementalDecoder(byte_tokenizer)
+
+    # 'é' is two bytes and '€' three; a chunk ending inside one is held back whole
+    chunks = [tokens[:4], tokens[4:6], tokens[6:8], tokens[8:]]
+    deltas = [decoder.add(chunk) for chunk in chunks]
+    assert deltas == ["", "café ", "", "€5"]
+    assert decoder.flush() == ""
+    assert ''.join(deltas) == text
+
+def test_flush_releases_incomplete_character(byte_tokenizer):
+    tokens = byte_tokenizer.encode("ok €")
+    decoder = IncrementalDecoder(byte_tokenizer)
+
+    # The stream ends one byte short of '€', so its first two bytes are held back until the flush
+    assert decoder.add(tokens[:3]) == "ok "
+    assert decoder.add(tokens[3:-1]) == ""
+    assert decoder.flush() == "\ufffd"
+    assert decoder.flush() == ""
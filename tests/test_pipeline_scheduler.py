@@ -0,0 +1,109 @@
+"""Pipeline scheduler: steps are dispatched as they arrive and cancellations are charged correctly."""
+import asyncio
+import time
+from prometheus_client import REGISTRY
+
+from coordinator_server import PipelineScheduler
+
+def abandoned(node_id: str) -> float:
+    labels = {'node_id': node_id, 'reason': 'cancelled'}
+    return REGISTRY.get_sample_value('coordinator_abandoned_steps_total', labels) or 0.0
+
+def test_slow_step_does_not_hold_back_later_steps():
+    async def scenario():
+        async def call_stage(index, item):
+            await asyncio.sleep(item['delay'] if index == 0 else 0)
+            return index
+
+        scheduler = PipelineScheduler(['a', 'b'], call_stage, max_in_flight=[8, 8])
+        scheduler.start()
+        finished = []
+
+        async def step(name, delay):
+            await scheduler.submit({'delay': delay})
+            finished.append((name, time.perf_counter()))
+
+        start = time.perf_counter()
+        await asyncio.gather(step('slow', 0.5), step('fast', 0.0))
+        await scheduler.stop()
+        return start, dict(finished)
+
+    start, finished = asyncio.run(scenario())
+    # No batching window on any stage, and the fast step overtakes the slow one
+    assert finished['fast'] - start < 0.1
+    assert finished['slow'] > finished['fast']
+
+def test_in_flight_bound_per_stage():
+    async def scenario():
+        active, peak = 0, 0
+
+        async def call_stage(index, item):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        scheduler = PipelineScheduler(['a'], call_stage, max_in_flight=[2])
+        scheduler.start()
+        await asyncio.gather(*(scheduler.submit({}) for _ in range(6)))
+        await scheduler.stop()
+        return peak
+
+    assert asyncio.run(scenario()) == 2
+
+def test_step_cancelled_while_queued_is_dropped_by_its_stage():
+    before = abandoned('a')
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def call_stage(index, item):
+            await release.wait()
+            return 'done'
+
+        scheduler = PipelineScheduler(['a'], call_stage, max_in_flight=[1])
+        scheduler.start()
+        running = asyncio.create_task(scheduler.submit({}))
+        queued = asyncio.create_task(scheduler.submit({}))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        release.set()
+        result = await running
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return result, queued
+
+    result, queued = asyncio.run(scenario())
+    assert result == 'done'
+    assert queued.cancelled()
+    assert abandoned('a') - before == 1
+
+def test_step_cancelled_in_flight_is_charged_to_its_stage():
+    before = {node_id: abandoned(node_id) for node_id in ('a', 'b')}
+
+    async def scenario():
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def call_stage(index, item):
+            if index == 1:
+                started.set()
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+
+        scheduler = PipelineScheduler(['a', 'b'], call_stage, max_in_flight=[8, 8])
+        scheduler.start()
+        step = asyncio.create_task(scheduler.submit({}))
+        await started.wait()
+        step.cancel()
+        await asyncio.gather(step, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+    assert abandoned('b') - before['b'] == 1
+    assert abandoned('a') - before['a'] == 0
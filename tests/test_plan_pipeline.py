@@ -0,0 +1,56 @@
+"""Stage planning: layers are split to minimize the slowest stage within each node's memory budget."""
+import itertools
+import pytest
+
+from plan_pipeline import plan_stages, stage_cost
+
+MB = 1024 * 1024
+
+# Heavy first and last layers; embeddings and LM head each cost as much as two light layers
+PROFILE = {
+    'layers': [{'decode_ms': ms, 'bytes': 10 * MB} for ms in (4, 1, 1, 1, 1, 4)],
+    'embedding': {'decode_ms': 2, 'bytes': 20 * MB},
+    'head': {'decode_ms': 2, 'bytes': 0}
+}
+
+def node(**settings) -> dict:
+    """Return a node config with no cache reservations, so budgets apply to weights alone."""
+    return {'prefix_cache_mb': 0, 'session_cache_mb': 0, **settings}
+
+def bottleneck(ranges: list, nodes: list) -> float:
+    """Return the slowest stage's latency for a split."""
+    return max(
+        stage_cost(PROFILE, 'decode', start, end, s == 0, s == len(ranges) - 1)[0] / nodes[s].get('relative_speed', 1.0)
+        for s, (start, end) in enumerate(ranges)
+    )
+
+def test_two_stages_split_at_balance_point():
+    # Stage latencies are 2+4+1+1 and 1+1+4+2 ms
+    assert plan_stages(PROFILE, [node(), node()]) == [(0, 3), (3, 6)]
+
+@pytest.mark.parametrize('speeds', [(1.0, 1.0, 1.0), (1.0, 3.0, 1.0), (2.0, 1.0, 1.0)])
+def test_plan_matches_best_split_found_by_brute_force(speeds):
+    nodes = [node(relative_speed=speed) for speed in speeds]
+    ranges = plan_stages(PROFILE, nodes)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 6
+    assert all(start < end for start, end in ranges)
+
+    splits = (
+        [(0, a), (a, b), (b, 6)] for a, b in itertools.combinations(range(1, 6), 2)
+    )
+    assert bottleneck(ranges, nodes) == min(bottleneck(split, nodes) for split in splits)
+
+def test_memory_budget_moves_layers_to_another_stage():
+    # 40 MB fits the embeddings and two layers on the first stage, not three
+    assert plan_stages(PROFILE, [node(memory_budget_mb=40), node()]) == [(0, 2), (2, 6)]
+
+def test_plan_rejected_when_a_stage_cannot_fit_its_layers():
+    # The first stage needs the embeddings and at least one layer, 30 MB in all
+    with pytest.raises(ValueError, match="memory budgets"):
+        plan_stages(PROFILE, [node(memory_budget_mb=29), node()])
+
+def test_cache_reservations_count_against_the_budget():
+    # Without an explicit reservation each cache keeps its 256 MB default
+    with pytest.raises(ValueError, match="memory budgets"):
+        plan_stages(PROFILE, [{'memory_budget_mb': 500}, node()])
+    assert plan_stages(PROFILE, [{'memory_budget_mb': 600}, node()]) == [(0, 3), (3, 6)]
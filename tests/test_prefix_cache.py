@@ -0,0 +1,58 @@
+"""Prefix cache lookups reuse the longest prefix shared with any cached entry."""
+import torch
+
+from node_server import PREFIX_BLOCK_SIZE, PrefixCache
+
+SYSTEM_PROMPT = list(range(100, 140))
+
+def past_for(tokens: list) -> list:
+    # One layer, one head; position i holds token i so reused slices can be checked
+    positions = torch.tensor(tokens, dtype=torch.float32).view(1, -1, 1)
+    return [(positions, positions.clone())]
+
+def test_prompts_sharing_a_system_prompt_reuse_it():
+    cache = PrefixCache('node1', max_bytes=1024 * 1024)
+    first = SYSTEM_PROMPT + [1, 2, 3]
+    cache.insert(first, past_for(first), None, transient=False)
+
+    entry, length = cache.lookup(SYSTEM_PROMPT + [7, 8, 9, 10])
+    assert entry['key'] == tuple(first)
+    assert length == len(SYSTEM_PROMPT)
+    assert entry['past'][0][0][0, :length, 0].tolist() == SYSTEM_PROMPT
+
+def test_longest_common_prefix_wins():
+    cache = PrefixCache('node1', max_bytes=1024 * 1024)
+    short = SYSTEM_PROMPT[:20] + [5] * 30
+    long = SYSTEM_PROMPT + [6] * 10
+    for tokens in (short, long):
+        cache.insert(tokens, past_for(tokens), None, transient=False)
+
+    entry, length = cache.lookup(SYSTEM_PROMPT + [6, 6, 9])
+    assert entry['key'] == tuple(long)
+    assert length == len(SYSTEM_PROMPT) + 2
+
+def test_at_least_one_token_is_left_to_compute():
+    cache = PrefixCache('node1', max_bytes=1024 * 1024)
+    cache.insert(SYSTEM_PROMPT, past_for(SYSTEM_PROMPT), None, transient=False)
+
+    _, length = cache.lookup(SYSTEM_PROMPT)
+    assert length == len(SYSTEM_PROMPT) - 1
+    _, length = cache.lookup(SYSTEM_PROMPT + [1, 2], max_length=len(SYSTEM_PROMPT) - 3)
+    assert length == len(SYSTEM_PROMPT) - 3
+
+def test_short_or_unrelated_prompts_miss_and_evicted_entries_are_unindexed():
+    cache = PrefixCache('node1', max_bytes=1024 * 1024)
+    cache.insert(SYSTEM_PROMPT, past_for(SYSTEM_PROMPT), None, transient=False)
+
+    assert cache.lookup(SYSTEM_PROMPT[:PREFIX_BLOCK_SIZE - 1] + [0]) == (None, 0)
+    assert cache.lookup([0] + SYSTEM_PROMPT) == (None, 0)
+
+    # A transient entry is replaced by its extension, and leaves no index behind
+    step = SYSTEM_PROMPT + [1]
+    entry, _ = cache.lookup(step)
+    cache.insert(step, past_for(step), None, transient=True, replaces=entry)
+    extended = step + [2]
+    entry, _ = cache.lookup(extended)
+    cache.insert(extended, past_for(extended), None, transient=True, replaces=entry)
+    assert set(cache.entries) == {tuple(SYSTEM_PROMPT), tuple(extended)}
+    assert all(keys <= set(cache.entries) for keys in cache.blocks.values())
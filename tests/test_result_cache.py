@@ -0,0 +1,77 @@
+"""Request sharing: identical requests run one generation, and deterministic results are cached."""
+import asyncio
+import pytest
+
+import coordinator_server
+import model_service_pb2
+from coordinator_server import ResultCache, StageError
+from conftest import PROMPT, reference_greedy, serve_pipeline
+
+def count_generations(coordinator, failures: int = 0) -> list:
+    """Count ``generate_tokens`` runs in the returned list; the first ``failures`` runs fail at a stage."""
+    runs = []
+    generate_tokens = coordinator.generate_tokens
+
+    async def counted(request, params, deadline=None):
+        runs.append(len(runs))
+        if len(runs) <= failures:
+            raise StageError('node1', "injected failure")
+        async for token in generate_tokens(request, params, deadline):
+            yield token
+
+    coordinator.generate_tokens = counted
+    return runs
+
+def test_identical_concurrent_requests_share_one_generation(tmp_path, tiny_checkpoint):
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, 2, result_cache_size=0) as (coordinator, _, _):
+            runs = count_generations(coordinator)
+            params = coordinator.resolve_generation_params({'strategy': 'greedy', 'max_new_tokens': '6'})
+            request = model_service_pb2.ModelInput(data=PROMPT)
+            results = await asyncio.gather(*(coordinator.generate_shared(request, params) for _ in range(3)))
+            return results, runs, coordinator.in_flight
+
+    results, runs, in_flight = asyncio.run(scenario())
+    assert results == [reference_greedy(tiny_checkpoint, PROMPT, 6)] * 3
+    assert len(runs) == 1
+    assert in_flight == {}
+
+def test_failed_generation_is_not_cached(tmp_path, tiny_checkpoint):
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, 2) as (coordinator, _, _):
+            runs = count_generations(coordinator, failures=1)
+            params = coordinator.resolve_generation_params({'strategy': 'greedy', 'max_new_tokens': '6'})
+            request = model_service_pb2.ModelInput(data=PROMPT)
+            with pytest.raises(StageError):
+                await coordinator.generate_shared(request, params)
+            cached_after_failure = len(coordinator.result_cache.entries)
+            # The retry generates afresh, and only its result is cached and reused
+            retried = await coordinator.generate_shared(request, params)
+            repeated = await coordinator.generate_shared(request, params)
+            return cached_after_failure, retried, repeated, runs
+
+    cached_after_failure, retried, repeated, runs = asyncio.run(scenario())
+    assert cached_after_failure == 0
+    assert retried == repeated == reference_greedy(tiny_checkpoint, PROMPT, 6)
+    assert len(runs) == 2
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(coordinator_server.time, 'time', lambda: now[0])
+    cache = ResultCache(max_entries=4, ttl_seconds=10.0)
+    cache.put('a', [1, 2])
+    now[0] += 10.0
+    assert cache.get('a') == [1, 2]
+    now[0] += 0.5
+    assert cache.get('a') is None
+    assert 'a' not in cache.entries
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = ResultCache(max_entries=2, ttl_seconds=60.0)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    # Reading 'a' makes 'b' the least recently used
+    assert cache.get('a') == [1]
+    cache.put('c', [3])
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.get('b') is None
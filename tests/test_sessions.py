@@ -0,0 +1,44 @@
+"""Generation sessions: nodes drop a session's key/values as soon as its generation ends."""
+import asyncio
+
+import model_service_pb2
+from conftest import PROMPT, generate, reference_greedy, serve_pipeline
+
+def held_sessions(nodes) -> list:
+    """Return how many sessions each node still holds."""
+    return [len(node.sessions.entries) for node in nodes]
+
+def test_finished_generation_closes_its_session(tmp_path, tiny_checkpoint):
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, 3) as (coordinator, nodes, _):
+            tokens = await generate(coordinator, PROMPT, strategy='greedy', max_new_tokens=8)
+            # The flagged last step closes the session without a separate call
+            assert not coordinator.closing_sessions
+            return tokens, held_sessions(nodes)
+
+    tokens, held = asyncio.run(scenario())
+    assert tokens == reference_greedy(tiny_checkpoint, PROMPT, 8)
+    assert held == [0, 0, 0]
+
+def test_cancelled_generation_closes_its_session(tmp_path, tiny_checkpoint):
+    async def scenario():
+        async with serve_pipeline(tmp_path, tiny_checkpoint, 3) as (coordinator, nodes, _):
+            params = coordinator.resolve_generation_params({'strategy': 'greedy', 'max_new_tokens': '100'})
+            request = model_service_pb2.ModelInput(data=PROMPT)
+            first_token = asyncio.Event()
+
+            async def consume():
+                async for _ in coordinator.generate_tokens(request, params):
+                    first_token.set()
+
+            task = asyncio.create_task(consume())
+            await first_token.wait()
+            held_during = held_sessions(nodes)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await asyncio.gather(*coordinator.closing_sessions)
+            return held_during, held_sessions(nodes)
+
+    held_during, held_after = asyncio.run(scenario())
+    assert held_during == [1, 1, 1]
+    assert held_after == [0, 0, 0]
@@ -0,0 +1,62 @@
+"""Speculative decoding: drafted steps must produce exactly the plain greedy output."""
+import asyncio
+import pytest
+from prometheus_client import REGISTRY
+
+from conftest import PROMPT, generate, reference_greedy, serve_pipeline
+
+# A draft unrelated to the target, so most proposals are rejected
+RANDOM_DRAFT = {'n_layer': 1, 'n_embd': 16, 'n_head': 2, 'n_positions': 128}
+
+GENERATION_SETTINGS = [
+    {},
+    {'repetition_penalty': 1.3},
+    {'repetition_penalty': 1.3, 'no_repeat_ngram_size': 2}
+]
+
+def draft_tokens(result: str) -> float:
+    """Return how many draft tokens the coordinator has counted as proposed or accepted."""
+    labels = {'result': result}
+    return REGISTRY.get_sample_value('coordinator_speculative_draft_tokens_total', labels) or 0.0
+
+def draft_context_tokens(source: str) -> float:
+    """Return how many context tokens the draft model on node1 has reused or computed."""
+    labels = {'node_id': 'node1', 'source': source}
+    return REGISTRY.get_sample_value('model_draft_context_tokens_total', labels) or 0.0
+
+@pytest.mark.parametrize('settings', GENERATION_SETTINGS)
+@pytest.mark.parametrize('draft', ['random', 'target'])
+def test_speculative_output_matches_greedy(tmp_path, tiny_checkpoint, draft, settings):
+    # The target checkpoint as its own draft gets every proposal accepted
+    draft_model = RANDOM_DRAFT if draft == 'random' else tiny_checkpoint
+    before = {result: draft_tokens(result) for result in ('proposed', 'accepted')}
+    before.update({source: draft_context_tokens(source) for source in ('cached', 'computed')})
+
+    async def scenario():
+        async with serve_pipeline(
+            tmp_path, tiny_checkpoint, 2, node_settings={0: {'draft_model': draft_model}}
+        ) as (coordinator, nodes, _):
+            greedy = await generate(coordinator, PROMPT, strategy='greedy', max_new_tokens=20, **settings)
+            speculative = await generate(
+                coordinator, PROMPT, strategy='greedy', max_new_tokens=20, num_draft_tokens=4, **settings
+            )
+            await asyncio.gather(*coordinator.closing_sessions)
+            return greedy, speculative, [len(node.sessions.entries) for node in nodes]
+
+    greedy, speculative, held = asyncio.run(scenario())
+    assert speculative == greedy
+    if not settings:
+        assert greedy == reference_greedy(tiny_checkpoint, PROMPT, 20)
+
+    proposed = draft_tokens('proposed') - before['proposed']
+    accepted = draft_tokens('accepted') - before['accepted']
+    assert proposed > 0
+    if draft == 'target':
+        assert accepted == proposed
+
+    # After the prompt, each step only runs what the previous step added, plus the token it ended on
+    computed = draft_context_tokens('computed') - before['computed']
+    assert computed <= len(PROMPT) + 2 * 20
+    assert draft_context_tokens('cached') - before['cached'] > 0
+    # Closing the session drops the draft model's key/values along with the stage's
+    assert held == [0, 0]